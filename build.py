@@ -1,58 +1,196 @@
 #!/usr/bin/env python3
 """
 Build script for generating and serving the static site.
-Supports both one-time builds and development mode with auto-rebuild.
+
+Commands:
+    build     Generate the site once (the default)
+    serve     Generate, then serve it locally and rebuild on template changes
+    watch     Generate, then rebuild on template changes (and, with
+              --notion, on Notion edits)
+    daemon    Keep a generator warm and build on local trigger requests
+    merge     Generate the site from the posts of shards built with --shard
+    check-links  Generate, then check every outbound link of the posts and gigs
+    snapshot  Generate while recording every Notion response to a JSON file
+    bench     Measure the import cost of each command with ``python -X importtime``,
+              or with --memory, peak build memory on synthetic sites
+
+Each command imports only what it needs, so ``--help`` or an offline build
+from a snapshot never loads the Notion HTTP stack, the file watcher or the
+HTTP server.
 """
 
-import os
+import argparse
 import sys
+import threading
 import time
-import http.server
-import socketserver
-import argparse
 from pathlib import Path
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-
-from src.generator.site_generator import SiteGenerator
-from src.spotify.spotify import get_current_track
-
-class RebuildHandler(FileSystemEventHandler):
-    """Handles file system events to trigger site rebuilds."""
-    
-    def __init__(self, generator):
-        self.generator = generator
-        self.last_build = 0
-        self.build_delay = 1  # Minimum seconds between builds
-        
-    def on_any_event(self, event):
-        """Rebuild site on any file change, with rate limiting."""
-        if event.is_directory:
-            return
-            
-        # Skip temporary files
-        if event.src_path.endswith('.tmp'):
-            return
-            
-        # Implement rate limiting
-        current_time = time.time()
-        if current_time - self.last_build > self.build_delay:
-            print(f"\nRebuilding site due to changes in {event.src_path}")
-            self.generator.generate_site()
-            self.last_build = current_time
+
+BASE_DIR = Path(__file__).parent
+TEMPLATE_DIR = BASE_DIR / "src" / "templates"
+OUTPUT_DIR = BASE_DIR / "output"
+DEFAULT_SNAPSHOT = BASE_DIR / "data" / "notion-snapshot.json"
+DEFAULT_SHARD_DIR = BASE_DIR / "shards"
+
+# Serializes rebuilds triggered by file changes and by Notion polling
+BUILD_LOCK = threading.Lock()
+
+# What each command imports, measured by the bench command
+BENCH_TARGETS = {
+    "cli": "import build",
+    "build": "import build; build._site_generator(); build._notion_api()",
+    "build --snapshot": "import build; build._site_generator(); build._snapshot()",
+    "serve": "import build; build._site_generator(); build._notion_api(); "
+             "build._observer(); build._http_server()",
+}
+
+
+def _site_generator():
+    from src.generator.site_generator import SiteGenerator
+    return SiteGenerator
+
+
+def _notion_api():
+    from src.notion.client import create_notion_client
+    return create_notion_client
+
+
+def _snapshot():
+    from src.notion import snapshot
+    return snapshot
+
+
+def _observer():
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    return Observer, FileSystemEventHandler
+
+
+def _http_server():
+    import http.server
+    import socketserver
+    return http.server, socketserver
+
+
+def create_generator(args, notion=None):
+    """
+    Create the site generator for a command.
+
+    Args:
+        args: Parsed arguments; ``snapshot`` selects an offline build and
+            ``out_of_core`` keeps article bodies on disk
+        notion: Notion client to use instead of the default one
+
+    Returns:
+        SiteGenerator writing to the output directory
+    """
+    if notion is None and getattr(args, "snapshot", None):
+        notion = _snapshot().load_snapshot(args.snapshot)
+    return _site_generator()(str(OUTPUT_DIR), str(TEMPLATE_DIR), notion=notion,
+                             out_of_core=getattr(args, "out_of_core", False))
+
+
+def generate(generator):
+    """Generate the site."""
+    print("Generating site...")
+    generator.generate_site()
+    print("Site generation complete!")
+
+
+def watch(generator):
+    """
+    Rebuild the site whenever a template changes.
+
+    Args:
+        generator: Site generator to rebuild with
+
+    Returns:
+        Started watchdog observer; stop and join it when done
+    """
+    Observer, FileSystemEventHandler = _observer()
+
+    class RebuildHandler(FileSystemEventHandler):
+        """Handles file system events to trigger site rebuilds."""
+
+        def __init__(self):
+            self.last_build = 0
+            self.build_delay = 1  # Minimum seconds between builds
+
+        def on_any_event(self, event):
+            """Rebuild site on any file change, with rate limiting."""
+            if event.is_directory:
+                return
+
+            # Skip temporary files
+            if event.src_path.endswith('.tmp'):
+                return
+
+            # Implement rate limiting
+            current_time = time.time()
+            if current_time - self.last_build > self.build_delay:
+                print(f"\nRebuilding site due to changes in {event.src_path}")
+                with BUILD_LOCK:
+                    generator.generate_site()
+                self.last_build = current_time
+
+    observer = Observer()
+    handler = RebuildHandler()
+
+    # Watch template and content directories
+    for watch_dir in [TEMPLATE_DIR, BASE_DIR / "content"]:
+        if watch_dir.exists():
+            observer.schedule(handler, str(watch_dir), recursive=True)
+
+    observer.start()
+    print("Watching for changes...")
+    return observer
+
+
+def poll_notion(generator, interval, since):
+    """
+    Incrementally rebuild the site from Notion edits until interrupted.
+
+    Each poll fetches only the pages edited since the previous poll
+    started and regenerates the pages that depend on them.
+
+    Args:
+        generator: Site generator that has completed a full build
+        interval: Seconds between polls
+        since: Notion timestamp taken before the full build started, so
+            edits made while it ran are picked up by the first poll
+    """
+    from datetime import datetime, timezone
+
+    from src.generator.daemon import notion_timestamp
+
+    print(f"Polling Notion every {interval}s for edits...")
+    while True:
+        time.sleep(interval)
+        started = datetime.now(timezone.utc)
+        try:
+            with BUILD_LOCK:
+                if generator.generate_site(since=since):
+                    print(f"Published Notion edits in {(datetime.now(timezone.utc) - started).total_seconds():.1f}s")
+        except Exception as e:
+            # Keep polling; the next poll retries from the same time
+            print(f"Incremental rebuild failed: {e}")
+            continue
+        since = notion_timestamp(started)
+
 
 def serve_site(directory, port=8000):
     """
     Serve the static site using Python's built-in HTTP server.
-    
+
     Args:
         directory: Directory containing the static site
         port: Port number to serve on
     """
-    class Handler(http.server.SimpleHTTPRequestHandler):
+    server, socketserver = _http_server()
+
+    class Handler(server.SimpleHTTPRequestHandler):
         def __init__(self, *args, **kwargs):
             super().__init__(*args, directory=directory, **kwargs)
-    
+
     with socketserver.TCPServer(("", port), Handler) as httpd:
         print(f"Serving site at http://localhost:{port}")
         try:
@@ -61,68 +199,325 @@ def serve_site(directory, port=8000):
             print("\nStopping server...")
             httpd.shutdown()
 
-def main():
+
+def write_delta(old_files, output_dir, delta_dir):
+    """
+    Write the files changed since a previous deploy manifest.
+
+    Creates changed.txt (files to upload, including the new manifest) and
+    deleted.txt (files to remove) with one output-relative path per line,
+    e.g. for ``rsync --files-from=changed.txt output/ host:site/``.
+
+    Args:
+        old_files: File entries of the deployed site's manifest
+        output_dir: Directory containing the new build
+        delta_dir: Directory to write the lists to
+    """
+    from src.generator.deploy import MANIFEST_NAME, diff_manifests, load_manifest
+
+    new_files = load_manifest(Path(output_dir) / MANIFEST_NAME)
+    changed, deleted = diff_manifests(old_files, new_files)
+
+    delta_dir = Path(delta_dir)
+    delta_dir.mkdir(parents=True, exist_ok=True)
+    (delta_dir / "changed.txt").write_text("".join(f"{path}\n" for path in changed + [MANIFEST_NAME]))
+    (delta_dir / "deleted.txt").write_text("".join(f"{path}\n" for path in deleted))
+
+    changed_bytes = sum(new_files[path]['size'] for path in changed)
+    print(f"Delta: {len(changed)} changed ({changed_bytes} bytes), {len(deleted)} deleted "
+          f"of {len(new_files)} files; lists written to {delta_dir}")
+
+
+def parse_shard(value):
+    """Argument type for ``--shard i/N``."""
+    from src.generator.shards import parse_shard as parse
+
+    try:
+        return parse(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def cmd_build(args):
+    """Generate the site once, optionally listing the files changed since a deploy."""
+    if args.sites:
+        if args.shard or args.changed_since:
+            sys.exit("--sites cannot be combined with --shard or --changed-since")
+        build_sites(args)
+        return
+
+    if args.shard:
+        from src.generator.shards import shard_dir
+
+        index, count = args.shard
+        create_generator(args).generate_shard(index, count, shard_dir(args.shard_dir, index, count))
+        return
+
+    old_files = None
+    if args.changed_since:
+        from src.generator.deploy import load_manifest
+
+        # Read the old manifest before the build replaces the one in output/
+        old_files = load_manifest(args.changed_since)
+
+    generate(create_generator(args))
+
+    if old_files is not None:
+        write_delta(old_files, OUTPUT_DIR, args.delta_dir)
+
+
+def build_sites(args):
+    """Build every site of a sites file in one process."""
+    from src.generator.sites import build_sites as build, load_sites
+
+    sites = load_sites(args.sites)
+    if args.snapshot:
+        notion = _snapshot().load_snapshot(args.snapshot)
+    else:
+        from src.config import require
+
+        notion = _notion_api()(require("NOTION_API_KEY"))
+    build(sites, notion, out_of_core=args.out_of_core)
+
+
+def cmd_merge(args):
+    """Generate the site from the articles of a complete set of shards."""
+    from src.generator.shards import SHARD_MANIFEST
+
+    shards = args.shards or sorted(path.parent for path in Path(args.shard_dir).glob(f"*/{SHARD_MANIFEST}"))
+    old_files = None
+    if args.changed_since:
+        from src.generator.deploy import load_manifest
+
+        old_files = load_manifest(args.changed_since)
+
+    print(f"Merging {len(shards)} shards...")
+    create_generator(args).generate_site(shards=[Path(shard) for shard in shards])
+    print("Site generation complete!")
+
+    if old_files is not None:
+        write_delta(old_files, OUTPUT_DIR, args.delta_dir)
+
+
+def cmd_check_links(args):
+    """Generate the site, then check its outbound links and report the broken ones."""
+    from src.generator.link_checker import LinkChecker, report
+
+    generator = create_generator(args)
+    generate(generator)
+    links = generator.outbound_links()
+    urls = {url for page_urls in links.values() for url in page_urls}
+
+    started = time.perf_counter()
+    checker = LinkChecker(generator.cache_dir)
+    results = checker.check(urls, recheck=args.recheck)
+    broken = report(links, results)
+    broken_urls = {url for page_urls in broken.values() for url in page_urls}
+    print(f"\n{len(broken_urls)} of {len(urls)} links broken, on {len(broken)} of {len(links)} pages "
+          f"({checker.checked} checked, {len(urls) - checker.checked} cached, "
+          f"{time.perf_counter() - started:.1f}s)")
+    if broken:
+        sys.exit(1)
+
+
+def cmd_serve(args):
+    """Generate the site, then serve it and rebuild on changes."""
+    generator = create_generator(args)
+    generate(generator)
+    observer = watch(generator)
+    serve_site(str(OUTPUT_DIR), args.port)
+    observer.stop()
+    observer.join()
+
+
+def cmd_watch(args):
+    """Generate the site, then rebuild on changes."""
+    from datetime import datetime, timezone
+
+    from src.generator.daemon import notion_timestamp
+
+    generator = create_generator(args)
+    # Taken before the build, like the daemon's sync points
+    since = notion_timestamp(datetime.now(timezone.utc))
+    generate(generator)
+    observer = watch(generator)
+    try:
+        if args.notion:
+            poll_notion(generator, args.interval, since)
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nStopping file watcher...")
+    observer.stop()
+    observer.join()
+
+
+def cmd_daemon(args):
+    """Keep a warm generator and build whenever a trigger request arrives."""
+    import asyncio
+    import os
+
+    from src.generator.daemon import BuildDaemon
+
+    daemon = BuildDaemon(create_generator(args), token=os.getenv("BUILD_DAEMON_TOKEN"))
+    try:
+        asyncio.run(daemon.serve(args.host, None if args.no_tcp else args.port, args.socket))
+    except KeyboardInterrupt:
+        print("\nStopping build daemon...")
+
+
+def cmd_snapshot(args):
+    """Generate the site while recording the Notion responses it used."""
+    from src.config import require
+
+    snapshot = _snapshot()
+    recorder = snapshot.RecordingClient(_notion_api()(require("NOTION_API_KEY")))
+    generate(create_generator(args, notion=recorder))
+    snapshot.save_snapshot(args.path, recorder)
+
+
+def import_times(code, runs=3):
+    """
+    Measure the imports a snippet triggers in a fresh interpreter.
+
+    Args:
+        code: Python code passed to ``python -c``
+        runs: Interpreters to start; the fastest run is reported
+
+    Returns:
+        Tuple of (total self time in microseconds, list of
+        (cumulative microseconds, module) for top-level imports)
+    """
+    import subprocess
+
+    best = None
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                                cwd=BASE_DIR, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Import benchmark failed for {code!r}:\n{result.stderr}")
+
+        total, top_level = 0, []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            total += int(self_us)
+            if not name[1:].startswith(" "):
+                top_level.append((int(cumulative_us), name.strip()))
+        if best is None or total < best[0]:
+            best = (total, top_level)
+    return best
+
+
+def cmd_bench(args):
+    """Report the import cost of each command, or peak build memory."""
+    if args.memory:
+        from src.generator import benchmark
+        benchmark.run([int(count) for count in args.memory.split(",")], TEMPLATE_DIR)
+        return
+
+    over_budget = False
+    for target, code in BENCH_TARGETS.items():
+        total, top_level = import_times(code, args.runs)
+        print(f"{target:<18} {total / 1000:8.1f} ms")
+        for cumulative, name in sorted(top_level, reverse=True)[:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+        if target == "cli" and args.budget_ms is not None and total / 1000 > args.budget_ms:
+            print(f"CLI startup exceeds the {args.budget_ms} ms budget")
+            over_budget = True
+    if over_budget:
+        sys.exit(1)
+
+
+def main(argv=None):
     """Main entry point for the build script."""
     parser = argparse.ArgumentParser(description="Build and serve the static site")
-    parser.add_argument("--serve", action="store_true", help="Start development server")
-    parser.add_argument("--port", type=int, default=8000, help="Port for development server")
-    parser.add_argument("--watch", action="store_true", help="Watch for changes and rebuild")
-    args = parser.parse_args()
-    
-    # Set up paths
-    base_dir = Path(__file__).parent
-    template_dir = base_dir / "src" / "templates"
-    output_dir = base_dir / "output"
-    
-    # Initialize site generator
-    generator = SiteGenerator(str(output_dir), str(template_dir))
-    
-    # Generate site
-    print("Generating site...")
-    generator.generate_site()
-    print("Site generation complete!")
-    
-    if args.watch or args.serve:
-        # Set up file watcher
-        observer = Observer()
-        handler = RebuildHandler(generator)
-        
-        # Watch template and content directories
-        for watch_dir in [template_dir, base_dir / "content"]:
-            observer.schedule(handler, str(watch_dir), recursive=True)
-        
-        observer.start()
-        print("Watching for changes...")
-        
-        if args.serve:
-            # Start development server
-            serve_site(str(output_dir), args.port)
-            observer.stop()
-        else:
-            # Watch mode only
-            try:
-                while True:
-                    time.sleep(1)
-            except KeyboardInterrupt:
-                observer.stop()
-                print("\nStopping file watcher...")
-        
-        observer.join()
-
-class SiteGenerator:
-    def __init__(self, output_dir, template_dir):
-        self.output_dir = output_dir
-        self.template_dir = template_dir
-
-    def generate_site(self):
-        # Get Spotify data
-        current_track = get_current_track()
-        
-        # Add to your template context
-        context = {
-            'current_track': current_track
-        }
-        # Your existing build code...
+    commands = parser.add_subparsers(dest="command")
+
+    def add_generator_options(command):
+        command.add_argument("--snapshot", metavar="FILE",
+                             help="Build offline from a Notion snapshot instead of the API")
+        command.add_argument("--out-of-core", action="store_true",
+                             help="Keep article bodies in the cache instead of memory")
+
+    def add_delta_options(command):
+        command.add_argument("--changed-since", metavar="MANIFEST",
+                             help="Deploy manifest of the live site; list the files changed since it")
+        command.add_argument("--delta-dir", default="deploy-delta",
+                             help="Where --changed-since writes changed.txt and deleted.txt")
+
+    def add_shard_dir_option(command):
+        command.add_argument("--shard-dir", default=str(DEFAULT_SHARD_DIR),
+                             help=f"Root of the shard directories "
+                                  f"(default: {DEFAULT_SHARD_DIR.relative_to(BASE_DIR)})")
+
+    build = commands.add_parser("build", help="Generate the site (default)")
+    add_generator_options(build)
+    add_delta_options(build)
+    build.add_argument("--shard", metavar="I/N", type=parse_shard,
+                       help="Only fetch and process shard I of N of the posts, for a later merge")
+    add_shard_dir_option(build)
+    build.add_argument("--sites", metavar="FILE",
+                       help="Build every site listed in a sites file, sharing connections and caches")
+    build.set_defaults(func=cmd_build)
+
+    merge = commands.add_parser("merge", help="Generate the site from shards built with --shard")
+    add_generator_options(merge)
+    add_delta_options(merge)
+    add_shard_dir_option(merge)
+    merge.add_argument("shards", nargs="*", metavar="DIR",
+                       help="Shard directories (default: every shard below --shard-dir)")
+    merge.set_defaults(func=cmd_merge)
+
+    check_links = commands.add_parser("check-links", help="Generate, then report broken outbound links")
+    add_generator_options(check_links)
+    check_links.add_argument("--recheck", action="store_true",
+                             help="Check every link again instead of using cached results")
+    check_links.set_defaults(func=cmd_check_links)
+
+    serve = commands.add_parser("serve", help="Generate, serve and rebuild on changes")
+    add_generator_options(serve)
+    serve.add_argument("--port", type=int, default=8000, help="Port for development server")
+    serve.set_defaults(func=cmd_serve)
+
+    watch_command = commands.add_parser("watch", help="Generate and rebuild on changes")
+    add_generator_options(watch_command)
+    watch_command.add_argument("--notion", action="store_true",
+                               help="Also poll Notion and publish edited pages incrementally")
+    watch_command.add_argument("--interval", type=float, default=30,
+                               help="Seconds between Notion polls (default: 30)")
+    watch_command.set_defaults(func=cmd_watch)
+
+    daemon = commands.add_parser("daemon", help="Keep caches warm and build on trigger requests")
+    add_generator_options(daemon)
+    daemon.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    daemon.add_argument("--port", type=int, default=8002, help="Port for trigger requests")
+    daemon.add_argument("--no-tcp", action="store_true", help="Only listen on --socket")
+    daemon.add_argument("--socket", metavar="PATH", help="Also listen on a Unix socket")
+    daemon.set_defaults(func=cmd_daemon)
+
+    snapshot = commands.add_parser("snapshot", help="Generate and save the Notion responses used")
+    snapshot.add_argument("path", nargs="?", default=str(DEFAULT_SNAPSHOT),
+                          help=f"Snapshot file (default: {DEFAULT_SNAPSHOT.relative_to(BASE_DIR)})")
+    snapshot.set_defaults(func=cmd_snapshot)
+
+    bench = commands.add_parser("bench", help="Measure import time of each command")
+    bench.add_argument("--runs", type=int, default=3, help="Interpreters per command; fastest counts")
+    bench.add_argument("--top", type=int, default=5, help="Slowest top-level imports to list")
+    bench.add_argument("--budget-ms", type=float, help="Fail if CLI startup takes longer")
+    bench.add_argument("--memory", metavar="COUNTS",
+                       help="Instead, measure peak build memory for synthetic sites of "
+                            "these post counts, e.g. 1000,10000,50000")
+    bench.set_defaults(func=cmd_bench)
+
+    args = parser.parse_args(argv)
+    if args.command == "daemon" and args.no_tcp and not args.socket:
+        daemon.error("--no-tcp needs --socket, or the daemon would not listen anywhere")
+    if args.command is None:
+        args = parser.parse_args(["build"])
+    args.func(args)
+
 
 if __name__ == "__main__":
     main()
@@ -13,28 +13,64 @@ BASE_DIR = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 TEMPLATE_DIR = BASE_DIR / "src" / "templates"
 OUTPUT_DIR = BASE_DIR / "output"
 STATIC_DIR = BASE_DIR / "static"
+CACHE_DIR = BASE_DIR / ".build-cache"
+DATA_DIR = BASE_DIR / "data"
+LISTENING_DB = DATA_DIR / "listening.db"
 
-# Notion settings
+# Notion settings (validated by require() where they are used, so commands
+# that never talk to Notion work without them)
 NOTION_API_KEY = os.getenv("NOTION_API_KEY")
 NOTION_DATABASE_ID = os.getenv("NOTION_DATABASE_ID")
 
-if not NOTION_API_KEY or not NOTION_DATABASE_ID:
-    raise ValueError(
-        "Missing required environment variables. "
-        "Please ensure NOTION_API_KEY and NOTION_DATABASE_ID are set in your .env file."
-    )
+
+def require(name: str) -> str:
+    """
+    Read a required environment variable.
+
+    Args:
+        name: Variable name
+
+    Returns:
+        The variable's value
+
+    Raises:
+        ValueError: If the variable is unset or empty
+    """
+    value = os.getenv(name)
+    if not value:
+        raise ValueError(
+            f"Missing required environment variable {name}. "
+            f"Please ensure it is set in your .env file."
+        )
+    return value
+
 
 # Site settings
 SITE_TITLE = "Jimi Land"
-SITE_DESCRIPTION = "Personal blog powered by Notion"
+SITE_DESCRIPTION = "A personal website about music, life, and adventures"
 SITE_AUTHOR = "Josh Brown"
 
 # Use environment variable for base URL, defaulting to GitHub Pages URL
 SITE_BASE_URL = os.getenv('SITE_BASE_URL', '/jimiland')
 SITE_URL = f"https://cajunjimi.github.io{SITE_BASE_URL}"
 
+# Build pipeline: threads fetching article content from Notion (requests
+# are still rate limited), and items buffered between pipeline stages
+NOTION_FETCH_WORKERS = int(os.getenv("NOTION_FETCH_WORKERS", "4"))
+PIPELINE_QUEUE_SIZE = 16
+
+# Render YouTube videos as click-to-load thumbnails (mirrored at build
+# time) instead of player iframes; set VIDEO_FACADES=0 for plain iframes
+VIDEO_FACADES = os.getenv("VIDEO_FACADES", "1") != "0"
+
+# Fetch OpenGraph titles, descriptions and images for bookmark and link
+# preview cards (cached between builds); set LINK_PREVIEWS=0 to skip
+LINK_PREVIEWS = os.getenv("LINK_PREVIEWS", "1") != "0"
+
 # Blog settings
 POSTS_PER_PAGE = 10
+GIGS_PER_PAGE = 25
+MEDIA_PER_PAGE = 24
 DATE_FORMAT = "%B %d, %Y"
 
 # Required Notion database properties
@@ -0,0 +1,109 @@
+"""
+Compact article model.
+
+Articles are created once per build from processed Notion pages. Derived
+values used by the listing pages (word count, reading time, excerpt,
+parsed date and year) are computed at construction instead of on every
+template render, and ``__slots__`` keeps per-article memory small when
+thousands of articles are held at once.
+"""
+
+import html
+import re
+import sys
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+# Average reading speed (words per minute)
+WORDS_PER_MINUTE = 200
+
+# Length of the plain-text excerpt shown in listings
+EXCERPT_LENGTH = 200
+
+TAG_RE = re.compile(r'<[^>]+>')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def html_to_text(content: str) -> str:
+    """Strip HTML tags and collapse whitespace."""
+    text = html.unescape(TAG_RE.sub(' ', content or ''))
+    return WHITESPACE_RE.sub(' ', text).strip()
+
+
+def reading_time(word_count: int) -> str:
+    """Format an estimated reading time (e.g. "5 min read")."""
+    minutes = max(1, round(word_count / WORDS_PER_MINUTE))
+    return f"{minutes} min read"
+
+
+class Article:
+    """
+    A processed article with precomputed listing metadata.
+
+    Args:
+        id: Notion page ID
+        title: Article title
+        date: Publication date as an ISO string (YYYY-MM-DD)
+        description: Short description from Notion
+        tags: Tag names
+        slug: URL-friendly slug
+        content_html: Rendered article body
+        updated: Last edit time in Notion (ISO timestamp, may be empty)
+    """
+
+    # Fields stored in the article cache; everything else is derived
+    FIELDS = ('id', 'title', 'date', 'description', 'tags', 'slug', 'content_html', 'updated')
+
+    __slots__ = FIELDS + ('word_count', 'reading_time', '_excerpt', '_truncated', 'published', 'year')
+
+    def __init__(self, id: str, title: str, date: str, description: str,
+                 tags: List[str], slug: str, content_html: str, updated: str = ''):
+        self.id = id
+        self.title = title
+        self.date = date
+        self.description = description
+        # Tags, reading times and years repeat across articles; interning
+        # keeps one copy of each instead of one per article
+        self.tags = [sys.intern(tag) for tag in tags]
+        self.slug = slug
+        self.content_html = content_html
+        self.updated = updated
+
+        text = html_to_text(content_html)
+        self.word_count = len(text.split())
+        self.reading_time = sys.intern(reading_time(self.word_count))
+        self._excerpt, self._truncated = _truncate(text, EXCERPT_LENGTH)
+        self.published = _parse_date(date)
+        self.year = sys.intern(date[:4]) if date else ''
+
+    @property
+    def excerpt(self) -> str:
+        # The ellipsis is added here so the stored text stays one byte per
+        # character when it is ASCII
+        return self._excerpt + '…' if self._truncated else self._excerpt
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Article':
+        """Create an article from its cached dictionary form."""
+        return cls(**{field: data[field] for field in cls.FIELDS})
+
+    def to_dict(self) -> Dict:
+        """Dictionary of the stored (non-derived) fields."""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self):
+        return f"Article(id={self.id!r}, slug={self.slug!r}, date={self.date!r})"
+
+
+def _truncate(text: str, length: int) -> Tuple[str, bool]:
+    """Cut text at a word boundary; also returns whether it was shortened."""
+    if len(text) <= length:
+        return text, False
+    return text[:length].rsplit(' ', 1)[0].rstrip(' ,.;:'), True
+
+
+def _parse_date(value: str) -> Optional[date]:
+    try:
+        return datetime.strptime(value[:10], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
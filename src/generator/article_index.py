@@ -0,0 +1,48 @@
+"""
+Sorted index of articles shared by all listing pages.
+
+Articles are sorted once per build (newest first) and grouped by tag, so
+the index, archive and tag pages all page through the same ordering
+instead of each re-sorting the article list.
+"""
+
+from typing import Callable, Dict, List
+
+from .article import Article
+
+
+class TagGroup:
+    """Articles sharing one tag, newest first."""
+
+    __slots__ = ('name', 'slug', 'articles')
+
+    def __init__(self, name: str, slug: str):
+        self.name = name
+        self.slug = slug
+        self.articles: List[Article] = []
+
+
+class ArticleIndex:
+    """
+    Articles sorted newest first with per-tag groupings.
+
+    Args:
+        articles: Processed articles
+        slugify: Function turning a tag name into a URL-safe slug
+    """
+
+    def __init__(self, articles: List[Article], slugify: Callable[[str], str]):
+        # Ties on date fall back to the title (then ID) so page contents are stable
+        self.articles = sorted(articles, key=lambda a: (a.date, a.title, a.id), reverse=True)
+        self.by_tag: Dict[str, TagGroup] = {}
+
+        for article in self.articles:
+            for tag in article.tags:
+                group = self.by_tag.get(tag)
+                if group is None:
+                    group = self.by_tag[tag] = TagGroup(tag, slugify(tag))
+                group.articles.append(article)
+
+    def tags(self) -> List[TagGroup]:
+        """Tag groups, most used first, then alphabetically."""
+        return sorted(self.by_tag.values(), key=lambda g: (-len(g.articles), g.name.lower(), g.name))
@@ -0,0 +1,155 @@
+"""
+Memory benchmark for large archives.
+
+Builds a site from a synthetic Notion workspace of N posts and reports the
+peak resident memory of the build, with article bodies held in memory and
+in out-of-core mode. Each build runs in a fresh interpreter, so the peak
+belongs to that build alone and is read from the operating system instead
+of tracing every allocation, which would slow a 50k-post build down
+several times over. Run it through the CLI:
+
+    python build.py bench --memory 1000,10000,50000
+"""
+
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+# Paragraphs per synthetic post, and words per paragraph
+PARAGRAPHS = 12
+PARAGRAPH_WORDS = 60
+
+TAGS = [f'topic-{n}' for n in range(40)]
+
+
+def _vocabulary(size: int = 5000) -> List[str]:
+    rnd = random.Random(0)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return [''.join(rnd.choice(letters) for _ in range(rnd.randint(3, 10))) for _ in range(size)]
+
+
+def _text(value: str) -> Dict:
+    return {'rich_text': [{'type': 'text', 'text': {'content': value}, 'plain_text': value}]}
+
+
+class SyntheticNotion:
+    """
+    Offline stand-in for the Notion client serving generated posts.
+
+    Rows and blocks are generated on request from the post number, so the
+    benchmark itself holds nothing per post.
+
+    Args:
+        posts: Number of posts in the blog database
+    """
+
+    def __init__(self, posts: int):
+        self.posts = posts
+        self.vocabulary = _vocabulary()
+        self.databases = _Endpoints(query=self._query)
+        self.blocks = _Endpoints(children=_Endpoints(list=self._blocks))
+
+    def _row(self, n: int) -> Dict:
+        rnd = random.Random(n)
+        day = f"{2000 + n % 25}-{n % 12 + 1:02d}-{n % 28 + 1:02d}"
+        return {
+            'id': f'post-{n}',
+            'created_time': f'{day}T00:00:00.000Z',
+            'last_edited_time': f'{day}T12:00:00.000Z',
+            'properties': {
+                'Title': {'title': [{'plain_text': f'Synthetic post {n}'}]},
+                'Date': {'date': {'start': day}},
+                'Description': _text(' '.join(rnd.sample(self.vocabulary, 12))),
+                'Tags': {'multi_select': [{'name': tag} for tag in rnd.sample(TAGS, 3)]},
+                'Content': {'rich_text': [{'text': {'content': f'https://notion.so/Post-content{n}'}}]},
+            },
+        }
+
+    def _query(self, database_id: str, start_cursor: str = None, **kwargs) -> Dict:
+        if database_id != os.getenv('NOTION_DATABASE_ID') or kwargs.get('filter'):
+            return {'results': [], 'has_more': False, 'next_cursor': None}
+        start = int(start_cursor or 0)
+        end = min(start + 100, self.posts)
+        return {'results': [self._row(n) for n in range(start, end)],
+                'has_more': end < self.posts, 'next_cursor': str(end)}
+
+    def _blocks(self, block_id: str, start_cursor: str = None, **kwargs) -> Dict:
+        n = int(block_id.replace('content', ''))
+        rnd = random.Random(-n - 1)
+        blocks = [{'id': f'{block_id}-h', 'type': 'heading_2',
+                   'heading_2': _text(f'Section of post {n}')}]
+        for i in range(PARAGRAPHS):
+            words = ' '.join(rnd.choices(self.vocabulary, k=PARAGRAPH_WORDS))
+            blocks.append({'id': f'{block_id}-{i}', 'type': 'paragraph', 'paragraph': _text(words)})
+        return {'results': blocks, 'has_more': False, 'next_cursor': None}
+
+
+class _Endpoints:
+    """Attribute namespace mimicking the client's endpoint objects."""
+
+    def __init__(self, **members):
+        self.__dict__.update(members)
+
+
+def measure(posts: int, out_of_core: bool, template_dir: Path) -> Dict:
+    """
+    Build a synthetic site once in a fresh interpreter and report its memory.
+
+    Args:
+        posts: Number of synthetic posts
+        out_of_core: Whether to build in out-of-core mode
+        template_dir: Site templates
+
+    Returns:
+        Dictionary with the post count, mode, resident MB before the build
+        (interpreter and imports), peak resident MB and seconds
+    """
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(_build, (posts, out_of_core, str(template_dir)))
+
+
+def _build(posts: int, out_of_core: bool, template_dir: str) -> Dict:
+    from .site_generator import SiteGenerator
+
+    work_dir = Path(tempfile.mkdtemp(prefix='jimiland-bench-'))
+    os.environ['NOTION_DATABASE_ID'] = 'synthetic-blog'
+    try:
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            base = _max_rss()
+            started = time.perf_counter()
+            generator = SiteGenerator(str(work_dir / 'output'), template_dir,
+                                      cache_dir=str(work_dir / 'cache'),
+                                      notion=SyntheticNotion(posts), out_of_core=out_of_core)
+            generator.generate_site()
+            seconds = time.perf_counter() - started
+        return {'posts': posts, 'out_of_core': out_of_core,
+                'base_mb': round(base / 2 ** 20, 1),
+                'peak_mb': round(_max_rss() / 2 ** 20, 1),
+                'seconds': round(seconds, 1)}
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _max_rss() -> int:
+    """Peak resident memory of this process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run(counts: Iterable[int], template_dir: Path):
+    """Print peak resident memory per post count, in memory and out of core."""
+    print(f"{'posts':>8} {'mode':<12} {'base MB':>9} {'peak MB':>9} {'seconds':>8}")
+    for posts in counts:
+        for out_of_core in (False, True):
+            result = measure(posts, out_of_core, template_dir)
+            mode = 'out-of-core' if out_of_core else 'in-memory'
+            print(f"{posts:>8} {mode:<12} {result['base_mb']:>9} {result['peak_mb']:>9} {result['seconds']:>8}", flush=True)
@@ -0,0 +1,167 @@
+"""
+On-disk cache of processed articles.
+
+Each processed article is stored as its own JSON file keyed by Notion page
+ID, with a manifest of content fingerprints. Build stages compare
+fingerprints to find out which articles changed since the previous build
+instead of re-scanning every article.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from .article import Article
+
+
+class ArticleCache:
+    """
+    Persistent store of processed articles keyed by Notion page ID.
+
+    Args:
+        cache_dir: Root cache directory; articles live in an ``articles``
+            subdirectory
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.dir = Path(cache_dir) / 'articles'
+        self.manifest_path = self.dir / 'manifest.json'
+        self.fingerprints: Dict[str, str] = {}
+        self.begin()
+
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, encoding='utf-8') as f:
+                    self.fingerprints = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable article cache: {e}")
+
+    @staticmethod
+    def fingerprint(article: Article) -> str:
+        """Hash of everything that ends up on the article's pages."""
+        payload = json.dumps(article.to_dict(), sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def update(self, articles: Iterable[Article]) -> Tuple[Set[str], Set[str]]:
+        """
+        Store the current set of articles.
+
+        Only articles whose fingerprint changed are rewritten; articles no
+        longer present are dropped.
+
+        Args:
+            articles: All processed articles of this build
+
+        Returns:
+            Tuple of (changed_ids, removed_ids)
+        """
+        self.begin()
+        for article in articles:
+            self.put(article)
+        return self.commit()
+
+    def begin(self):
+        """Start collecting the articles of a build one at a time with put()."""
+        self._current: Dict[str, str] = {}
+        self._changed: Set[str] = set()
+
+    def put(self, article: Article) -> str:
+        """
+        Store one article of the current build, writing it only if it changed.
+
+        Once stored, the article's body can be dropped from memory and
+        loaded again with get().
+
+        Returns:
+            The article's fingerprint
+        """
+        fingerprint = self.fingerprint(article)
+        self._current[article.id] = fingerprint
+        if self.fingerprints.get(article.id) != fingerprint:
+            self._changed.add(article.id)
+            self.dir.mkdir(parents=True, exist_ok=True)
+            self._write_json(self._path(article.id), article.to_dict())
+        return fingerprint
+
+    def commit(self) -> Tuple[Set[str], Set[str]]:
+        """
+        Finish a build started with begin(): drop articles that were not
+        put and save the manifest.
+
+        Returns:
+            Tuple of (changed_ids, removed_ids)
+        """
+        self.dir.mkdir(parents=True, exist_ok=True)
+        current, changed = self._current, self._changed
+        removed = set(self.fingerprints) - set(current)
+        for article_id in removed:
+            self._path(article_id).unlink(missing_ok=True)
+
+        self.fingerprints = current
+        self._write_json(self.manifest_path, current)
+        self.begin()
+        return changed, removed
+
+    def get(self, article_id: str) -> Optional[Article]:
+        """Load a cached article, or None if it is not cached."""
+        try:
+            with open(self._path(article_id), encoding='utf-8') as f:
+                return Article.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _path(self, article_id: str) -> Path:
+        return self.dir / f"{article_id}.json"
+
+    @staticmethod
+    def _write_json(path: Path, data):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data, sort_keys=True, separators=(',', ':')))
+
+
+class PageCache:
+    """
+    Signatures of listing pages rendered by the previous build.
+
+    A listing page whose signature (template version, the articles on the
+    page and its pagination) is unchanged and whose output file still
+    exists is not re-rendered.
+
+    Args:
+        cache_dir: Root cache directory; signatures live in ``pages.json``
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.path = Path(cache_dir) / 'pages.json'
+        self.previous: Dict[str, str] = {}
+        self.current: Dict[str, str] = {}
+
+        if self.path.exists():
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self.previous = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable page cache: {e}")
+
+    @staticmethod
+    def signature(*parts) -> str:
+        """Hash arbitrary JSON-serializable parts into a page signature."""
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def is_fresh(self, url_path: str, signature: str, output_file: Path) -> bool:
+        """Record the page's signature and report whether it can be skipped."""
+        self.current[url_path] = signature
+        return self.previous.get(url_path) == signature and output_file.exists()
+
+    def recorded(self, url_path: str) -> Optional[str]:
+        """Signature recorded for a page earlier in this build, if any."""
+        return self.current.get(url_path)
+
+    def save(self):
+        """Persist the signatures recorded during this build."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.current, sort_keys=True, separators=(',', ':')))
+        self.previous, self.current = self.current, {}
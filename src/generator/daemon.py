@@ -0,0 +1,213 @@
+"""
+Warm build daemon.
+
+Keeps one SiteGenerator alive between builds, so compiled templates,
+processed articles, rendered blocks, the build caches and the pooled
+Notion connection stay in memory, and serves a small local HTTP API (on
+a TCP port and/or a Unix socket) to trigger builds, e.g. from a webhook
+relay:
+
+    POST /build           Incremental build of Notion edits since the last build
+    POST /build?full=1    Full build
+    GET  /status          Build counters and the last build's result
+
+Triggers are coalesced: requests arriving while a build runs share the
+one build that starts after it, so a burst of webhooks costs at most two
+builds. When BUILD_DAEMON_TOKEN is set, POST requests must send it as a
+bearer token.
+
+Run with:
+    python build.py daemon --port 8002 --socket /tmp/jimiland-build.sock
+"""
+
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+
+def notion_timestamp(moment: datetime) -> str:
+    """
+    Format a time like Notion's ``last_edited_time``.
+
+    Notion rounds edit times down to the minute, so the time is truncated
+    too; an edit made in the same minute as a sync is picked up by the next.
+    """
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:00.000Z")
+
+
+class BuildDaemon:
+    """
+    Runs coalesced builds of a long-lived site generator on request.
+
+    Args:
+        generator: SiteGenerator kept warm between builds
+        token: Bearer token required to trigger builds (None allows anyone
+            who can reach the socket)
+    """
+
+    def __init__(self, generator, token: Optional[str] = None):
+        self.generator = generator
+        self.token = token
+        self.since: Optional[str] = None
+        self.builds = 0
+        self.requests = 0
+        self.last_result: Optional[Dict] = None
+        self._next: Optional[asyncio.Future] = None
+        self._full = False
+        self._runner: Optional[asyncio.Task] = None
+
+    async def request_build(self, full: bool = False) -> Dict:
+        """
+        Ask for a build and wait for it.
+
+        If a build is running, the request joins the single build that
+        follows it, since the running one may have missed the change.
+
+        Args:
+            full: Rebuild everything instead of only Notion edits
+
+        Returns:
+            Result of the build that served this request
+        """
+        self.requests += 1
+        self._full = self._full or full
+        if self._next is None:
+            self._next = asyncio.get_running_loop().create_future()
+        future = self._next
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+        return await asyncio.shield(future)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._next is not None:
+            future, self._next = self._next, None
+            full, self._full = self._full, False
+            try:
+                result = await loop.run_in_executor(None, self._build, full)
+            except Exception as e:
+                result = {'ok': False, 'error': str(e)}
+            self.last_result = result
+            future.set_result(result)
+
+    def _build(self, full: bool) -> Dict:
+        """Run one build on the executor thread."""
+        started = datetime.now(timezone.utc)
+        wall, cpu = time.perf_counter(), time.process_time()
+        since = None if full else self.since
+        changed = self.generator.generate_site(since=since)
+        # The next incremental build looks for edits made since this one began
+        self.since = notion_timestamp(started)
+        self.builds += 1
+        return {
+            'ok': True,
+            'build': self.builds,
+            'incremental': since is not None,
+            'changed': changed,
+            'seconds': round(time.perf_counter() - wall, 3),
+            'cpu_seconds': round(time.process_time() - cpu, 3),
+        }
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one HTTP connection."""
+        try:
+            request = await self._read_request(reader)
+            if request is None:
+                return
+            method, path, query, headers = request
+
+            if path == '/status' and method == 'GET':
+                await self._respond(writer, 200, {
+                    'builds': self.builds,
+                    'requests': self.requests,
+                    'running': self._runner is not None and not self._runner.done(),
+                    'since': self.since,
+                    'last': self.last_result,
+                })
+            elif path == '/build' and method == 'POST':
+                if self.token and headers.get('authorization') != f'Bearer {self.token}':
+                    await self._respond(writer, 401, {'ok': False, 'error': 'unauthorized'})
+                    return
+                result = await self.request_build(full=query.get('full') in ('1', 'true'))
+                await self._respond(writer, 200 if result['ok'] else 500, result)
+            elif path in ('/build', '/status'):
+                await self._respond(writer, 405, {'ok': False, 'error': 'method not allowed'})
+            else:
+                await self._respond(writer, 404, {'ok': False, 'error': 'not found'})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict, Dict]]:
+        """Parse the request line and headers; any body is ignored."""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            return None
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        path, _, query_string = target.partition('?')
+        query = dict(part.partition('=')[::2] for part in query_string.split('&') if part)
+        return method.upper(), path, query, headers
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, data: Dict):
+        reasons = {200: 'OK', 401: 'Unauthorized', 404: 'Not Found',
+                   405: 'Method Not Allowed', 500: 'Internal Server Error'}
+        body = json.dumps(data, sort_keys=True).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status} {reasons.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+
+    async def serve(self, host: str, port: Optional[int], socket_path: Optional[str] = None):
+        """
+        Run an initial full build and serve triggers until cancelled.
+
+        Args:
+            host: Interface of the TCP listener
+            port: TCP port, or None for no TCP listener
+            socket_path: Unix socket to also listen on
+
+        Raises:
+            ValueError: If neither a port nor a socket is given
+        """
+        if port is None and not socket_path:
+            raise ValueError("The build daemon needs a TCP port or a Unix socket to listen on")
+        servers = []
+        if port is not None:
+            servers.append(await asyncio.start_server(self.handle, host, port))
+            print(f"Build daemon listening on http://{host}:{port}")
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.unlink(socket_path)
+            servers.append(await asyncio.start_unix_server(self.handle, socket_path))
+            print(f"Build daemon listening on {socket_path}")
+
+        initial = asyncio.create_task(self.request_build(full=True))
+        try:
+            await asyncio.gather(*(server.serve_forever() for server in servers))
+        finally:
+            initial.cancel()
+            for server in servers:
+                server.close()
+            if socket_path and os.path.exists(socket_path):
+                os.unlink(socket_path)
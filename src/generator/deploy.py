@@ -0,0 +1,77 @@
+"""
+Deploy manifests and delta computation.
+
+Every build writes ``deploy-manifest.json`` to the output directory,
+listing each published file with its size and SHA-1 hash. Comparing the
+manifest of the deployed site with the one from a new build gives the
+files to upload and the files to delete, so targets that support partial
+sync (rsync, object storage) only transfer what changed.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+MANIFEST_NAME = 'deploy-manifest.json'
+MANIFEST_VERSION = 1
+
+
+def build_manifest(output_dir: Path, hashes: Dict[str, str]) -> Dict:
+    """
+    Build a deploy manifest for the files of a build.
+
+    Args:
+        output_dir: Site output directory
+        hashes: Site-relative path -> SHA-1 of the file's content
+
+    Returns:
+        Manifest dictionary with one {size, sha1} entry per file
+    """
+    output_dir = Path(output_dir)
+    files = {}
+    for rel_path in sorted(hashes):
+        path = output_dir / rel_path
+        if path.is_file():
+            files[rel_path] = {'size': path.stat().st_size, 'sha1': hashes[rel_path]}
+    return {'v': MANIFEST_VERSION, 'files': files}
+
+
+def write_manifest(output_dir: Path, hashes: Dict[str, str]) -> Path:
+    """Write the deploy manifest into the output directory."""
+    path = Path(output_dir) / MANIFEST_NAME
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(build_manifest(output_dir, hashes), sort_keys=True, separators=(',', ':')))
+    return path
+
+
+def load_manifest(path: Path) -> Dict[str, Dict]:
+    """
+    Load the file entries of a deploy manifest.
+
+    A missing file is treated as an empty manifest (everything changed).
+    """
+    path = Path(path)
+    if not path.exists():
+        print(f"No deploy manifest at {path}, treating every file as changed")
+        return {}
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('v') != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported deploy manifest version in {path}")
+    return manifest['files']
+
+
+def diff_manifests(old: Dict[str, Dict], new: Dict[str, Dict]) -> Tuple[List[str], List[str]]:
+    """
+    Compare two manifests' file entries.
+
+    Args:
+        old: Files of the deployed site
+        new: Files of the new build
+
+    Returns:
+        Tuple of (changed_or_added, deleted) site-relative paths, sorted
+    """
+    changed = sorted(path for path, entry in new.items() if old.get(path) != entry)
+    deleted = sorted(path for path in old if path not in new)
+    return changed, deleted
@@ -0,0 +1,154 @@
+"""
+Atom feed and XML sitemap generation.
+
+Both are produced as streams of XML chunks so large sites never hold a
+whole document in memory. Sitemaps switch to a sitemap index with
+numbered sitemap files once they exceed the protocol's limit of 50,000
+URLs per file. ``lastmod`` values come from Notion's last edit times so
+crawlers can skip pages that have not changed.
+"""
+
+from html import escape as _escape
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .article import Article
+
+# Entries in the Atom feed
+FEED_SIZE = 20
+
+# URLs per sitemap file allowed by the sitemap protocol
+SITEMAP_MAX_URLS = 50000
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+
+# xml.sax.saxutils would pull in urllib.request, http.client and ssl at startup
+def escape(text: str) -> str:
+    """Escape text for an XML element."""
+    return _escape(text, quote=False)
+
+
+def quoteattr(text: str) -> str:
+    """Escape and quote text for an XML attribute."""
+    return f'"{_escape(text)}"'
+
+
+def article_updated(article: Article) -> str:
+    """Last edit time of an article as an RFC 3339 timestamp."""
+    published = f"{article.date[:10]}T00:00:00Z"
+    updated = article.updated.replace('.000Z', 'Z')
+    # Posts can be backdated after their last edit
+    return max(updated, published)
+
+
+def atom_feed(articles: List[Article], site_url: str, title: str, author: str,
+              feed_path: str = '/feed.xml') -> Iterator[str]:
+    """
+    Stream an Atom feed of the newest articles.
+
+    Args:
+        articles: Articles sorted newest first
+        site_url: Absolute URL of the site root (no trailing slash)
+        title: Feed title
+        author: Feed author name
+        feed_path: Site-relative path the feed is published at
+
+    Yields:
+        Chunks of the XML document
+    """
+    entries = articles[:FEED_SIZE]
+    # The feed changes exactly when one of its entries does
+    updated = max((article_updated(a) for a in entries), default='1970-01-01T00:00:00Z')
+
+    yield XML_HEADER
+    yield '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+    yield f'  <title>{escape(title)}</title>\n'
+    yield f'  <id>{escape(site_url)}/</id>\n'
+    yield f'  <link href={quoteattr(site_url + "/")}/>\n'
+    yield f'  <link rel="self" href={quoteattr(site_url + feed_path)}/>\n'
+    yield f'  <updated>{updated}</updated>\n'
+    yield f'  <author><name>{escape(author)}</name></author>\n'
+
+    for article in entries:
+        url = f"{site_url}/posts/{article.slug}/"
+        yield '  <entry>\n'
+        yield f'    <title>{escape(article.title)}</title>\n'
+        yield f'    <id>{escape(url)}</id>\n'
+        yield f'    <link href={quoteattr(url)}/>\n'
+        yield f'    <published>{article.date[:10]}T00:00:00Z</published>\n'
+        yield f'    <updated>{article_updated(article)}</updated>\n'
+        for tag in article.tags:
+            yield f'    <category term={quoteattr(tag)}/>\n'
+        if article.description:
+            yield f'    <summary>{escape(article.description)}</summary>\n'
+        yield f'    <content type="html">{escape(article.content_html)}</content>\n'
+        yield '  </entry>\n'
+
+    yield '</feed>\n'
+
+
+def sitemap(urls: Iterable[Tuple[str, Optional[str]]]) -> Iterator[str]:
+    """
+    Stream a sitemap.
+
+    Args:
+        urls: (absolute URL, lastmod or None) pairs
+
+    Yields:
+        Chunks of the XML document
+    """
+    yield XML_HEADER
+    yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for url, lastmod in urls:
+        if lastmod:
+            yield f'  <url><loc>{escape(url)}</loc><lastmod>{lastmod}</lastmod></url>\n'
+        else:
+            yield f'  <url><loc>{escape(url)}</loc></url>\n'
+    yield '</urlset>\n'
+
+
+def sitemap_index(sitemaps: Iterable[Tuple[str, Optional[str]]]) -> Iterator[str]:
+    """
+    Stream a sitemap index.
+
+    Args:
+        sitemaps: (absolute sitemap URL, lastmod or None) pairs
+
+    Yields:
+        Chunks of the XML document
+    """
+    yield XML_HEADER
+    yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for url, lastmod in sitemaps:
+        lastmod_xml = f'<lastmod>{lastmod}</lastmod>' if lastmod else ''
+        yield f'  <sitemap><loc>{escape(url)}</loc>{lastmod_xml}</sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def sitemap_files(urls: List[Tuple[str, Optional[str]]], site_url: str,
+                  max_urls: int = SITEMAP_MAX_URLS) -> Iterator[Tuple[str, Iterator[str]]]:
+    """
+    Split URLs into sitemap files.
+
+    A single ``sitemap.xml`` is produced when the URLs fit; otherwise
+    ``sitemap-1.xml``, ``sitemap-2.xml``, ... plus a ``sitemap.xml`` index.
+
+    Args:
+        urls: (absolute URL, lastmod or None) pairs
+        site_url: Absolute URL of the site root (no trailing slash)
+        max_urls: URLs per sitemap file
+
+    Yields:
+        (site-relative path, XML chunks) pairs
+    """
+    if len(urls) <= max_urls:
+        yield 'sitemap.xml', sitemap(urls)
+        return
+
+    parts = []
+    for number, start in enumerate(range(0, len(urls), max_urls), 1):
+        chunk = urls[start:start + max_urls]
+        path = f'sitemap-{number}.xml'
+        parts.append((f'{site_url}/{path}', max((m for _, m in chunk if m), default=None)))
+        yield path, sitemap(chunk)
+    yield 'sitemap.xml', sitemap_index(parts)
@@ -0,0 +1,144 @@
+"""
+In-memory index of gigs.
+
+Groups processed gig records by artist, venue, location and year in a
+single pass and precomputes the per-group statistics shown on the gig
+listing pages (counts, first/last seen, top venues and artists).
+"""
+
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List
+
+
+class GigGroup:
+    """All gigs sharing one artist, venue, location or year."""
+
+    __slots__ = ('key', 'name', 'slug', 'gigs', 'artist_counts', 'venue_counts', 'stats')
+
+    def __init__(self, key: str, name: str, slug: str):
+        self.key = key
+        self.name = name
+        self.slug = slug
+        self.gigs: List[Dict] = []
+        self.artist_counts = Counter()
+        self.venue_counts = Counter()
+        self.stats: Dict = {}
+
+    def add(self, gig: Dict):
+        """Append a gig (callers add gigs newest first)."""
+        self.gigs.append(gig)
+        self.artist_counts[gig['artist']] += 1
+        self.venue_counts[gig['venue']] += 1
+
+    def finalize(self, top_n: int):
+        """Compute the summary statistics once all gigs have been added."""
+        self.stats = {
+            'count': len(self.gigs),
+            'first_seen': self.gigs[-1]['date'] if self.gigs else None,
+            'last_seen': self.gigs[0]['date'] if self.gigs else None,
+            'artist_count': len(self.artist_counts),
+            'venue_count': len(self.venue_counts),
+            'top_artists': _most_common(self.artist_counts, top_n),
+            'top_venues': _most_common(self.venue_counts, top_n),
+        }
+
+
+class GigIndex:
+    """
+    Index of gigs by artist, venue, location and year.
+
+    Args:
+        gigs: Processed gig dictionaries with at least date, year, artist,
+            venue and location keys
+        slugify: Function turning a display name into a URL-safe slug
+        top_n: Number of entries kept in the top artists/venues lists
+    """
+
+    def __init__(self, gigs: List[Dict], slugify: Callable[[str], str], top_n: int = 5):
+        self.slugify = slugify
+        self._used_slugs = defaultdict(set)
+        # Same-day gigs are ordered by ID so the output does not depend on query order
+        self.gigs = sorted(gigs, key=lambda gig: (gig['date'], gig['id']), reverse=True)
+
+        self.by_artist: Dict[str, GigGroup] = {}
+        self.by_venue: Dict[str, GigGroup] = {}
+        self.by_location: Dict[str, GigGroup] = {}
+        self.by_year: Dict[str, GigGroup] = {}
+        self.calendar_events: List[Dict] = []
+
+        # Single pass over the date-sorted gigs fills every grouping, so each
+        # group's gig list is already newest first
+        for gig in self.gigs:
+            artist = self._group(self.by_artist, gig['artist'])
+            venue = self._group(self.by_venue, gig['venue'])
+            artist.add(gig)
+            venue.add(gig)
+            self._group(self.by_location, gig['location']).add(gig)
+            self._group(self.by_year, gig['year']).add(gig)
+
+            # Let templates link a gig to its artist and venue pages
+            gig['artist_slug'] = artist.slug
+            gig['venue_slug'] = venue.slug
+
+            self.calendar_events.append({
+                'id': gig['id'],
+                'title': f"{gig['artist']} @ {gig['venue']}",
+                'start': gig['date'],
+                'url': gig.get('setlist_url') or '',
+                'location': gig['location']
+            })
+
+        for groups in (self.by_artist, self.by_venue, self.by_location, self.by_year):
+            for group in groups.values():
+                group.finalize(top_n)
+
+        self.overall = GigGroup('all', 'All gigs', '')
+        for gig in self.gigs:
+            self.overall.add(gig)
+        self.overall.finalize(top_n)
+        self.overall.stats['location_count'] = len(self.by_location)
+        self.overall.stats['year_count'] = len(self.by_year)
+
+    def _group(self, groups: Dict[str, GigGroup], name: str) -> GigGroup:
+        """Return the group for a name, creating it on first use."""
+        key = name.strip().lower()
+        group = groups.get(key)
+        if group is None:
+            # Distinct names can share a slug ("AC/DC" vs "ACDC"), so suffix
+            # collisions to keep every group on its own page
+            used = self._used_slugs[id(groups)]
+            base_slug = self.slugify(name) or 'unknown'
+            slug, suffix = base_slug, 2
+            while slug in used:
+                slug, suffix = f"{base_slug}-{suffix}", suffix + 1
+            used.add(slug)
+            group = groups[key] = GigGroup(key, name, slug)
+        return group
+
+    def years(self) -> List[GigGroup]:
+        """Year groups, newest year first."""
+        return [self.by_year[year] for year in sorted(self.by_year, reverse=True)]
+
+    def artists(self) -> List[GigGroup]:
+        """Artist groups, most-seen first, then alphabetically."""
+        return _ranked(self.by_artist)
+
+    def venues(self) -> List[GigGroup]:
+        """Venue groups, most-visited first, then alphabetically."""
+        return _ranked(self.by_venue)
+
+    def locations(self) -> List[GigGroup]:
+        """Location groups, most-visited first, then alphabetically."""
+        return _ranked(self.by_location)
+
+
+def _most_common(counter: Counter, n: int) -> List[Dict]:
+    """Top entries of a counter with a stable alphabetical tie-break."""
+    ranked = sorted(counter.items(), key=lambda item: (-item[1], item[0].lower(), item[0]))
+    return [{'name': name, 'count': count} for name, count in ranked[:n]]
+
+
+def _ranked(groups: Dict[str, GigGroup]) -> List[GigGroup]:
+    """Sort groups by gig count (descending) and then by name."""
+    return sorted(groups.values(), key=lambda group: (-group.stats['count'], group.name.lower(), group.name))
+
@@ -0,0 +1,172 @@
+"""
+Outbound link checker.
+
+``build.py check-links`` builds the site, collects every external link of
+the processed posts (rich-text links, bookmarks, link previews, embeds,
+videos) and the gigs' setlist URLs, and checks each distinct URL once:
+
+- a HEAD request first, falling back to a streamed GET (whose body is not
+  read) when the server rejects or mishandles HEAD;
+- concurrently on one asyncio HTTP client, so connections to a host are
+  reused, with at most PER_HOST_LIMIT requests in flight per host and
+  MAX_CONNECTIONS overall;
+- with results cached by URL in ``links.json`` in the build cache, working
+  links for OK_TTL and broken ones for BROKEN_TTL, so a repeat run only
+  rechecks stale entries.
+
+Servers that answer 429 (rate limited) are neither reported nor cached and
+are tried again on the next run. The client is injectable, so the checker
+can run against a mock transport.
+"""
+
+import asyncio
+import html
+import json
+import re
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+OK_TTL = 7 * 24 * 3600
+BROKEN_TTL = 24 * 3600
+PER_HOST_LIMIT = 8
+MAX_CONNECTIONS = 100
+CHECK_TIMEOUT = 10
+
+RATE_LIMITED = 429
+
+LINK_RE = re.compile(r'href="(https?://[^"]+)"')
+
+
+def extract_links(content_html: Optional[str]) -> List[str]:
+    """External (http and https) link targets of rendered HTML, in order and without duplicates."""
+    return list(dict.fromkeys(html.unescape(url) for url in LINK_RE.findall(content_html or '')))
+
+
+def is_broken(result: Dict) -> bool:
+    """Whether a check result means the link does not work."""
+    return result['status'] is None or result['status'] >= 400
+
+
+class LinkChecker:
+    """
+    Checks URLs with cached results.
+
+    Args:
+        cache_dir: Root cache directory; results live in ``links.json``
+        client: httpx.AsyncClient used for checking; defaults to a pooled
+            client created for each run
+    """
+
+    def __init__(self, cache_dir: Path, client=None):
+        self.path = Path(cache_dir) / 'links.json'
+        self.client = client
+        self.results: Dict[str, Dict] = {}
+        self.checked = 0
+
+        if self.path.exists():
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self.results = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable link check cache: {e}")
+
+    def check(self, urls: Iterable[str], recheck: bool = False) -> Dict[str, Dict]:
+        """
+        Check URLs whose cached result is missing or expired.
+
+        Args:
+            urls: URLs to check
+            recheck: Ignore cached results
+
+        Returns:
+            Result per URL: ``status`` (final HTTP status, None if the
+            request failed), ``error`` and ``checked`` (Unix time)
+        """
+        now = time.time()
+        urls = sorted(set(urls))
+        stale = [url for url in urls if recheck or self._expired(self.results.get(url), now)]
+        self.checked = len(stale)
+        if stale:
+            checked = asyncio.run(self._check_all(stale))
+            for url, result in zip(stale, checked):
+                result['checked'] = now
+                if result['status'] == RATE_LIMITED:
+                    self.results.pop(url, None)
+                else:
+                    self.results[url] = result
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(self.results, sort_keys=True))
+        return {url: self.results[url] for url in urls if url in self.results}
+
+    @staticmethod
+    def _expired(result: Optional[Dict], now: float) -> bool:
+        if result is None:
+            return True
+        return now - result['checked'] > (BROKEN_TTL if is_broken(result) else OK_TTL)
+
+    async def _check_all(self, urls: List[str]) -> List[Dict]:
+        import httpx
+
+        client = self.client or httpx.AsyncClient(
+            timeout=CHECK_TIMEOUT, follow_redirects=True,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+            headers={'User-Agent': 'Mozilla/5.0 (compatible; JimiLand link checker)'},
+        )
+        hosts = defaultdict(lambda: asyncio.Semaphore(PER_HOST_LIMIT))
+        try:
+            return await asyncio.gather(*(
+                self._check_url(client, hosts[urlsplit(url).netloc.lower()], url) for url in urls
+            ))
+        finally:
+            if self.client is None:
+                await client.aclose()
+
+    @staticmethod
+    async def _check_url(client, host_limit: asyncio.Semaphore, url: str) -> Dict:
+        """HEAD a URL, falling back to GET; never raises."""
+        import httpx
+
+        async with host_limit:
+            try:
+                response = await client.head(url)
+                if response.status_code < 400 or response.status_code == RATE_LIMITED:
+                    return {'status': response.status_code, 'error': None}
+            except httpx.TimeoutException as e:
+                return {'status': None, 'error': f"timeout ({type(e).__name__})"}
+            except httpx.HTTPError:
+                pass
+
+            # Some servers refuse HEAD (405, 403, 404) or drop the connection
+            try:
+                async with client.stream('GET', url) as response:
+                    return {'status': response.status_code, 'error': None}
+            except httpx.HTTPError as e:
+                return {'status': None, 'error': str(e) or type(e).__name__}
+
+
+def report(links: Dict[str, List[str]], results: Dict[str, Dict]) -> Dict[str, List[str]]:
+    """
+    Print the broken links of each page.
+
+    Args:
+        links: Outbound URLs per site-relative page path
+        results: Check result per URL
+
+    Returns:
+        Broken URLs per page, for pages with any
+    """
+    broken = {}
+    for page in sorted(links):
+        urls = [url for url in links[page] if url in results and is_broken(results[url])]
+        if not urls:
+            continue
+        broken[page] = urls
+        print(f"\n{page}")
+        for url in urls:
+            result = results[url]
+            print(f"    {result['status'] or result['error']}  {url}")
+    return broken
@@ -0,0 +1,281 @@
+"""
+OpenGraph metadata for bookmark and link-preview cards.
+
+Notion bookmarks and link previews render as a card showing only the
+link's domain. This stage fetches each linked page's OpenGraph metadata
+(title, description, image, falling back to ``<title>`` and the meta
+description), mirrors the preview image into the site and adds them to
+the cards when post pages are rendered.
+
+Results are cached by URL in ``link-previews/previews.json``: successes
+for SUCCESS_TTL, failures (timeouts, errors, pages without metadata) for
+FAILURE_TTL, so a warm build makes no requests at all. Fetches run on a
+bounded thread pool sharing one pooled HTTP client, with timeouts and a
+cap on how much of each page is read; a failure never fails the build.
+The client is injectable, so the stage can run against a local stand-in
+server.
+"""
+
+import hashlib
+import html
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urljoin
+
+SUCCESS_TTL = 30 * 24 * 3600
+FAILURE_TTL = 24 * 3600
+FETCH_WORKERS = 8
+FETCH_TIMEOUT = 5
+# Bytes of a page read while looking for its <head> metadata
+MAX_PAGE_BYTES = 512 * 1024
+MAX_IMAGE_BYTES = 2 * 1024 * 1024
+MAX_DESCRIPTION = 200
+
+IMAGE_TYPES = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/gif': 'gif', 'image/webp': 'webp'}
+
+# Opening tag of a card as rendered by NotionProcessor
+CARD_RE = re.compile(r'<a href="([^"]+)" class="(?:bookmark|link-preview)"[^>]*>')
+
+
+class _MetadataParser(HTMLParser):
+    """Collects OpenGraph/Twitter meta tags and the title from a page's head."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.meta: Dict[str, str] = {}
+        self.title = ''
+        self.done = False
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'meta':
+            key = (attrs.get('property') or attrs.get('name') or '').lower()
+            if key and attrs.get('content') and key not in self.meta:
+                self.meta[key] = attrs['content'].strip()
+        elif tag == 'title':
+            self._in_title = True
+        elif tag == 'body':
+            self.done = True
+
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+        elif tag == 'head':
+            self.done = True
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+
+
+def parse_metadata(page: str, base_url: str) -> Dict[str, Optional[str]]:
+    """
+    Extract preview metadata from a page's HTML.
+
+    Args:
+        page: HTML (only the head is needed)
+        base_url: Final URL of the page, for relative image URLs
+
+    Returns:
+        Dict with ``title``, ``description`` and ``image`` (absolute URL),
+        each None if the page does not provide it
+    """
+    parser = _MetadataParser()
+    parser.feed(page)
+    meta = parser.meta
+
+    def first(*keys):
+        for key in keys:
+            if meta.get(key):
+                return ' '.join(meta[key].split())
+        return None
+
+    image = first('og:image', 'og:image:url', 'twitter:image')
+    description = first('og:description', 'twitter:description', 'description')
+    if description and len(description) > MAX_DESCRIPTION:
+        description = description[:MAX_DESCRIPTION - 1].rstrip() + '…'
+    return {
+        'title': first('og:title', 'twitter:title') or (' '.join(parser.title.split()) or None),
+        'description': description,
+        'image': urljoin(base_url, image) if image else None,
+    }
+
+
+class LinkPreviews:
+    """
+    Preview metadata cache and card enricher.
+
+    Args:
+        cache_dir: Root cache directory; previews live in ``link-previews/``
+        client: httpx.Client used for fetching; defaults to a pooled client
+            created on the first fetch
+    """
+
+    def __init__(self, cache_dir: Path, client=None):
+        self.dir = Path(cache_dir) / 'link-previews'
+        self.cache_path = self.dir / 'previews.json'
+        self.client = client
+        self.links: Dict[str, List[str]] = {}
+        self.previews: Dict[str, Dict] = {}
+
+        if self.cache_path.exists():
+            try:
+                with open(self.cache_path, encoding='utf-8') as f:
+                    self.previews = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable link preview cache: {e}")
+
+    def scan(self, article_id: str, content_html: Optional[str]):
+        """Record the bookmark and link-preview cards of an article's HTML."""
+        links = sorted(set(CARD_RE.findall(content_html or '')))
+        # Most articles have none; only the ones that do are kept
+        if links:
+            self.links[article_id] = links
+        else:
+            self.links.pop(article_id, None)
+
+    def prepare(self, article_ids: Iterable[str]):
+        """
+        Fetch metadata for these articles' links that are not cached or
+        whose cache entry expired.
+
+        Args:
+            article_ids: Articles of the current build
+        """
+        now = time.time()
+        wanted = {url for article_id in article_ids for url in self.links.get(article_id, [])}
+        stale = sorted(url for url in wanted if self._expired(self.previews.get(url), now))
+        if not stale:
+            return
+
+        if self.client is None:
+            import httpx
+
+            self.client = httpx.Client(
+                timeout=FETCH_TIMEOUT, follow_redirects=True,
+                limits=httpx.Limits(max_connections=FETCH_WORKERS),
+                headers={'User-Agent': 'Mozilla/5.0 (compatible; JimiLand link preview)'},
+            )
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='previews') as pool:
+            results = list(pool.map(self._fetch_preview, [html.unescape(url) for url in stale]))
+        for url, preview in zip(stale, results):
+            preview['fetched'] = now
+            self.previews[url] = preview
+
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.previews, sort_keys=True))
+        ok = sum(1 for preview in results if preview['ok'])
+        print(f"Link previews: {ok} of {len(stale)} fetched")
+
+    @staticmethod
+    def _expired(preview: Optional[Dict], now: float) -> bool:
+        if preview is None:
+            return True
+        return now - preview['fetched'] > (SUCCESS_TTL if preview['ok'] else FAILURE_TTL)
+
+    def _fetch_preview(self, url: str) -> Dict:
+        """Metadata of one page, with its image mirrored; never raises."""
+        try:
+            with self.client.stream('GET', url) as response:
+                response.raise_for_status()
+                if 'html' not in response.headers.get('content-type', ''):
+                    return {'ok': False}
+                page = b''
+                for chunk in response.iter_bytes():
+                    page += chunk
+                    if len(page) >= MAX_PAGE_BYTES or b'</head>' in page.lower():
+                        break
+                encoding = response.encoding or 'utf-8'
+                metadata = parse_metadata(page.decode(encoding, errors='replace'), str(response.url))
+        except Exception as e:
+            print(f"Could not fetch link preview of {url}: {e}")
+            return {'ok': False}
+
+        if not metadata['title']:
+            return {'ok': False}
+        image = self._mirror_image(metadata['image']) if metadata['image'] else None
+        return {'ok': True, 'title': metadata['title'], 'description': metadata['description'],
+                'image': image}
+
+    def _mirror_image(self, url: str) -> Optional[str]:
+        """Download a preview image into the cache; returns its file name."""
+        try:
+            with self.client.stream('GET', url) as response:
+                response.raise_for_status()
+                extension = IMAGE_TYPES.get(response.headers.get('content-type', '').split(';')[0].strip())
+                if extension is None:
+                    return None
+                data = b''
+                for chunk in response.iter_bytes():
+                    data += chunk
+                    if len(data) > MAX_IMAGE_BYTES:
+                        return None
+        except Exception as e:
+            print(f"Could not mirror preview image {url}: {e}")
+            return None
+
+        name = f"{hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]}.{extension}"
+        (self.dir / name).write_bytes(data)
+        return name
+
+    def signature(self, article_id: str) -> List:
+        """What an article's page depends on, for the page cache."""
+        return [(url, self._usable(url)) for url in self.links.get(article_id, [])]
+
+    def _usable(self, url: str) -> Optional[Dict]:
+        preview = self.previews.get(url)
+        if not preview or not preview['ok']:
+            return None
+        image = preview.get('image')
+        if image and not (self.dir / image).exists():
+            image = None
+        return {'title': preview['title'], 'description': preview.get('description'), 'image': image}
+
+    def publish(self, output, article_ids: Iterable[str]):
+        """
+        Put the mirrored preview images of these articles into the output.
+
+        Args:
+            output: OutputWriter of the build
+            article_ids: Articles of the current build
+        """
+        images = set()
+        for article_id in article_ids:
+            for url in self.links.get(article_id, []):
+                preview = self._usable(url)
+                if preview and preview['image']:
+                    images.add(preview['image'])
+        for name in sorted(images):
+            rel_path = f"link-previews/{name}"
+            # Images are named by their URL's hash and never change
+            if rel_path in output.previous and (output.output_dir / rel_path).exists():
+                output.keep(rel_path)
+            else:
+                output.copy(self.dir / name, rel_path)
+
+    def enrich(self, content_html: str, base_url: str) -> str:
+        """Add titles, descriptions and images to the cards of rendered HTML."""
+        def replace(match):
+            preview = self._usable(match.group(1))
+            if preview is None:
+                return match.group(0)
+            image = ''
+            if preview['image']:
+                image = (f'<img class="bookmark-image" src="{base_url}/link-previews/{preview["image"]}" '
+                         f'alt="" loading="lazy">')
+            description = ''
+            if preview['description']:
+                description = f'<div class="bookmark-description">{html.escape(preview["description"])}</div>'
+            return (f'{match.group(0)}<div class="bookmark-preview">{image}<div class="bookmark-text">'
+                    f'<div class="bookmark-title">{html.escape(preview["title"])}</div>'
+                    f'{description}</div></div>')
+
+        return CARD_RE.sub(replace, content_html or '')
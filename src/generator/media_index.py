@@ -0,0 +1,94 @@
+"""
+In-memory index of the media archive.
+
+Sorts media items once (most recently added first) and groups them by
+type and tag, for the paginated archive pages and the static JSON index
+used for client-side filtering.
+"""
+
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+
+class MediaGroup:
+    """Media items sharing one type or tag."""
+
+    __slots__ = ('name', 'slug', 'items')
+
+    def __init__(self, name: str, slug: str):
+        self.name = name
+        self.slug = slug
+        self.items: List[Dict] = []
+
+
+class MediaIndex:
+    """
+    Media items with per-type and per-tag groupings.
+
+    Args:
+        items: Media records from the media schema
+        slugify: Function turning a display name into a URL-safe slug
+    """
+
+    def __init__(self, items: List[Dict], slugify: Callable[[str], str]):
+        self.slugify = slugify
+        self._used_slugs = defaultdict(set)
+        self.items = sorted(items, key=lambda item: (item.get('date_added') or '', item['title']),
+                            reverse=True)
+        self.by_type: Dict[str, MediaGroup] = {}
+        self.by_tag: Dict[str, MediaGroup] = {}
+
+        for item in self.items:
+            item['slug'] = self._unique_slug('item', item['title'])
+            item['type_slug'] = self._group(self.by_type, 'type', item['type']).slug
+            self.by_type[item['type']].items.append(item)
+            # Let templates link an item to its tag pages
+            item['tag_links'] = []
+            for tag in item['tags']:
+                group = self._group(self.by_tag, 'tag', tag)
+                group.items.append(item)
+                item['tag_links'].append({'name': tag, 'slug': group.slug})
+
+    def _group(self, groups: Dict[str, MediaGroup], kind: str, name: str) -> MediaGroup:
+        group = groups.get(name)
+        if group is None:
+            group = groups[name] = MediaGroup(name, self._unique_slug(kind, name))
+        return group
+
+    def _unique_slug(self, kind: str, name: str) -> str:
+        """Slugify a name, suffixing it when another name already has that slug."""
+        base = self.slugify(name) or kind
+        slug, n = base, 2
+        while slug in self._used_slugs[kind]:
+            slug = f'{base}-{n}'
+            n += 1
+        self._used_slugs[kind].add(slug)
+        return slug
+
+    def types(self) -> List[MediaGroup]:
+        """Type groups, largest first, then alphabetically."""
+        return _ranked(self.by_type)
+
+    def tags(self) -> List[MediaGroup]:
+        """Tag groups, most used first, then alphabetically."""
+        return _ranked(self.by_tag)
+
+    def to_json(self) -> Dict:
+        """
+        Static index for client-side filtering.
+
+        Items are listed once; type and tag facets refer to them by position.
+        """
+        position = {id(item): i for i, item in enumerate(self.items)}
+        fields = ('title', 'slug', 'type', 'url', 'description', 'date_added', 'tags', 'rating')
+        return {
+            'items': [{key: item.get(key) for key in fields} for item in self.items],
+            'types': {g.slug: {'name': g.name, 'items': [position[id(i)] for i in g.items]}
+                      for g in self.types()},
+            'tags': {g.slug: {'name': g.name, 'items': [position[id(i)] for i in g.items]}
+                     for g in self.tags()},
+        }
+
+
+def _ranked(groups: Dict[str, MediaGroup]) -> List[MediaGroup]:
+    return sorted(groups.values(), key=lambda g: (-len(g.items), g.name.lower(), g.name))
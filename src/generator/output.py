@@ -0,0 +1,205 @@
+"""
+Atomic, diff-aware writer for the generated site.
+
+Every output file goes through ``OutputWriter``:
+- Content is compared with the existing file by hash and written only
+  when it differs, so unchanged files keep their mtime
+- Writes go to a temporary file in the same directory and are moved into
+  place with ``os.replace``, so a page is never seen half-written
+- The paths written by each build are recorded in a manifest, and files
+  from the previous build that were not produced again (e.g. posts whose
+  Notion page was deleted) are pruned when the build finishes
+- A deploy manifest listing every published file is written to the
+  output directory (see deploy.py)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Union
+
+from .deploy import write_manifest
+
+
+class OutputWriter:
+    """
+    Writes build outputs below a directory and tracks them in a manifest.
+
+    Args:
+        output_dir: Site output directory
+        cache_dir: Root cache directory; the manifest lives in ``output.json``
+    """
+
+    def __init__(self, output_dir: Path, cache_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.manifest_path = Path(cache_dir) / 'output.json'
+        self.previous: Dict[str, str] = {}
+        self.current: Dict[str, str] = {}
+        self.written = 0
+        self.unchanged = 0
+
+        # Temporary files are created 0600; published files follow the umask
+        umask = os.umask(0)
+        os.umask(umask)
+        self.file_mode = 0o666 & ~umask
+
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, encoding='utf-8') as f:
+                    self.previous = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable output manifest: {e}")
+
+    def write(self, rel_path: str, content: Union[str, bytes]) -> bool:
+        """
+        Write a file if its content changed.
+
+        Args:
+            rel_path: Path relative to the output directory
+            content: File contents (text is encoded as UTF-8)
+
+        Returns:
+            True if the file was written, False if it was already up to date
+        """
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        digest = hashlib.sha1(data).hexdigest()
+        rel_path = Path(rel_path).as_posix()
+        self.current[rel_path] = digest
+
+        path = self.output_dir / rel_path
+        if self._is_current(path, rel_path, data, digest):
+            self.unchanged += 1
+            return False
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp_path, self.file_mode)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        self.written += 1
+        return True
+
+    def write_stream(self, rel_path: str, chunks: Iterable[str]) -> bool:
+        """
+        Write a file from a stream of text chunks without holding it in memory.
+
+        The chunks go to a temporary file while being hashed; it replaces
+        the existing file only if the content differs.
+
+        Args:
+            rel_path: Path relative to the output directory
+            chunks: File contents in pieces
+
+        Returns:
+            True if the file was written, False if it was already up to date
+        """
+        rel_path = Path(rel_path).as_posix()
+        path = self.output_dir / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        digest = hashlib.sha1()
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    data = chunk.encode('utf-8')
+                    digest.update(data)
+                    f.write(data)
+            self.current[rel_path] = digest.hexdigest()
+            if path.exists() and _file_sha1(path) == self.current[rel_path]:
+                Path(tmp_path).unlink()
+                self.unchanged += 1
+                return False
+            os.chmod(tmp_path, self.file_mode)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        self.written += 1
+        return True
+
+    def copy(self, src: Path, rel_path: str) -> bool:
+        """Copy a file into the output if its content changed."""
+        return self.write(rel_path, Path(src).read_bytes())
+
+    def keep(self, rel_path: str):
+        """
+        Mark a file produced by an earlier build as part of this build.
+
+        Used by stages that skip unchanged outputs without rendering them,
+        so pruning does not remove them. A file missing from the previous
+        manifest (its build failed before finishing) is hashed from disk.
+        """
+        rel_path = Path(rel_path).as_posix()
+        if rel_path in self.previous:
+            self.current[rel_path] = self.previous[rel_path]
+        elif (self.output_dir / rel_path).is_file():
+            self.current[rel_path] = _file_sha1(self.output_dir / rel_path)
+
+    def finish(self, prune: bool = True) -> List[str]:
+        """
+        Remove outputs of the previous build that were not produced again,
+        save the manifest and write the deploy manifest.
+
+        Args:
+            prune: Whether to delete orphaned files
+
+        Returns:
+            Site-relative paths of the removed files
+        """
+        removed = []
+        if prune:
+            for rel_path in sorted(set(self.previous) - set(self.current)):
+                path = self.output_dir / rel_path
+                if path.is_file():
+                    path.unlink()
+                    removed.append(rel_path)
+                    self._remove_empty_parents(path.parent)
+
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.current, sort_keys=True, separators=(',', ':')))
+        write_manifest(self.output_dir, self.current)
+
+        print(f"Output: {self.written} written, {self.unchanged} unchanged, {len(removed)} removed")
+        self.previous, self.current = self.current, {}
+        self.written = self.unchanged = 0
+        return removed
+
+    def _is_current(self, path: Path, rel_path: str, data: bytes, digest: str) -> bool:
+        """Whether the file on disk already holds exactly this content."""
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return False
+        if size != len(data):
+            return False
+        # The manifest hash avoids re-reading files this writer produced
+        if self.previous.get(rel_path) == digest:
+            return True
+        return path.read_bytes() == data
+
+    def _remove_empty_parents(self, directory: Path):
+        while directory != self.output_dir and self.output_dir in directory.parents:
+            try:
+                directory.rmdir()
+            except OSError:
+                return
+            directory = directory.parent
+
+
+def _file_sha1(path: Path) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
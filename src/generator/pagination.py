@@ -0,0 +1,113 @@
+"""
+Pagination helpers for listing pages.
+
+Listings are split into fixed-size pages. The first page lives at the
+listing's base path and the rest at ``<base>/page/<n>/``, matching the
+``pagination`` context expected by the templates.
+
+Post listings grow at the newest end, so ``paginate_from_oldest`` numbers
+their pages from the oldest post instead: ``/page/1/`` always holds the
+oldest posts, and a new post changes only the first page (plus, every
+``per_page`` posts, the page split off from it and its older neighbour's
+link), not every page after it.
+"""
+
+import math
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+def page_path(base_path: str, page_number: int) -> str:
+    """
+    Build the URL path for one page of a paginated listing.
+
+    Args:
+        base_path: URL path of the first page (e.g. "/gigs/artists/foo/")
+        page_number: 1-based page number
+
+    Returns:
+        URL path with leading and trailing slashes
+    """
+    base_path = '/' + base_path.strip('/') + '/' if base_path.strip('/') else '/'
+    if page_number <= 1:
+        return base_path
+    return f"{base_path}page/{page_number}/"
+
+
+def paginate(items: Sequence, per_page: int,
+             base_path: str) -> Iterator[Tuple[str, List, Optional[Dict]]]:
+    """
+    Split items into pages.
+
+    Args:
+        items: Items in display order
+        per_page: Maximum number of items per page
+        base_path: URL path of the first page
+
+    Yields:
+        Tuples of (url_path, page_items, pagination). ``pagination`` is None
+        when everything fits on a single page.
+    """
+    total_pages = max(1, math.ceil(len(items) / per_page))
+
+    for page_number in range(1, total_pages + 1):
+        start = (page_number - 1) * per_page
+        page_items = list(items[start:start + per_page])
+
+        pagination = None
+        if total_pages > 1:
+            pagination = {
+                'current_page': page_number,
+                'total_pages': total_pages,
+                'prev_page': page_path(base_path, page_number - 1) if page_number > 1 else None,
+                'next_page': page_path(base_path, page_number + 1) if page_number < total_pages else None,
+            }
+
+        yield page_path(base_path, page_number), page_items, pagination
+
+
+def paginate_from_oldest(items: Sequence, per_page: int,
+                         base_path: str) -> Iterator[Tuple[str, List, Optional[Dict]]]:
+    """
+    Split newest-first items into pages numbered from the oldest item.
+
+    Page ``n`` holds items ``(n - 1) * per_page`` to ``n * per_page`` counted
+    from the oldest, so its URL and contents stay the same as items are
+    added. The first page, at the base path, holds the newest full page
+    plus any newer items that do not fill a page yet (``per_page`` to
+    ``2 * per_page - 1`` items). Its ``current_page`` is None, and no page
+    carries ``total_pages``, which would change with every new page.
+
+    Args:
+        items: Items in display order, newest first
+        per_page: Number of items per numbered page
+        base_path: URL path of the first page
+
+    Yields:
+        Tuples of (url_path, page_items, pagination), first page first.
+        ``pagination`` is None when everything fits on the first page.
+    """
+    first_path = page_path(base_path, 1)
+    pages = len(items) // per_page
+    if pages <= 1:
+        yield first_path, list(items), None
+        return
+
+    def path(number: int) -> str:
+        return first_path if number == pages else f"{first_path}page/{number}/"
+
+    # The newest full page is shown on the first page rather than at its number
+    newest = len(items) - (pages - 1) * per_page
+    yield first_path, list(items[:newest]), {
+        'current_page': None,
+        'total_pages': None,
+        'prev_page': None,
+        'next_page': path(pages - 1),
+    }
+    for number in range(pages - 1, 0, -1):
+        end = len(items) - (number - 1) * per_page
+        yield path(number), list(items[end - per_page:end]), {
+            'current_page': number,
+            'total_pages': None,
+            'prev_page': path(number + 1),
+            'next_page': path(number - 1) if number > 1 else None,
+        }
@@ -0,0 +1,116 @@
+"""
+Threaded pipeline with bounded queues.
+
+Items from a source flow through a chain of stages, each run by its own
+worker threads and connected by bounded queues. Later stages start on the
+first items while earlier ones are still producing, so network waits in
+one stage overlap CPU work in another, and no more than ``queue_size``
+items wait between any two stages.
+
+Failures do not stop the pipeline: an item whose stage raised carries the
+exception to the consumer together with the last value it had, so the
+caller can report every failure of a build at once.
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Marks the end of a stage's input
+_DONE = object()
+
+# Seconds between checks for an abandoned pipeline while blocked on a queue
+_POLL = 0.1
+
+
+def run_pipeline(source: Iterable, stages: Sequence[Tuple[Callable[[Any], Any], int]],
+                 queue_size: int = 16) -> Iterator[Tuple[int, Any, Optional[Exception]]]:
+    """
+    Run items through stages concurrently.
+
+    Args:
+        source: Items to process; iterated in a thread of its own
+        stages: (function, worker count) per stage, in order
+        queue_size: Capacity of each queue between stages
+
+    Yields:
+        (position in source, result, exception or None) in completion
+        order; a failed item's result is its input to the failing stage
+
+    Raises:
+        Exception: Whatever iterating the source raised, after the items
+            read before the failure have been yielded
+    """
+    queues = [queue.Queue(queue_size) for _ in range(len(stages) + 1)]
+    remaining = [workers for _, workers in stages]
+    lock = threading.Lock()
+    stop = threading.Event()
+    source_errors: List[Exception] = []
+
+    def put(q: queue.Queue, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=_POLL)
+                return
+            except queue.Full:
+                continue
+
+    def feed():
+        try:
+            for position, item in enumerate(source):
+                if stop.is_set():
+                    return
+                put(queues[0], (position, item, None))
+        except Exception as e:
+            source_errors.append(e)
+        finally:
+            put(queues[0], _DONE)
+
+    def work(index: int, function: Callable[[Any], Any]):
+        inbox, outbox = queues[index], queues[index + 1]
+        while not stop.is_set():
+            try:
+                item = inbox.get(timeout=_POLL)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                # Pass the marker on to sibling workers; the last one to
+                # finish closes the next stage's input
+                put(inbox, _DONE)
+                with lock:
+                    remaining[index] -= 1
+                    last = remaining[index] == 0
+                if last:
+                    put(outbox, _DONE)
+                return
+
+            position, value, error = item
+            if error is None:
+                try:
+                    value = function(value)
+                except Exception as e:
+                    error = e
+            put(outbox, (position, value, error))
+
+    threads = [threading.Thread(target=feed, name='pipeline-source', daemon=True)]
+    for index, (function, workers) in enumerate(stages):
+        threads += [threading.Thread(target=work, args=(index, function),
+                                     name=f'pipeline-{index}-{n}', daemon=True)
+                    for n in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            item = queues[-1].get()
+            if item is _DONE:
+                break
+            yield item
+    finally:
+        # Also releases the threads if the consumer stops early
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    if source_errors:
+        raise source_errors[0]
@@ -0,0 +1,369 @@
+"""
+Related-content index.
+
+Scores every pair of documents (posts, media items, gig artists and
+venues) by the cosine similarity of sparse TF-IDF vectors built from
+their text and tags, and keeps the top-k neighbours of each document.
+
+Vectors are plain ``{term: weight}`` dicts. Each vector keeps only its
+strongest terms, terms shared by most documents are dropped, and each
+term's postings keep only its highest-weighted documents, so scoring a
+document touches a bounded number of candidates instead of every other
+document.
+
+IDF is frozen between full rebuilds: it is computed when the cache is
+empty and again only once the number of documents has drifted by more
+than IDF_DRIFT from the count it was computed for. Until then terms keep
+their weights, and terms that were not shared when it was computed carry
+none. A full rebuild happens automatically on drift, or by deleting
+``related.db``.
+
+Term counts and vectors are cached by fingerprint. A document's scores
+depend only on its own vector and the postings of its terms, so an
+incremental build re-scores the documents whose vector changed or whose
+neighbours a change in the postings of their terms can affect, and keeps
+the cached neighbours of the rest. With IDF frozen, an edit changes only the edited
+document's vector and its entries in the postings of its terms, so other
+documents are re-scored only if it was, or could now be, one of their
+neighbours. The result is identical to a full build with the same IDF;
+builds without content changes re-score nothing.
+"""
+
+import heapq
+import json
+import math
+import sqlite3
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .search_index import FIELD_WEIGHTS, tokenize
+
+RELATED_VERSION = 4
+
+SCHEMA = """
+CREATE TABLE docs (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    counts TEXT NOT NULL,
+    vector TEXT,
+    neighbors TEXT,
+    seen INTEGER NOT NULL DEFAULT 0,
+    stale INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE settings (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+# Value of docs.seen for documents added or edited in the current build
+CHANGED = 2
+
+# Documents read from the database at a time
+BATCH_SIZE = 500
+
+# Weight of a shared tag relative to one body occurrence of a word
+TAG_WEIGHT = 8
+
+# Strongest terms kept per document vector
+MAX_TERMS = 25
+
+# Highest-weighted documents kept per term when generating candidates
+MAX_POSTINGS = 40
+
+# Term counts cached per document (the rest can never make MAX_TERMS)
+MAX_CACHED_TERMS = 100
+
+# Terms found in more than this share of documents carry no signal
+MAX_DOCUMENT_FREQUENCY = 0.5
+
+# Relative change in the number of documents that triggers recomputing IDF
+IDF_DRIFT = 0.1
+
+# Rounding applied to cached neighbour scores
+SCORE_DIGITS = 4
+SCORE_TOLERANCE = 10 ** -SCORE_DIGITS
+
+
+class RelatedIndex:
+    """
+    Incrementally maintained top-k related documents.
+
+    Term counts, vectors and neighbours live in a SQLite database in the
+    cache directory and are streamed from it in batches; only IDF and the
+    postings, both bounded by the vocabulary rather than the number of
+    documents, are held in memory during a build. Neighbours are looked up
+    per document with related() once the index is built.
+
+    Args:
+        cache_dir: Root cache directory; state lives in ``related.db``
+        top_k: Neighbours kept per document
+    """
+
+    def __init__(self, cache_dir: Path, top_k: int = 5):
+        self.db_path = Path(cache_dir) / 'related.db'
+        self.top_k = top_k
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self.conn = self._connect()
+        except sqlite3.DatabaseError as e:
+            print(f"Ignoring unreadable related-content cache: {e}")
+            self.db_path.unlink(missing_ok=True)
+            self.conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the state database, starting over if it has another schema or top_k."""
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        top_k = conn.execute("SELECT value FROM settings WHERE name = 'top_k'").fetchone() \
+            if version == RELATED_VERSION else None
+        if top_k is None or json.loads(top_k[0]) != self.top_k:
+            conn.close()
+            self.db_path.unlink(missing_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.executescript(SCHEMA)
+            with conn:
+                conn.execute("INSERT INTO settings (name, value) VALUES ('top_k', ?)", (json.dumps(self.top_k),))
+            conn.execute(f"PRAGMA user_version = {RELATED_VERSION}")
+        return conn
+
+    def close(self):
+        self.conn.close()
+
+    @property
+    def idf(self) -> Optional[Dict]:
+        """Frozen IDF: ``{'documents': n, 'terms': {term: idf}}``, or None before the first build."""
+        row = self.conn.execute("SELECT value FROM settings WHERE name = 'idf'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    @idf.setter
+    def idf(self, idf: Optional[Dict]):
+        with self.conn:
+            self._save_idf(idf)
+
+    def _save_idf(self, idf: Optional[Dict]):
+        """Store IDF as part of the current transaction."""
+        if idf is None:
+            self.conn.execute("DELETE FROM settings WHERE name = 'idf'")
+        else:
+            self.conn.execute("INSERT OR REPLACE INTO settings (name, value) VALUES ('idf', ?)",
+                              (json.dumps(idf),))
+
+    def build(self, documents: Iterable[Dict]) -> int:
+        """
+        Update neighbours for the current set of documents.
+
+        Documents use the same shape as for SearchIndex.build: ``key``,
+        ``fingerprint``, ``url``, ``title``, ``date``, ``type`` and the
+        text fields listed in FIELD_WEIGHTS.
+
+        Args:
+            documents: Every document of this build; may be a generator
+
+        Returns:
+            Number of documents re-scored
+        """
+        conn = self.conn
+        with conn:
+            # Postings as of the previous build, to find what an edit affects
+            previous_postings = _postings(self._vectors())
+            conn.execute("UPDATE docs SET seen = 0, stale = 0")
+            for doc in documents:
+                key = doc['key']
+                cached = conn.execute("SELECT fingerprint, vector, neighbors FROM docs WHERE key = ?",
+                                      (key,)).fetchone()
+                if cached and cached[0] == doc['fingerprint']:
+                    conn.execute("UPDATE docs SET seen = 1 WHERE key = ?", (key,))
+                    continue
+                # The previous vector and neighbours stay until the vector is recomputed
+                meta = json.dumps({'url': doc['url'], 'title': doc['title'],
+                                   'date': doc.get('date') or '', 'type': doc['type']})
+                conn.execute(
+                    "INSERT OR REPLACE INTO docs (key, fingerprint, meta, counts, vector, neighbors, seen)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, doc['fingerprint'], meta, json.dumps(_term_counts(doc)),
+                     cached[1] if cached else None, cached[2] if cached else None, CHANGED)
+                )
+            conn.execute("DELETE FROM docs WHERE seen = 0")
+            total = conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+            idf = self.idf
+            refreshed = idf is None or abs(total - idf['documents']) > IDF_DRIFT * idf['documents']
+            if refreshed:
+                idf = {'documents': total, 'terms': _idf(
+                    (json.loads(counts) for _, counts in self._batches('counts')), total)}
+                self._save_idf(idf)
+            # Unchanged documents keep their vectors while IDF is frozen;
+            # documents whose vector changed must be re-scored
+            for key, counts, vector, neighbors in self._batches(
+                    'counts, vector, neighbors', None if refreshed else f'seen = {CHANGED}'):
+                new_vector = _tfidf_vector(json.loads(counts), idf['terms'])
+                stale = neighbors is None or vector is None or new_vector != json.loads(vector)
+                conn.execute("UPDATE docs SET vector = ?, stale = ? WHERE key = ?",
+                             (json.dumps(new_vector), int(stale), key))
+
+            postings = _postings(self._vectors())
+            self._mark_stale(previous_postings, postings)
+            rescored = 0
+            for key, vector in self._batches('vector', 'stale = 1'):
+                neighbors = self._top(_scores(key, json.loads(vector), postings))
+                conn.execute("UPDATE docs SET neighbors = ?, stale = 0 WHERE key = ?",
+                             (json.dumps(neighbors), key))
+                rescored += 1
+
+        print(f"Related content: {total} documents, {rescored} re-scored"
+              f"{', IDF recomputed' if refreshed else ''}")
+        return rescored
+
+    def related(self, key: str) -> List[Dict]:
+        """
+        Related documents of one document, as of the last build.
+
+        Returns:
+            The related documents' url, title, date, type and score, most
+            similar first
+        """
+        row = self.conn.execute("SELECT neighbors FROM docs WHERE key = ?", (key,)).fetchone()
+        related = []
+        for other, score in json.loads(row[0]) if row and row[0] else []:
+            meta = self.conn.execute("SELECT meta FROM docs WHERE key = ?", (other,)).fetchone()
+            if meta:
+                related.append({**json.loads(meta[0]), 'score': score})
+        return related
+
+    def _batches(self, columns: str, where: Optional[str] = None) -> Iterator[tuple]:
+        """
+        Stream (key, *columns) of the documents in key order.
+
+        Rows are read BATCH_SIZE at a time, so the rows already read can be
+        updated while streaming.
+        """
+        condition = f" AND {where}" if where else ''
+        last = ''
+        while True:
+            rows = self.conn.execute(
+                f"SELECT key, {columns} FROM docs WHERE key > ?{condition} ORDER BY key LIMIT {BATCH_SIZE}",
+                (last,)
+            ).fetchall()
+            yield from rows
+            if len(rows) < BATCH_SIZE:
+                return
+            last = rows[-1][0]
+
+    def _vectors(self) -> Iterator[Tuple[str, Dict[str, float]]]:
+        return ((key, json.loads(vector)) for key, vector in self._batches('vector', 'vector IS NOT NULL'))
+
+    def _top(self, scores: Dict[str, float]) -> List[List]:
+        best = heapq.nlargest(self.top_k, ((score, other) for other, score in scores.items()))
+        return [[other, round(score, SCORE_DIGITS)] for score, other in best]
+
+    def _mark_stale(self, previous_postings: Dict[str, List], postings: Dict[str, List]):
+        """
+        Flag the documents whose neighbours may differ from the cached ones.
+
+        A changed posting list only changes a document's scores against
+        the documents whose entries in it changed. The cached neighbours
+        stay valid unless one of those documents is among them, or now
+        scores high enough to join them. Documents flagged while updating
+        vectors (no cached neighbours, or a changed vector) stay flagged.
+
+        Args:
+            previous_postings: Postings of the previous build
+            postings: Postings of this build
+        """
+        # Documents whose entry in each changed posting list changed
+        changed_entries = {}
+        for term in set(postings) | set(previous_postings):
+            new, old = postings.get(term, []), previous_postings.get(term, [])
+            if new != old:
+                changed_entries[term] = {key for key, _ in set(new) ^ set(old)}
+        if not changed_entries:
+            return
+        weights = {}
+
+        def score(vector, other):
+            total = 0.0
+            for term, weight in vector.items():
+                if term not in weights:
+                    weights[term] = dict(postings[term])
+                total += weight * weights[term].get(other, 0.0)
+            return total
+
+        for key, vector, neighbors in self._batches('vector, neighbors', 'stale = 0 AND neighbors IS NOT NULL'):
+            vector, neighbors = json.loads(vector), json.loads(neighbors)
+            candidates = set()
+            for term in vector:
+                candidates |= changed_entries.get(term, set())
+            candidates.discard(key)
+            if not candidates:
+                continue
+            stale = not candidates.isdisjoint(other for other, _ in neighbors)
+            if not stale:
+                # Cached scores are rounded, so compare with some slack
+                threshold = neighbors[-1][1] - SCORE_TOLERANCE if len(neighbors) >= self.top_k else 0.0
+                stale = any(score(vector, other) > max(threshold, 0.0) for other in candidates)
+            if stale:
+                self.conn.execute("UPDATE docs SET stale = 1 WHERE key = ?", (key,))
+
+
+def _scores(key: str, vector: Dict[str, float], postings: Dict[str, List]) -> Dict[str, float]:
+    """Cosine similarity of one document to every document sharing a term."""
+    scores = defaultdict(float)
+    for term, weight in vector.items():
+        for other, other_weight in postings[term]:
+            if other != key:
+                scores[other] += weight * other_weight
+    return scores
+
+
+def _postings(vectors: Iterable[Tuple[str, Dict[str, float]]]) -> Dict[str, List]:
+    """Highest-weighted (key, weight) pairs of each term, from a stream of (key, vector)."""
+    heaps = defaultdict(list)
+    for key, vector in vectors:
+        for term, weight in vector.items():
+            heap = heaps[term]
+            if len(heap) < MAX_POSTINGS:
+                heapq.heappush(heap, (weight, key))
+            else:
+                heapq.heappushpop(heap, (weight, key))
+    return {term: [(key, weight) for weight, key in sorted(heap, reverse=True)]
+            for term, heap in heaps.items()}
+
+
+def _term_counts(doc: Dict) -> Dict[str, int]:
+    """Field-weighted term counts, with tags as their own features."""
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        value = doc.get(field) or ''
+        if callable(value):
+            value = value() or ''
+        if isinstance(value, (list, tuple)):
+            value = ' '.join(value)
+        for term in tokenize(value):
+            counts[term] += weight
+    for tag in doc.get('tags') or []:
+        counts['tag:' + tag.lower()] += TAG_WEIGHT
+    return dict(counts.most_common(MAX_CACHED_TERMS))
+
+
+def _idf(counts: Iterable[Dict[str, int]], n: int) -> Dict[str, float]:
+    """
+    IDF of the terms shared by more than one and at most
+    MAX_DOCUMENT_FREQUENCY of the n documents whose term counts are given.
+    """
+    df = Counter(term for terms in counts for term in terms)
+    max_df = max(2, MAX_DOCUMENT_FREQUENCY * n)
+    # Terms unique to one document cannot make it similar to another
+    return {term: math.log(n / count) for term, count in df.items() if 1 < count <= max_df}
+
+
+def _tfidf_vector(counts: Dict[str, int], idf: Dict[str, float]) -> Dict[str, float]:
+    """Pruned, L2-normalized TF-IDF vector of one document."""
+    weights = []
+    for term, count in counts.items():
+        term_idf = idf.get(term)
+        if term_idf is not None:
+            weights.append(((1 + math.log(count)) * term_idf, term))
+    if len(weights) > MAX_TERMS:
+        weights = heapq.nlargest(MAX_TERMS, weights)
+    norm = math.sqrt(sum(w * w for w, _ in weights))
+    return {term: w / norm for w, term in weights} if norm else {}
@@ -0,0 +1,310 @@
+"""
+Prebuilt full-text search index.
+
+Builds a compact inverted index over posts and gig artists/venues and
+splits it into shards by the first character of each term, so the search
+client only downloads the shards for the words in a query.
+
+Output layout (relative to the site root)::
+
+    search/docs.json      {"v": 1, "shards": [...], "docs": [[url, title, date, type], ...]}
+    search/t-<c>.json     {term: [doc, score, doc_delta, score, ...], ...}
+
+Document numbers are stable across builds (removed documents leave a
+``null`` hole), so adding a post only rewrites the shards containing its
+terms. Tokenized documents are kept in a SQLite database by fingerprint
+and re-tokenized only when the source article changes.
+"""
+
+import html
+import json
+import re
+import sqlite3
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from .output import OutputWriter
+
+INDEX_VERSION = 1
+
+# Version of the cached state in search.db; other versions are rebuilt
+STATE_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE docs (
+    key TEXT PRIMARY KEY,
+    number INTEGER NOT NULL UNIQUE,
+    fingerprint TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    seen INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE postings (
+    term TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    score INTEGER NOT NULL
+);
+CREATE TABLE shards (shard TEXT PRIMARY KEY);
+CREATE TABLE settings (name TEXT PRIMARY KEY, value);
+"""
+
+# Dropped while a build loads the postings of an empty index
+POSTINGS_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS postings_term ON postings (term, number, score)",
+    "CREATE INDEX IF NOT EXISTS postings_number ON postings (number)",
+)
+
+# Score multiplier per field; a title hit outranks many body hits
+FIELD_WEIGHTS = {
+    'title': 10,
+    'tags': 6,
+    'description': 3,
+    'body': 1,
+}
+
+# Per-term score cap so long articles do not drown out short ones
+MAX_TERM_SCORE = 255
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have i if in into is it its of on
+or so that the their then there these they this to was we were will with you
+""".split())
+
+TAG_RE = re.compile(r'<[^>]+>')
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into normalized search terms.
+
+    Strips HTML tags, folds accents and case, and drops stop words and
+    single characters. ``search.js`` applies the same normalization to
+    queries.
+    """
+    text = html.unescape(TAG_RE.sub(' ', text or ''))
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(c for c in text if not unicodedata.combining(c))
+    text = text.lower()
+    return [t for t in TOKEN_RE.findall(text) if len(t) > 1 and t not in STOP_WORDS]
+
+
+def shard_key(term: str) -> str:
+    """Shard a term belongs to (its first character)."""
+    return term[0]
+
+
+class SearchIndex:
+    """
+    Incrementally maintained search index.
+
+    The postings of every document live in a SQLite database in the cache
+    directory rather than in memory; each shard file is streamed from it
+    in term order, so building the index holds one document's terms at a
+    time however large the archive is.
+
+    Args:
+        cache_dir: Root cache directory; index state lives in ``search.db``
+        output_dir: Site output directory, used to detect deleted shard files
+    """
+
+    def __init__(self, cache_dir: Path, output_dir: Path):
+        self.db_path = Path(cache_dir) / 'search.db'
+        self.output_dir = Path(output_dir)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self.conn = self._connect()
+        except sqlite3.DatabaseError as e:
+            print(f"Ignoring unreadable search cache: {e}")
+            self.db_path.unlink(missing_ok=True)
+            self.conn = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the state database, starting over if it has another schema."""
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        if conn.execute("PRAGMA user_version").fetchone()[0] != STATE_VERSION:
+            conn.close()
+            self.db_path.unlink(missing_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.executescript(SCHEMA)
+            for statement in POSTINGS_INDEXES:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {STATE_VERSION}")
+        return conn
+
+    def close(self):
+        self.conn.close()
+
+    def build(self, documents: Iterable[Dict], output: OutputWriter) -> List[str]:
+        """
+        Update the index with the current set of documents and write it.
+
+        Each document is a dict with ``key`` (stable identifier),
+        ``fingerprint`` (changes whenever the content does), ``url``,
+        ``title``, ``date``, ``type`` and the text fields listed in
+        FIELD_WEIGHTS. A text field may be a zero-argument callable; it is
+        only called when the document has to be re-tokenized.
+
+        Only the shards containing terms of added, edited or removed
+        documents (and files missing from the output) are regenerated; the
+        others are kept as they are. The state is committed once the files
+        are written, so a failed build leaves the previous state to compare
+        the next one with.
+
+        Args:
+            documents: Every searchable document of this build; may be a
+                generator
+            output: Writer the index files go through
+
+        Returns:
+            Site-relative paths of the files that were written
+        """
+        conn = self.conn
+        with conn:
+            conn.execute("UPDATE docs SET seen = 0")
+            next_number = self._next_number()
+            # Bulk loading is much faster with the postings indexes built afterwards
+            fresh = next_number == 0
+            if fresh:
+                conn.execute("DROP INDEX IF EXISTS postings_term")
+                conn.execute("DROP INDEX IF EXISTS postings_number")
+
+            affected = set()
+            total = retokenized = 0
+            for doc in documents:
+                total += 1
+                key = doc['key']
+                cached = conn.execute("SELECT number, fingerprint FROM docs WHERE key = ?", (key,)).fetchone()
+                if cached and cached[1] == doc['fingerprint']:
+                    conn.execute("UPDATE docs SET seen = 1 WHERE key = ?", (key,))
+                    continue
+
+                retokenized += 1
+                meta = _dumps([doc['url'], doc['title'], doc.get('date') or '', doc['type']])
+                if cached:
+                    number = cached[0]
+                    affected |= self._remove_postings(number)
+                    conn.execute("UPDATE docs SET fingerprint = ?, meta = ?, seen = 1 WHERE key = ?",
+                                 (doc['fingerprint'], meta, key))
+                else:
+                    # New documents get the next free number; holes are never reused
+                    number, next_number = next_number, next_number + 1
+                    conn.execute("INSERT INTO docs (key, number, fingerprint, meta, seen) VALUES (?, ?, ?, ?, 1)",
+                                 (key, number, doc['fingerprint'], meta))
+                terms = self._score_terms(doc)
+                conn.executemany("INSERT INTO postings (term, number, score) VALUES (?, ?, ?)",
+                                 ((term, number, score) for term, score in terms.items()))
+                affected.update(shard_key(term) for term in terms)
+
+            removed = conn.execute("SELECT number FROM docs WHERE seen = 0").fetchall()
+            for (number,) in removed:
+                affected |= self._remove_postings(number)
+            conn.execute("DELETE FROM docs WHERE seen = 0")
+            conn.execute("INSERT OR REPLACE INTO settings (name, value) VALUES ('next_number', ?)", (next_number,))
+            if fresh:
+                for statement in POSTINGS_INDEXES:
+                    conn.execute(statement)
+
+            previous_shards = {shard for (shard,) in conn.execute("SELECT shard FROM shards")}
+            shards = {shard for shard in previous_shards | affected if self._has_terms(shard)}
+            conn.execute("DELETE FROM shards")
+            conn.executemany("INSERT INTO shards (shard) VALUES (?)", ((shard,) for shard in shards))
+
+            written = []
+            for shard in sorted(shards):
+                path = f"search/t-{shard}.json"
+                if shard in affected or not (self.output_dir / path).exists():
+                    if output.write_stream(path, self._shard_chunks(shard)):
+                        written.append(path)
+                else:
+                    output.keep(path)
+
+            path = 'search/docs.json'
+            if retokenized or removed or shards != previous_shards or not (self.output_dir / path).exists():
+                if output.write_stream(path, self._docs_chunks(sorted(shards), next_number)):
+                    written.append(path)
+            else:
+                output.keep(path)
+
+        print(f"Search index: {total} documents, {retokenized} re-tokenized, "
+              f"{len(written)} of {len(shards) + 1} files changed")
+        return written
+
+    def _next_number(self) -> int:
+        row = self.conn.execute("SELECT value FROM settings WHERE name = 'next_number'").fetchone()
+        return row[0] if row else 0
+
+    def _remove_postings(self, number: int) -> Set[str]:
+        """Delete a document's postings and return the shards they were in."""
+        shards = {shard_key(term) for (term,) in
+                  self.conn.execute("SELECT term FROM postings WHERE number = ?", (number,))}
+        self.conn.execute("DELETE FROM postings WHERE number = ?", (number,))
+        return shards
+
+    def _has_terms(self, shard: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM postings WHERE term >= ? AND term < ? LIMIT 1",
+                                 _term_range(shard)).fetchone() is not None
+
+    def _shard_chunks(self, shard: str) -> Iterator[str]:
+        """
+        A shard file in pieces, one term at a time.
+
+        Postings are read in term and document order, and each document
+        number is encoded as the difference to the previous one.
+        """
+        rows = self.conn.execute(
+            "SELECT term, number, score FROM postings WHERE term >= ? AND term < ? ORDER BY term, number",
+            _term_range(shard)
+        )
+        yield '{'
+        current, postings, previous = None, [], 0
+        for term, number, score in rows:
+            if term != current:
+                if current is not None:
+                    yield f"{json.dumps(current, ensure_ascii=False)}:[{','.join(postings)}],"
+                current, postings, previous = term, [], 0
+            postings.append(f"{number - previous},{score}")
+            previous = number
+        if current is not None:
+            yield f"{json.dumps(current, ensure_ascii=False)}:[{','.join(postings)}]"
+        yield '}'
+
+    def _docs_chunks(self, shards: List[str], next_number: int) -> Iterator[str]:
+        """docs.json in pieces; numbers without a document are ``null``."""
+        def entries():
+            expected = 0
+            for number, meta in self.conn.execute("SELECT number, meta FROM docs ORDER BY number"):
+                yield from ['null'] * (number - expected)
+                yield meta
+                expected = number + 1
+            yield from ['null'] * (next_number - expected)
+
+        yield '{"docs":['
+        for position, entry in enumerate(entries()):
+            yield f",{entry}" if position else entry
+        yield f'],"shards":{_dumps(shards)},"v":{INDEX_VERSION}}}'
+
+    @staticmethod
+    def _score_terms(doc: Dict) -> Dict[str, int]:
+        """Weighted term frequencies across a document's fields."""
+        scores = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            value = doc.get(field) or ''
+            if callable(value):
+                value = value() or ''
+            if isinstance(value, (list, tuple)):
+                value = ' '.join(value)
+            for term, count in Counter(tokenize(value)).items():
+                scores[term] += weight * count
+        return {term: min(score, MAX_TERM_SCORE) for term, score in scores.items()}
+
+
+def _dumps(data) -> str:
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+
+def _term_range(shard: str) -> Tuple[str, str]:
+    """Bounds of the terms of a shard, for ``term >= ? AND term < ?``."""
+    return shard, chr(ord(shard) + 1)
@@ -0,0 +1,134 @@
+"""
+Sharded builds.
+
+A full rebuild spends nearly all of its time fetching post content from
+Notion and converting it to HTML. ``build.py build --shard i/N`` does that
+work for one deterministic Nth of the posts (chosen by a hash of the Notion
+page ID, so the split is stable across machines and builds) and writes the
+processed articles to a shard directory:
+
+    shards/<i>-of-<N>/shard.json        partial manifest (see below)
+    shards/<i>-of-<N>/articles/*.json   processed articles (ArticleCache layout)
+
+``build.py merge`` then loads every shard and builds the site from their
+articles without fetching posts again: related content, post pages,
+listings, feed, sitemap and search index all need the whole archive, so
+they are produced by the merge. The shards can run as CI matrix jobs or
+on separate machines; only their directories need to reach the merge.
+
+Each shard records a digest of the ordered database rows it saw, with
+their edit times. Shards that saw different databases (a post was added,
+removed or edited between shard runs) are refused by the merge rather
+than publishing a site with missing, duplicated or mixed-version posts.
+"""
+
+import hashlib
+import json
+import zlib
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SHARD_MANIFEST = 'shard.json'
+SHARD_VERSION = 2
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """
+    Parse an ``i/N`` shard specification.
+
+    Args:
+        value: Shard number (1-based) and shard count, e.g. ``2/4``
+
+    Returns:
+        Tuple of (index, count)
+
+    Raises:
+        ValueError: If the specification is malformed or out of range
+    """
+    index, _, count = value.partition('/')
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Shard must look like i/N, got {value!r}") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"Shard {index}/{count} is out of range")
+    return index, count
+
+
+def shard_of(page_id: str, count: int) -> int:
+    """1-based shard a Notion page belongs to when split ``count`` ways."""
+    return zlib.crc32(page_id.replace('-', '').encode('ascii')) % count + 1
+
+
+def shard_dir(root: Path, index: int, count: int) -> Path:
+    """Directory of one shard below the shards root."""
+    return Path(root) / f'{index}-of-{count}'
+
+
+def rows_digest(rows: List[Dict]) -> str:
+    """Fingerprint of a database's ordered rows and their edit times, compared across shards."""
+    lines = (f"{row['id']} {row.get('last_edited_time') or ''}" for row in rows)
+    return hashlib.sha1('\n'.join(lines).encode('utf-8')).hexdigest()
+
+
+def write_shard_manifest(directory: Path, index: int, count: int, rows: List[Dict],
+                         articles: List[Tuple[int, str]]):
+    """
+    Write a shard's partial manifest.
+
+    Args:
+        directory: Shard directory
+        index: Shard number (1-based)
+        count: Shard count
+        rows: Every database row, in database order
+        articles: (database position, article ID) of this shard's articles
+    """
+    manifest = {
+        'v': SHARD_VERSION,
+        'shard': index,
+        'shards': count,
+        'rows': len(rows),
+        'database': rows_digest(rows),
+        'articles': sorted(articles),
+    }
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    with open(Path(directory) / SHARD_MANIFEST, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(manifest, sort_keys=True, separators=(',', ':')))
+
+
+def load_shards(directories: List[Path]) -> List[Tuple[Path, Dict]]:
+    """
+    Load and cross-check the manifests of a complete set of shards.
+
+    Args:
+        directories: Shard directories, in any order
+
+    Returns:
+        (directory, manifest) per shard, ordered by shard number
+
+    Raises:
+        ValueError: If a manifest is missing or unreadable, shards are
+            missing or repeated, or shards saw different databases
+    """
+    shards = []
+    for directory in directories:
+        path = Path(directory) / SHARD_MANIFEST
+        try:
+            with open(path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Cannot read shard manifest {path}: {e}") from e
+        if manifest.get('v') != SHARD_VERSION:
+            raise ValueError(f"Unsupported shard manifest version in {path}")
+        shards.append((Path(directory), manifest))
+
+    if not shards:
+        raise ValueError("No shards to merge")
+    count = shards[0][1]['shards']
+    numbers = sorted(manifest['shard'] for _, manifest in shards)
+    if any(manifest['shards'] != count for _, manifest in shards) or numbers != list(range(1, count + 1)):
+        found = ', '.join(f"{m['shard']}/{m['shards']}" for _, m in shards)
+        raise ValueError(f"Expected shards 1..{count} exactly once, got {found}")
+    if len({manifest['database'] for _, manifest in shards}) != 1:
+        raise ValueError("Shards saw different versions of the database; rebuild them")
+    return sorted(shards, key=lambda item: item[1]['shard'])
@@ -8,29 +8,72 @@ This module handles:
 4. Managing assets and media files
 
 Key components:
-- NotionClient: Handles API communication with Notion
+- create_notion_client: Pooled, rate-limited and retrying Notion API client
 - NotionProcessor: Converts Notion blocks to HTML
 - SiteGenerator: Manages the static site generation process
 """
 
 import os
-import shutil
+import json
+import hashlib
+import re
 from pathlib import Path
-from typing import Dict, List, Optional
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import chain
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import datetime, timezone
 from dotenv import load_dotenv
-from notion_client import Client
 from jinja2 import Environment, FileSystemLoader
+from ..notion.errors import NotionFetchError
+from ..notion.ingest import GIG_SCHEMA, MEDIA_SCHEMA, Schema
+from ..notion.planner import RequestPlanner
 from ..notion.processor import NotionProcessor
-from urllib.parse import quote
-from ..spotify.spotify import get_current_track
+from urllib.parse import quote, unquote
+from ..config import (CACHE_DIR, GIGS_PER_PAGE, MEDIA_PER_PAGE, NOTION_FETCH_WORKERS,
+                      LINK_PREVIEWS, PIPELINE_QUEUE_SIZE, POSTS_PER_PAGE, VIDEO_FACADES, require)
+from .article import Article, html_to_text, reading_time
+from .article_index import ArticleIndex
+from .cache import ArticleCache, PageCache
+from .feeds import FEED_SIZE, article_updated, atom_feed, sitemap_files
+from .gig_index import GigIndex
+from .link_checker import extract_links
+from .link_previews import LinkPreviews
+from .media_index import MediaIndex
+from .output import OutputWriter
+from .pagination import paginate, paginate_from_oldest
+from .pipeline import run_pipeline
+from .related import RelatedIndex
+from .search_index import SearchIndex
+from .shards import load_shards, shard_of, write_shard_manifest
+from .sites import SharedResources, SiteConfig
+from .thumbnails import VideoThumbnails
+from ..spotify.history import ListeningHistory
 
-def date_filter(date_str):
+# Later pages of a paginated listing, e.g. /tags/music/page/2/
+PAGINATED_PATH_RE = re.compile(r'^(.*/)page/\d+/$')
+
+# Where a spilled post page gets its related-content section
+RELATED_MARKER = '<!-- related -->'
+
+def build_timestamp() -> datetime:
+    """
+    Time the build is stamped with.
+    
+    Honors SOURCE_DATE_EPOCH (https://reproducible-builds.org/specs/source-date-epoch/)
+    so identical content always produces identical output.
+    """
+    epoch = os.getenv('SOURCE_DATE_EPOCH')
+    if epoch:
+        return datetime.fromtimestamp(int(epoch), tz=timezone.utc)
+    return datetime.now(timezone.utc)
+
+def date_filter(date_str, format='%B %d, %Y'):
     """Convert date string to formatted date"""
     if isinstance(date_str, str):
         try:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-            return date_obj.strftime('%B %d, %Y')
+            date_obj = datetime.strptime(date_str[:10], '%Y-%m-%d')
+            return date_obj.strftime(format)
         except ValueError:
             return date_str
     return date_str
@@ -41,36 +84,84 @@ class SiteGenerator:
     Handles content fetching, processing, and file generation.
     """
 
-    def __init__(self, output_dir: str, template_dir: str):
+    def __init__(self, output_dir: str, template_dir: str, cache_dir: Optional[str] = None,
+                 notion=None, out_of_core: bool = False, site: Optional[SiteConfig] = None,
+                 resources: Optional[SharedResources] = None):
         """
         Initialize the site generator.
         
         Args:
             output_dir: Directory where generated site will be written
             template_dir: Directory containing Jinja2 templates
+            cache_dir: Directory for build caches (defaults to CACHE_DIR)
+            notion: Notion client to use, e.g. a SnapshotClient; defaults to
+                a pooled API client authenticated with NOTION_API_KEY
+            out_of_core: Keep article bodies on disk instead of in memory:
+                each body is written to the article cache as soon as it is
+                processed and read back only to render its own page, so
+                memory no longer grows with the size of the posts
+            site: Settings of the site to build; defaults to the site
+                configured by environment variables
+            resources: Notion client, caches and compiled templates shared
+                with the other sites of a multi-site build
         """
         # Load environment variables
         load_dotenv()
         
-        # Initialize Notion client and processor
-        self.notion = Client(auth=os.getenv('NOTION_API_KEY'))
-        self.processor = NotionProcessor()
-        
         # Set up paths
         self.output_dir = Path(output_dir)
         self.template_dir = Path(template_dir)
+        self.cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR
+        self.site = site or SiteConfig.from_env(self.output_dir, self.template_dir, self.cache_dir)
+        self.resources = resources
+        
+        # Initialize Notion client (pooled, rate limited, retrying) and processor
+        if notion is None and resources is not None:
+            notion = resources.notion
+        if notion is None:
+            # Imported here so offline builds never load the HTTP stack
+            from ..notion.client import create_notion_client
+            notion = create_notion_client(require('NOTION_API_KEY'))
+        self.notion = notion
+        self.planner = self._new_planner()
+        self.processor = resources.processor if resources else NotionProcessor(video_facades=VIDEO_FACADES)
+        self.build_time = build_timestamp()
+        self.out_of_core = out_of_core
+        
+        # Build caches persisted between runs
+        self.article_cache = ArticleCache(self.cache_dir)
+        self.search_index = SearchIndex(self.cache_dir, self.output_dir)
+        self.page_cache = PageCache(self.cache_dir)
+        self.related_index = RelatedIndex(self.cache_dir)
+        self.output = OutputWriter(self.output_dir, self.cache_dir)
+        self.thumbnails = VideoThumbnails(self.cache_dir)
+        self.link_previews = LinkPreviews(self.cache_dir)
+        self._template_version = ''
+        self.gig_index: Optional[GigIndex] = None
+        self.media_index: Optional[MediaIndex] = None
+        
+        # Notion state of the last build, for incremental syncs: the
+        # database's row IDs in order, each with _row_summary
+        self._rows: Optional[Dict[str, Tuple[Optional[str], bool]]] = None
+        self._articles: Dict[str, Article] = {}
+        self._records: Dict[str, Optional[List[Dict]]] = {}
+        self._reingested: set = set()
+        # Files written by the gig and media stages, keyed by stage, with
+        # the template and site context they were rendered with
+        self._stage_outputs: Dict[str, tuple] = {}
         
         # Initialize Jinja environment
         self.jinja_env = Environment(
             loader=FileSystemLoader(str(self.template_dir)),
-            autoescape=True
+            autoescape=True,
+            bytecode_cache=resources.bytecode_cache if resources else None
         )
         
         # Add custom filters
         def format_date(value, format='%B %d, %Y'):
             try:
                 if isinstance(value, str):
-                    date_obj = datetime.strptime(value, '%Y-%m-%d')
+                    date_obj = datetime.strptime(value[:10], '%Y-%m-%d')
                 else:
                     date_obj = value
                 return date_obj.strftime(format)
@@ -85,168 +176,602 @@ class SiteGenerator:
         # Add date filter
         self.jinja_env.filters['date'] = date_filter
         
+        # Add slug filter for tag URLs
+        self.jinja_env.filters['slug'] = self._generate_slug
+        
+        # Point video facades at the mirrored thumbnails and fill in link cards
+        self.jinja_env.filters['local_thumbnails'] = self._local_thumbnails
+        self.jinja_env.filters['link_previews'] = self._link_previews
+        
         # Site configuration
-        self.site_config = {
-            'title': 'Jimi Land',
-            'description': 'A personal website about music, life, and adventures',
-            'author': 'Josh Brown',
-            'base_url': os.getenv('SITE_BASE_URL', '')  # Get base URL from environment
-        }
+        self.site_config = self.site.template_context()
 
     def _calculate_reading_time(self, content: str) -> str:
         """
         Calculate estimated reading time for an article.
         
+        Listings use the precomputed ``Article.reading_time``; this filter
+        remains for templates that only have the HTML at hand.
+        
         Args:
             content: The article content in HTML format
             
         Returns:
             String with estimated reading time (e.g., "5 min read")
         """
-        # Average reading speed (words per minute)
-        WPM = 200
-        
-        # Remove HTML tags and split into words
-        # This is a simple approach - for more accuracy you might want to use BeautifulSoup
-        words = content.replace('<', ' <').replace('>', '> ').split()
-        word_count = len(words)
-        
-        # Calculate reading time in minutes
-        minutes = max(1, round(word_count / WPM))
-        
-        return f"{minutes} min read"
+        return reading_time(len(html_to_text(content).split()))
+
+    def _new_planner(self) -> RequestPlanner:
+        """Request planner for one build, sharing responses with other sites' builds."""
+        return RequestPlanner(self.notion, self.resources.responses if self.resources else None)
+
+    def _local_thumbnails(self, content_html: str) -> str:
+        """Rewrite video facade thumbnails to their mirrored copies."""
+        return self.thumbnails.localize(content_html, self.site_config['base_url'])
+
+    def _link_previews(self, content_html: str) -> str:
+        """Add fetched titles, descriptions and images to link cards."""
+        return self.link_previews.enrich(content_html, self.site_config['base_url'])
+
+    def _get_template_version(self) -> str:
+        """Fingerprint of the template files, so template edits re-render cached pages."""
+        return self.page_cache.signature(sorted(
+            (str(path.relative_to(self.template_dir)), hashlib.sha1(path.read_bytes()).hexdigest())
+            for path in self.template_dir.glob('**/*') if path.is_file()
+        ))
 
-    def generate_site(self):
+    def generate_site(self, since: Optional[str] = None,
+                      shards: Optional[List[Path]] = None) -> bool:
         """
         Generate the complete static site.
+        
+        Args:
+            since: Notion timestamp of the previous sync. When given (and
+                this generator has built before), only pages edited on or
+                after it are fetched; everything else comes from the last
+                build and the build caches. Deleted Notion pages are only
+                noticed by a full build.
+            shards: Directories written by generate_shard; when given, the
+                posts are taken from them instead of being fetched
+        
+        Returns:
+            True if the site was regenerated, False if an incremental sync
+            found nothing changed
         """
         # Create output directory if it doesn't exist
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.planner = self._new_planner()
+        if since is not None and (self._rows is None or shards):
+            since = None
+        self._reingested = set()
+        # Post pages are rendered while the articles are still being fetched
+        self._template_version = self._get_template_version()
         
-        # Get and process all articles
-        articles = self._get_articles()
+        # Gigs and media are loaded up front so posts can link to them; they
+        # are fetched while the article pipeline runs
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix='ingest') as pool:
+            gigs_future = pool.submit(self._ingest, GIG_SCHEMA, since)
+            media_future = pool.submit(self._ingest, MEDIA_SCHEMA, since)
+            articles = self._merge_shards(shards) if shards else self._get_articles(since)
+            gigs, media = gigs_future.result(), media_future.result()
+
+        changed, removed = self.article_cache.commit()
+        for article_id in removed:
+            self._spill_path(article_id).unlink(missing_ok=True)
+        print(f"Articles: {len(articles)} total, {len(changed)} changed, {len(removed)} removed")
+        if since is not None and not changed and not removed and not self._reingested:
+            print(f"No Notion changes since {since}")
+            print(self.planner.report())
+            return False
+        # Indexes of databases that were not re-ingested are still current
+        if since is None or GIG_SCHEMA.name in self._reingested:
+            self.gig_index = GigIndex(gigs, self._generate_slug) if gigs is not None else None
+        if since is None or MEDIA_SCHEMA.name in self._reingested:
+            self.media_index = MediaIndex(media, self._generate_slug) if media is not None else None
+
+        gig_documents = self._gig_documents()
+        self.related_index.build(chain(self._post_documents(articles), gig_documents, self._media_documents()))
         
-        # Generate individual article pages
+        # Post pages rendered by the pipeline only need their related
+        # content; articles it did not process (unchanged or from shards)
+        # are rendered now if their page changed
+        article_ids = [article.id for article in articles]
+        pending = [article_id for article_id in article_ids
+                   if self.page_cache.recorded(f"spill:{article_id}") is None]
+        self.thumbnails.prepare(pending)
+        self.link_previews.prepare(pending)
         for article in articles:
-            self._generate_article_page(article)
+            self._generate_article_page(article, self.related_index.related(f"post:{article.id}"))
+        self.thumbnails.publish(self.output, article_ids)
+        self.link_previews.publish(self.output, article_ids)
         
-        # Generate pages
-        self._generate_index_page(articles)
-        self._generate_archive_page(articles)
-        self._generate_gigs_page()
+        # Generate listing pages from one shared sort order
+        article_index = ArticleIndex(articles, self._generate_slug)
+        self._generate_index_page(article_index)
+        self._generate_archive_page(article_index)
+        self._generate_feeds(article_index)
+        self._run_stage(GIG_SCHEMA.name, self._generate_gigs_page,
+                        since is not None and GIG_SCHEMA.name not in self._reingested)
+        self._generate_listening_page()
+        self._run_stage(MEDIA_SCHEMA.name, self._generate_media_pages,
+                        since is not None and MEDIA_SCHEMA.name not in self._reingested)
         self._generate_about_page()
+        self._generate_search_index(chain(self._post_documents(articles), gig_documents))
         self._copy_static_files()
 
-    def _get_articles(self) -> List[Dict]:
+        self._generate_sitemap(article_index)
+
+        # Remove pages left over from content that no longer exists
+        self.output.finish()
+        # Saved last: a build failing earlier must not leave signatures of
+        # pages missing from the output manifest
+        self.page_cache.save()
+        print(self.planner.report())
+        return True
+
+    def generate_shard(self, index: int, count: int, directory: Path) -> int:
         """
-        Fetch and process all articles from Notion.
+        Fetch and process one shard of the posts for a later merge.
+        
+        Every shard queries the whole database, so all of them agree on
+        the post order, and processes the rows that shard_of assigns to it.
+        
+        Args:
+            index: Shard number (1-based)
+            count: Shard count
+            directory: Where to write the shard's articles and manifest
         
         Returns:
-            List of processed article dictionaries
+            Number of articles in the shard
         """
+        self.planner = self._new_planner()
+        rows = self._query_database(self.site.require_database('NOTION_DATABASE_ID'))
+        order = {row['id']: position for position, row in enumerate(rows)}
+        mine = [row for row in rows if shard_of(row['id'], count) == index]
+
+        # Articles go to disk as they are processed, so a shard holds at
+        # most the pipeline's in-flight pages in memory
+        cache = ArticleCache(directory)
+        cache.begin()
         articles = []
+
+        def keep(article: Article):
+            cache.put(article)
+            articles.append((order[article.id], article.id))
+
+        self._fetch_rows(mine, keep, render=False)
+        cache.commit()
+        write_shard_manifest(directory, index, count, rows, articles)
+        print(f"Shard {index}/{count}: {len(articles)} of {len(rows)} articles written to {directory}")
+        print(self.planner.report())
+        return len(articles)
+
+    def _merge_shards(self, directories: List[Path]) -> List[Article]:
+        """
+        Load the articles of a complete set of shards.
         
-        try:
-            # Query the database
-            response = self.notion.databases.query(
-                database_id=os.getenv('NOTION_DATABASE_ID'),
-            )
-            print(f"\nDatabase query response: {response}")
+        Args:
+            directories: Shard directories written by generate_shard
+        
+        Returns:
+            List of articles, in database order
+        
+        Raises:
+            ValueError: If the shards are incomplete or inconsistent
+        """
+        shards = load_shards(directories)
+        articles = []
+        self.article_cache.begin()
+        for directory, manifest in shards:
+            cache = ArticleCache(directory)
+            for position, article_id in manifest['articles']:
+                article = cache.get(article_id)
+                if article is None:
+                    raise ValueError(f"Article {article_id} is missing from shard {directory}")
+                self._keep_article(article)
+                self._release_body(article)
+                articles.append((position, article))
+        print(f"\nMerged {len(articles)} articles from {len(shards)} shards")
+
+        articles = [article for _, article in sorted(articles, key=lambda item: item[0])]
+        # Rows were not queried, so the next build of this generator is full
+        self._rows = None
+        self._articles = {} if self.out_of_core else {article.id: article for article in articles}
+        return articles
+
+    def _run_stage(self, name: str, generate, unchanged: bool):
+        """
+        Run a page-generating stage, or keep its files from the last build.
+        
+        Args:
+            name: Stage name
+            generate: Function writing the stage's pages
+            unchanged: Whether the stage's data is the same as in the last
+                build; its pages are then kept if templates and site
+                context are unchanged too
+        """
+        key = self.page_cache.signature(self._template_version, self._site_context())
+        previous = self._stage_outputs.get(name)
+        if unchanged and previous is not None and previous[0] == key:
+            for rel_path in previous[1]:
+                self.output.keep(rel_path)
+            return
+
+        before = set(self.output.current)
+        generate()
+        self._stage_outputs[name] = (key, set(self.output.current) - before)
+
+    def _get_articles(self, since: Optional[str] = None) -> List[Article]:
+        """
+        Fetch and process all articles from Notion.
+        
+        With ``since``, only rows edited since then (or whose content page
+        was) are fetched again; the other articles are loaded from the
+        article cache.
+        
+        A full build streams the database query into the pipeline of
+        _fetch_rows, so content fetches start with the first page of rows
+        and every post page is rendered as soon as its article is ready.
+        
+        Args:
+            since: Notion timestamp of the previous sync, for incremental builds
+        
+        Returns:
+            List of processed articles, in database order
             
-            # Process each page
-            for page in response.get('results', []):
-                print(f"\nProcessing page: {page.get('id')}")
-                if article := self._process_article(page):
+        Raises:
+            NotionFetchError: If any article could not be fetched completely,
+                so a transient failure never publishes a site with missing posts
+        """
+        articles = []
+        self.article_cache.begin()
+        
+        database_id = self.site.require_database('NOTION_DATABASE_ID')
+        if since is None:
+            self._rows = {}
+
+            def rows():
+                for row in self._iter_database(database_id):
+                    self._rows[row['id']] = self._row_summary(row)
+                    yield row
+
+            fetched = self._fetch_rows(rows(), articles.append)
+        else:
+            edited = self._edited_rows(database_id, since)
+            self._rows.update((row['id'], self._row_summary(row)) for row in edited)
+            stale = {row['id']: row for row in edited}
+            print(f"\n{len(edited)} pages edited since {since}")
+            for row_id, (_, titled) in self._rows.items():
+                if row_id in stale or not titled:
+                    continue
+                article = self._articles.get(row_id) or self.article_cache.get(row_id)
+                if article is None:
+                    # Missing from the cache: fetch the row again to rebuild it
+                    stale[row_id] = self.planner.pages.retrieve(page_id=row_id)
+                else:
+                    self._keep_article(article)
+                    self._release_body(article)
                     articles.append(article)
-                    
-        except Exception as e:
-            print(f"Error fetching articles: {str(e)}")
+            fetched = self._fetch_rows(stale.values(), articles.append)
+        print(f"\nFound {len(self._rows)} pages in the database, fetched {fetched}")
             
+        # Workers finish in any order; keep the database's
+        order = {row_id: position for position, row_id in enumerate(self._rows)}
+        articles.sort(key=lambda article: order[article.id])
+        # Kept for incremental builds by long-running processes (bodies of
+        # out-of-core builds come back from the article cache instead)
+        self._articles = {} if self.out_of_core else {article.id: article for article in articles}
         return articles
 
-    def _process_article(self, page: Dict) -> Optional[Dict]:
-        """Process a single Notion page into an article."""
-        try:
-            # Extract basic metadata
-            properties = page['properties']
-            
-            # Get title (required)
-            title_prop = properties.get('Title', {}).get('title', [{}])
-            if not title_prop:
-                return None
-            title = title_prop[0].get('plain_text', 'Untitled')
-            
-            # Get date (optional)
-            date_prop = properties.get('Date', {}).get('date', {})
-            date = date_prop.get('start') if date_prop else datetime.now().strftime('%Y-%m-%d')
-            
-            # Get description (optional)
-            desc_prop = properties.get('Description', {}).get('rich_text', [{}])
-            description = desc_prop[0].get('plain_text', '') if desc_prop else ''
-            
-            # Get tags (optional)
-            tags = [tag['name'] for tag in properties.get('Tags', {}).get('multi_select', [])]
-            
-            # Generate URL-friendly slug
-            slug = self._generate_slug(title)
+    def _fetch_rows(self, rows: Iterable[Dict], keep: Callable[[Article], None], render: bool = True) -> int:
+        """
+        Fetch, process and render the articles of database rows.
+        
+        Rows run through a pipeline of bounded stages: NOTION_FETCH_WORKERS
+        threads fetch block trees, one thread converts them to HTML and,
+        with ``render``, one more stores each article and renders its page
+        (_render_article). Each stage works on later rows while the next
+        one handles earlier ones, and at most PIPELINE_QUEUE_SIZE items
+        wait between two stages. Content fetches are planned as rows
+        arrive, so rows linking the same content page share a fetch.
+        
+        Args:
+            rows: Rows to fetch; may be a generator still querying the database
+            keep: Called on this thread with each processed article
+            render: Store the articles and render their pages; shards only
+                process them
+        
+        Returns:
+            Number of rows fetched
+        
+        Raises:
+            NotionFetchError: If any article could not be fetched completely
+        """
+        failures = []
+        fed = []
+
+        def plan(rows: Iterable[Dict]) -> Iterator[Dict]:
+            for row in rows:
+                content_id = self._content_id(row)
+                if content_id and self._article_title(row):
+                    self.planner.expect('blocks.children.list', block_id=content_id)
+                fed.append(row['id'])
+                yield row
+
+        stages = [(self._fetch_article, NOTION_FETCH_WORKERS), (self._process_fetched, 1)]
+        if render:
+            stages.append((self._render_article, 1))
+        for position, value, error in run_pipeline(plan(rows), stages, PIPELINE_QUEUE_SIZE):
+            if error is not None:
+                print(f"Error processing article {fed[position]}: {str(error)}")
+                failures.append(fed[position])
+            elif value is not None:
+                keep(value)
+        
+        if failures:
+            raise NotionFetchError(
+                f"{len(failures)} of {len(fed)} articles could not be fetched: {', '.join(failures)}"
+            )
+        return len(fed)
+
+    def _process_fetched(self, fetched: tuple) -> Optional[Article]:
+        """Pipeline stage converting a fetched (page, blocks) tuple into an article."""
+        page, blocks = fetched
+        print(f"\nProcessing page: {page.get('id')}")
+        return self._process_article(page, blocks)
+
+    def _render_article(self, article: Optional[Article]) -> Optional[Article]:
+        """
+        Pipeline stage storing a processed article and rendering its page.
+        
+        The page is spilled to the cache with a placeholder where related
+        content goes, since that needs the whole archive; out of core, the
+        body is dropped once the page is rendered.
+        """
+        if article is None:
+            return None
+        fingerprint = self._keep_article(article)
+        self.thumbnails.prepare([article.id])
+        self.link_previews.prepare([article.id])
+        self._spill_article_page(article, fingerprint)
+        self._release_body(article)
+        return article
+
+    def _keep_article(self, article: Article) -> str:
+        """
+        Store a processed article in the article cache and record its
+        videos and link cards.
+        
+        Returns:
+            The article's fingerprint
+        """
+        fingerprint = self.article_cache.put(article)
+        self.thumbnails.scan(article.id, article.content_html)
+        if LINK_PREVIEWS:
+            self.link_previews.scan(article.id, article.content_html)
+        return fingerprint
+
+    def _release_body(self, article: Article):
+        """Drop a stored article's body from memory when building out of core."""
+        if self.out_of_core:
+            article.content_html = None
+
+    def _with_body(self, article: Article) -> Article:
+        """The article with its body, loading it from the cache if spilled."""
+        if article.content_html is not None:
+            return article
+        loaded = self.article_cache.get(article.id)
+        if loaded is None:
+            raise NotionFetchError(f"Body of article {article.id} is missing from the article cache")
+        return loaded
+
+    def _article_body(self, article_id: str) -> str:
+        """Body of a spilled article, read back from the cache."""
+        loaded = self.article_cache.get(article_id)
+        return loaded.content_html if loaded else ''
+
+    def _edited_rows(self, database_id: str, since: str) -> List[Dict]:
+        """
+        Database rows edited on or after a time.
+        
+        Edits inside an article's linked content page do not touch its row,
+        so recently edited pages are also looked up with the search API
+        (newest first, stopping at ``since``) and mapped back to the rows
+        linking them, which are retrieved again.
+        
+        Args:
+            database_id: ID of the blog database
+            since: Notion timestamp (e.g. ``2024-05-01T12:30:00.000Z``)
             
-            # Fetch and process content blocks
-            blocks = self._get_page_blocks(page['id'])
-            content_html = self.processor.process_blocks(blocks)
+        Returns:
+            Edited rows, without duplicates
+        """
+        edited = {row['id']: row for row in self._query_database(
+            database_id, filter={'timestamp': 'last_edited_time', 'last_edited_time': {'on_or_after': since}}
+        )}
+
+        rows_by_content = {}
+        for row_id, (content_id, _) in self._rows.items():
+            if content_id:
+                rows_by_content.setdefault(content_id.replace('-', ''), []).append(row_id)
+
+        params = {'filter': {'property': 'object', 'value': 'page'},
+                  'sort': {'direction': 'descending', 'timestamp': 'last_edited_time'}}
+        response = self.planner.search(**params)
+        while True:
+            results = response.get('results', [])
+            for page in results:
+                if (page.get('last_edited_time') or '') < since:
+                    return list(edited.values())
+                for row_id in rows_by_content.get(page['id'].replace('-', ''), []):
+                    if row_id not in edited:
+                        edited[row_id] = self.planner.pages.retrieve(page_id=row_id)
+            if not response.get('has_more'):
+                return list(edited.values())
+            response = self.planner.search(start_cursor=response.get('next_cursor'), **params)
+
+    def _fetch_article(self, page: Dict) -> tuple:
+        """
+        Pipeline stage fetching a row's content blocks.
+        
+        Returns:
+            (page, blocks) tuple; blocks is None for rows without a title,
+            which are skipped without fetching
+        """
+        if not self._article_title(page):
+            return page, None
+        return page, self._get_page_blocks(page)
+
+    def _query_database(self, database_id: str, **kwargs) -> List[Dict]:
+        """
+        Query a Notion database and follow pagination to collect every row.
+        
+        Args:
+            database_id: ID of the Notion database
+            **kwargs: Extra query parameters (filter, sorts)
             
-            return {
-                'id': page['id'],
-                'title': title,
-                'date': date,
-                'description': description,
-                'tags': tags,
-                'slug': slug,
-                'content_html': content_html
-            }
+        Returns:
+            List of Notion page objects
+        """
+        return list(self._iter_database(database_id, **kwargs))
+
+    def _iter_database(self, database_id: str, **kwargs) -> Iterator[Dict]:
+        """
+        Yield the rows of a Notion database as each result page arrives.
+        
+        Args:
+            database_id: ID of the Notion database
+            **kwargs: Extra query parameters (filter, sorts)
             
-        except Exception as e:
-            print(f"Error processing article {page.get('id')}: {str(e)}")
+        Yields:
+            Notion page objects
+        """
+        # Only the first page is known in advance; the rest follow cursors
+        self.planner.expect('databases.query', database_id=database_id, **kwargs)
+        response = self.planner.databases.query(database_id=database_id, **kwargs)
+        yield from response.get('results', [])
+
+        while response.get('has_more'):
+            response = self.planner.databases.query(
+                database_id=database_id,
+                start_cursor=response.get('next_cursor'),
+                **kwargs
+            )
+            yield from response.get('results', [])
+
+    def _article_title(self, page: Dict) -> Optional[str]:
+        """Title of a database row, or None if it has none."""
+        title_prop = page['properties'].get('Title', {}).get('title', [{}])
+        if not title_prop:
+            return None
+        return title_prop[0].get('plain_text', 'Untitled')
+
+    def _process_article(self, page: Dict, blocks: Optional[List[Dict]] = None) -> Optional[Article]:
+        """
+        Process a single Notion page into an article.
+        
+        Returns None for rows without a title; fetch and processing errors
+        propagate to the caller.
+        
+        Args:
+            page: Database row
+            blocks: The row's content blocks if already fetched
+        """
+        # Extract basic metadata
+        properties = page['properties']
+        
+        # Get title (required)
+        title = self._article_title(page)
+        if title is None:
             return None
+        
+        # Get date (optional); undated posts, including a Date property
+        # that was cleared, use their creation date so rebuilding the same
+        # content yields the same output
+        date = (properties.get('Date', {}).get('date') or {}).get('start')
+        if not date:
+            date = (page.get('created_time') or self.build_time.isoformat())[:10]
+        
+        # Get description (optional)
+        desc_prop = properties.get('Description', {}).get('rich_text', [{}])
+        description = desc_prop[0].get('plain_text', '') if desc_prop else ''
+        
+        # Get tags (optional)
+        tags = [tag['name'] for tag in properties.get('Tags', {}).get('multi_select', [])]
+        
+        # Generate URL-friendly slug
+        slug = self._generate_slug(title)
+        
+        # Fetch and process content blocks
+        if blocks is None:
+            blocks = self._get_page_blocks(page)
+        content_html = self.processor.process_blocks(blocks)
 
-    def _get_page_blocks(self, page_id: str) -> List[Dict]:
+        # Edits to the content page only change its blocks' edit times, not
+        # the database row's, so the newest of all of them is the article's
+        updated = max(
+            [page.get('last_edited_time') or ''] + [block.get('last_edited_time') or '' for block in blocks]
+        )
+        
+        return Article(
+            id=page['id'],
+            title=title,
+            date=date,
+            description=description,
+            tags=tags,
+            slug=slug,
+            content_html=content_html,
+            updated=updated
+        )
+
+    @staticmethod
+    def _content_id(page: Dict) -> Optional[str]:
+        """ID of the content page linked from a row's Content property."""
+        content_prop = page.get('properties', {}).get('Content', {}).get('rich_text', [])
+        if not content_prop:
+            return None
+        content_url = content_prop[0].get('text', {}).get('content', '')
+        return content_url.split('-')[-1].split('?')[0] or None
+
+    def _row_summary(self, row: Dict) -> Tuple[Optional[str], bool]:
+        """
+        What incremental builds keep of a row: its content page ID and
+        whether it has a title (rows without one are not articles).
+        """
+        return self._content_id(row), bool(self._article_title(row))
+
+    def _get_page_blocks(self, page: Dict) -> List[Dict]:
         """
         Fetch all blocks for a Notion page.
         
+        The content page is read from the row's Content property, which the
+        database query already returned.
+        
         Args:
-            page_id: ID of the Notion page
+            page: Database row
             
         Returns:
-            List of Notion blocks
+            List of Notion blocks (empty if the page links no content)
         """
         blocks = []
+        content_id = self._content_id(page)
+        if not content_id:
+            return blocks
         
-        try:
-            # Get the content URL from the page properties
-            content_prop = self.notion.pages.retrieve(page_id=page_id).get('properties', {}).get('Content', {}).get('rich_text', [])
-            if not content_prop:
-                return blocks
-                
-            # Extract the page ID from the content URL
-            content_url = content_prop[0].get('text', {}).get('content', '')
-            content_id = content_url.split('-')[-1].split('?')[0]
-            
-            print(f"Fetching content from page: {content_id}")
-            
-            # Fetch blocks from the actual content page
-            response = self.notion.blocks.children.list(block_id=content_id)
+        print(f"Fetching content from page: {content_id}")
+        
+        # Fetch blocks from the actual content page
+        response = self.planner.blocks.children.list(block_id=content_id)
+        blocks.extend(response.get('results', []))
+        
+        # Handle pagination
+        while response.get('has_more'):
+            response = self.planner.blocks.children.list(
+                block_id=content_id,
+                start_cursor=response.get('next_cursor')
+            )
             blocks.extend(response.get('results', []))
             
-            # Handle pagination
-            while response.get('has_more'):
-                response = self.notion.blocks.children.list(
-                    block_id=content_id,
-                    start_cursor=response.get('next_cursor')
-                )
-                blocks.extend(response.get('results', []))
-                
-        except Exception as e:
-            print(f"Error getting blocks: {str(e)}")
-            
         return blocks
 
     def _generate_slug(self, title: str) -> str:
@@ -266,78 +791,263 @@ class SiteGenerator:
         # Ensure URL-safe encoding
         return quote(slug)
 
-    def _generate_article_page(self, article: Dict):
+    def _generate_article_page(self, article: Article, related: Optional[List[Dict]] = None):
         """
-        Generate HTML page for a single article.
+        Publish the page of a single article with its related content.
+        
+        The page itself comes from the cache, where _render_article (or
+        this method, for articles the pipeline did not process) spilled it.
         
         Args:
-            article: Processed article dictionary
+            article: Processed article
+            related: Related posts, gigs and media items, most similar first
+        """
+        rel_path = f"posts/{article.slug}/index.html"
+        body = self.page_cache.recorded(f"spill:{article.id}") or self._spill_article_page(
+            article, self.article_cache.fingerprints.get(article.id))
+        signature = self.page_cache.signature(body, related)
+        if self.page_cache.is_fresh(f"/posts/{article.slug}/", signature, self.output_dir / rel_path):
+            self.output.keep(rel_path)
+            return
+
+        page = self._spill_path(article.id).read_text(encoding='utf-8')
+        head, marker, tail = page.rpartition(RELATED_MARKER)
+        if marker:
+            page = head + self.render_template('_related.html', {
+                **self._site_context(),
+                'related': related or []
+            }) + tail
+        self._write_file(rel_path, page)
+
+    def _spill_article_page(self, article: Article, fingerprint: Optional[str]) -> str:
         """
-        template = self.jinja_env.get_template('post.html')
-        output = self.render_template('post.html', {
+        Render an article's page, without its related content, into the cache.
+        
+        The page is only rendered again when its signature (templates, site
+        settings, the article, its thumbnails and link cards) changes.
+        
+        Args:
+            article: Processed article, with or without its body
+            fingerprint: The article's fingerprint in the article cache
+        
+        Returns:
+            Signature of the spilled page
+        """
+        signature = self.page_cache.signature(
+            self._template_version, self._site_context(), fingerprint,
+            self.thumbnails.signature(article.id), self.link_previews.signature(article.id)
+        )
+        path = self._spill_path(article.id)
+        if self.page_cache.is_fresh(f"spill:{article.id}", signature, path):
+            return signature
+
+        page = self.render_template('post.html', {
+            **self._site_context(),
+            'article': self._with_body(article),
+            'related_html': RELATED_MARKER
+        })
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'.{path.name}.tmp')
+        tmp_path.write_text(page, encoding='utf-8')
+        os.replace(tmp_path, path)
+        return signature
+
+    def _spill_path(self, article_id: str) -> Path:
+        """Cache file holding an article's rendered page."""
+        return self.cache_dir / 'post-pages' / f'{article_id}.html'
+
+    def render_template(self, template_name: str, context: Dict) -> str:
+        """Render a template with the given context."""
+        # Reuse the shared environment so compiled templates and custom
+        # filters are available to every page. Live data such as the current
+        # Spotify track is fetched client-side, so output depends only on content
+        template = self.jinja_env.get_template(template_name)
+        return template.render(**context)
+
+    def _site_context(self) -> Dict:
+        """Template context shared by every page."""
+        return {
             'site_title': self.site_config['title'],
             'site_description': self.site_config['description'],
             'site_author': self.site_config['author'],
             'site_base_url': self.site_config['base_url'],
-            'article': article,
-            'current_year': datetime.now().year
-        })
+            'now_playing_api_url': self.site_config['now_playing_api_url'],
+            'current_year': self.build_time.year
+        }
+
+    def _write_file(self, rel_path: str, content: str):
+        """
+        Write a file below the output directory.
         
-        # Create article directory and write HTML
-        article_dir = self.output_dir / 'posts' / article['slug']
-        article_dir.mkdir(parents=True, exist_ok=True)
+        The file is replaced atomically, and left untouched when its
+        content is unchanged.
         
-        with open(article_dir / 'index.html', 'w', encoding='utf-8') as f:
-            f.write(output)
+        Args:
+            rel_path: Path relative to the output directory
+            content: File contents
+        """
+        self.output.write(rel_path, content)
 
-    def render_template(self, template_name: str, context: Dict) -> str:
-        """Render a template with the given context."""
-        env = Environment(loader=FileSystemLoader(self.template_dir))
-        template = env.get_template(template_name)
+    def _write_page(self, url_path: str, html: str):
+        """
+        Write a rendered page to the index.html matching its URL path.
         
-        # Add Spotify data to context only if credentials are available
-        try:
-            spotify_context = context.copy()
-            current_track = get_current_track()
-            if current_track:
-                spotify_context['current_track'] = current_track
-            return template.render(**spotify_context)
-        except Exception as e:
-            print(f"Error adding Spotify data: {e}")
-            return template.render(**context)
+        Args:
+            url_path: Site-relative URL path (e.g. "/gigs/page/2/")
+            html: Rendered page
+        """
+        self._write_file(self._page_file(url_path), html)
 
-    def _generate_index_page(self, articles: List[Dict] = None):
+    @staticmethod
+    def _page_file(url_path: str) -> str:
+        """Output file, relative to the output directory, serving a URL path."""
+        # Slugs are percent-encoded in URLs but served from decoded paths
+        rel_dir = unquote(url_path.strip('/'))
+        return f"{rel_dir}/index.html" if rel_dir else 'index.html'
+
+    def _generate_index_page(self, article_index: ArticleIndex):
         """
-        Generate site index page with article previews.
+        Generate the paginated site index with article previews.
         
         Args:
-            articles: List of processed articles
+            article_index: Sorted index of all processed articles
         """
-        if articles is None:
-            articles = self._get_articles()
+        self._generate_listing_pages('index.html', '/', article_index.articles)
 
-        # Sort articles by date (newest first)
-        articles.sort(key=lambda x: x['date'], reverse=True)
+    def _generate_feeds(self, article_index: ArticleIndex):
+        """
+        Generate the Atom feed, only when the article set changed.
+        
+        Args:
+            article_index: Sorted index of all processed articles
+        """
+        articles = article_index.articles
+        site_url = self.site.site_url
+        signature = self.page_cache.signature(
+            site_url, self.site_config['title'], self.site_config['author'],
+            [(a.id, self.article_cache.fingerprints.get(a.id)) for a in articles[:FEED_SIZE]]
+        )
+        if self.page_cache.is_fresh('/feed.xml', signature, self.output_dir / 'feed.xml'):
+            self.output.keep('feed.xml')
+            return
 
-        # Generate the page
-        template = self.jinja_env.get_template('index.html')
-        output = self.render_template('index.html', {
-            'site_title': self.site_config['title'],
-            'site_description': self.site_config['description'],
-            'site_author': self.site_config['author'],
-            'site_base_url': self.site_config['base_url'],
-            'articles': articles
-        })
+        feed_articles = [self._with_body(a) for a in articles[:FEED_SIZE]]
+        self.output.write_stream('feed.xml', atom_feed(feed_articles, site_url, self.site_config['title'],
+                                                       self.site_config['author']))
+        print(f"Generated feed with {len(feed_articles)} posts")
 
-        # Write the file
-        with open(self.output_dir / 'index.html', 'w', encoding='utf-8') as f:
-            f.write(output)
+    def _generate_sitemap(self, article_index: ArticleIndex):
+        """
+        Generate the sitemap from every HTML page this build published.
+        
+        Runs after all page stages, so the output manifest lists exactly
+        the pages of the site; it is rewritten only when they changed.
+        
+        Args:
+            article_index: Sorted index of all processed articles, for lastmod
+        """
+        site_url = self.site.site_url
+        urls = self._sitemap_urls(article_index)
+        files = list(sitemap_files(urls, site_url))
+        signature = self.page_cache.signature(site_url, urls)
+        if (self.page_cache.is_fresh('/sitemap.xml', signature, self.output_dir / 'sitemap.xml')
+                and all((self.output_dir / path).exists() for path, _ in files)):
+            for path, _ in files:
+                self.output.keep(path)
+            return
+
+        for path, chunks in files:
+            self.output.write_stream(path, chunks)
+        print(f"Generated sitemap with {len(urls)} URLs")
+
+    def _sitemap_urls(self, article_index: ArticleIndex) -> List[tuple]:
+        """
+        Absolute URLs for the sitemap with their last modification times.
+        
+        Every HTML file in the output manifest is listed. Posts carry their
+        Notion edit time; listing pages (including their later pages) are
+        as fresh as the newest article they show; other pages have none.
+        
+        Args:
+            article_index: Sorted index of all processed articles
+            
+        Returns:
+            List of (url, lastmod or None) pairs, ordered by path
+        """
+        def newest(articles):
+            return max((article_updated(a) for a in articles), default=None)
+
+        latest = newest(article_index.articles)
+        lastmod = {'/': latest, '/archive/': latest, '/tags/': latest}
+        for group in article_index.tags():
+            lastmod[f"/tags/{group.slug}/"] = newest(group.articles)
+        for article in article_index.articles:
+            lastmod[f"/posts/{article.slug}/"] = article_updated(article)
+
+        site_url = self.site.site_url
+        urls = []
+        for rel_path in sorted(self.output.current):
+            if not rel_path.endswith('.html'):
+                continue
+            if rel_path == 'index.html' or rel_path.endswith('/index.html'):
+                url_path = '/' + rel_path[:-len('index.html')]
+            else:
+                url_path = '/' + rel_path
+            listing = PAGINATED_PATH_RE.match(url_path)
+            modified = lastmod.get(listing.group(1) if listing else url_path)
+            urls.append((f"{site_url}{quote(url_path)}", modified))
+        return urls
+
+    def _generate_listing_pages(self, template_name: str, base_path: str,
+                                articles: List[Article], extra_context: Optional[Dict] = None) -> int:
+        """
+        Render a paginated article listing, skipping pages that are unchanged.
+        
+        Pages are numbered from the oldest post, so their URLs and contents
+        stay put as posts are added. A page is re-rendered only when its
+        signature (templates, site settings, the articles on the page and
+        its pagination) differs from the previous build, so a new post
+        rewrites just the first page or two.
+        
+        Args:
+            template_name: Template used for every page of the listing
+            base_path: URL path of the first page
+            articles: Articles in display order
+            extra_context: Additional template context shared by all pages
+            
+        Returns:
+            Number of pages rendered
+        """
+        extra_context = extra_context or {}
+        rendered = 0
+
+        for url_path, page_articles, pagination in paginate_from_oldest(articles, POSTS_PER_PAGE, base_path):
+            signature = self.page_cache.signature(
+                self._template_version, template_name, self._site_context(), extra_context, pagination,
+                [(a.id, self.article_cache.fingerprints.get(a.id)) for a in page_articles]
+            )
+            page_file = self._page_file(url_path)
+            if self.page_cache.is_fresh(url_path, signature, self.output_dir / page_file):
+                self.output.keep(page_file)
+                continue
+
+            self._write_page(url_path, self.render_template(template_name, {
+                **self._site_context(),
+                **extra_context,
+                'articles': page_articles,
+                'pagination': pagination
+            }))
+            rendered += 1
+
+        return rendered
 
     def _generate_gigs_page(self):
-        """Generate the gigs page from Notion database.
+        """Generate the gigs pages from Notion database.
         
-        This function fetches gig data from a Notion database and generates both a list view
-        and a calendar view of all gigs. The Notion database should have the following properties:
+        This function fetches gig data from a Notion database, builds an in-memory
+        gig index and generates the paginated gigs listing plus dedicated pages
+        for every year, artist and venue. Rows are read with GIG_SCHEMA; the
+        Notion database should have the following properties:
         
         Required Properties:
         - Gig (Title): A unique identifier for each gig
@@ -350,166 +1060,174 @@ class SiteGenerator:
         - Notes (Rich Text): Any additional notes about the gig
         - Setlist (URL): Link to the setlist (e.g., from setlist.fm)
         """
+        if self.gig_index is None:
+            return
+
+        pages_written = self._generate_gig_index_pages(self.gig_index)
+        print(f"Generated {pages_written} gigs pages with {len(self.gig_index.gigs)} gigs")
+
+    def _ingest(self, schema: Schema, since: Optional[str] = None) -> Optional[List[Dict]]:
+        """
+        Query a Notion database and convert its rows into records.
+        
+        Args:
+            schema: Schema describing the database and its properties
+            since: Notion timestamp of the previous sync; the records of the
+                last build are reused unless a row was edited since then
+            
+        Returns:
+            List of records, or None if the database ID is not configured
+        """
         # Reload environment variables to ensure we have the latest values
         load_dotenv(override=True)
+
+        database_id = self.site.database_id(schema.env_var)
+        if not database_id:
+            print(f"Warning: {schema.env_var} not set, skipping {schema.name} pages")
+            return None
+
+        if since is not None and self._records.get(schema.name) is not None:
+            # Records depend on their neighbours (sort order, defaults), so
+            # any edit re-ingests the whole database
+            edited = self.planner.databases.query(
+                database_id=database_id, page_size=1,
+                filter={'timestamp': 'last_edited_time', 'last_edited_time': {'on_or_after': since}}
+            )
+            if not edited.get('results'):
+                return self._records[schema.name]
+
+        print(f"Fetching {schema.name} records from database: {database_id}")
+        records = schema.ingest(self._query_database(database_id, sorts=schema.sorts))
+        print(f"Successfully processed {len(records)} {schema.name} records")
+        self._records[schema.name] = records
+        self._reingested.add(schema.name)
+        return records
+
+    def _generate_gig_index_pages(self, gig_index: GigIndex) -> int:
+        """
+        Write the gigs listing, per-year/artist/venue pages and calendar data.
         
-        # Fetch gigs from Notion
-        gigs_db_id = os.getenv('NOTION_GIGS_DATABASE_ID')
-        if not gigs_db_id:
-            print("Warning: NOTION_GIGS_DATABASE_ID not set, skipping gigs page generation")
+        Args:
+            gig_index: Index built from all processed gigs
+            
+        Returns:
+            Number of HTML pages written
+        """
+        pages_written = 0
+        stats = gig_index.overall.stats
+
+        # Main listing: overall stats plus the newest gigs, paginated
+        for url_path, page_gigs, pagination in paginate(gig_index.gigs, GIGS_PER_PAGE, '/gigs/'):
+            self._write_page(url_path, self.render_template('gigs.html', {
+                **self._site_context(),
+                'gigs': page_gigs,
+                'stats': stats,
+                'years': gig_index.years(),
+                'top_artists': gig_index.artists()[:10],
+                'top_venues': gig_index.venues()[:10],
+                'pagination': pagination
+            }))
+            pages_written += 1
+
+        # Calendar events are fetched by the calendar view instead of being
+        # inlined into every listing page
+        self._write_file('gigs/events.json', json.dumps(gig_index.calendar_events, sort_keys=True))
+
+        sections = [
+            ('year', 'years', gig_index.years()),
+            ('artist', 'artists', gig_index.artists()),
+            ('venue', 'venues', gig_index.venues()),
+        ]
+        for kind, section, groups in sections:
+            if kind != 'year':
+                self._write_page(f'/gigs/{section}/', self.render_template('gig_directory.html', {
+                    **self._site_context(),
+                    'kind': kind,
+                    'section': section,
+                    'groups': groups
+                }))
+                pages_written += 1
+
+            for group in groups:
+                base_path = f'/gigs/{section}/{group.slug}/'
+                for url_path, page_gigs, pagination in paginate(group.gigs, GIGS_PER_PAGE, base_path):
+                    self._write_page(url_path, self.render_template('gig_list.html', {
+                        **self._site_context(),
+                        'kind': kind,
+                        'section': section,
+                        'group': group,
+                        'stats': group.stats,
+                        'gigs': page_gigs,
+                        'pagination': pagination
+                    }))
+                    pages_written += 1
+
+        return pages_written
+
+    def _generate_media_pages(self):
+        """
+        Generate the media archive from the Notion media database.
+        
+        Writes the paginated /media/ listing, one paginated listing per
+        type (/media/type/<slug>/) and per tag (/media/tags/<slug>/), and
+        media/index.json used by the archive's client-side filters.
+        """
+        media_index = self.media_index
+        if media_index is None:
             return
 
-        try:
-            print(f"Generating gigs page from database: {gigs_db_id}")
-            # Query the gigs database, sorting by date in descending order
-            response = self.notion.databases.query(
-                database_id=gigs_db_id,
-                sorts=[{
-                    "property": "Date",
-                    "direction": "descending"
-                }]
-            )
+        types, tags = media_index.types(), media_index.tags()
+        listings = [('/media/', None, media_index.items)]
+        listings += [(f'/media/type/{g.slug}/', ('type', g), g.items) for g in types]
+        listings += [(f'/media/tags/{g.slug}/', ('tag', g), g.items) for g in tags]
 
-            # Initialize data structures for processing gigs
-            gigs = []  # List to store all processed gigs
-            venues = set()  # Set of unique venues
-            artists = set()  # Set of unique artists
-            locations = set()  # Set of unique locations
-            calendar_events = []  # List for calendar view events
-            gig_counter = 1  # Counter for generating fallback IDs
-
-            # Process each gig from the database
-            for page in response['results']:
-                try:
-                    # Get or generate a unique ID for the gig
-                    gig_id = str(gig_counter)
-                    if (page['properties']['Gig']['title'] and 
-                        len(page['properties']['Gig']['title']) > 0):
-                        gig_id = page['properties']['Gig']['title'][0]['text']['content']
-                    gig_counter += 1
-
-                    # Extract gig information
-                    gig = {'id': gig_id}
-                    
-                    # Get required Date property
-                    if page['properties']['Date'].get('date'):
-                        gig['date'] = page['properties']['Date']['date']['start']
-                        gig['year'] = gig['date'][:4]  # Extract year for grouping
-                    else:
-                        print(f"Skipping gig {gig_id}: Missing date")
-                        continue
-
-                    # Get required Artist property
-                    artist_prop = page['properties']['Artist']
-                    if artist_prop.get('rich_text') and artist_prop['rich_text']:
-                        gig['artist'] = artist_prop['rich_text'][0]['text']['content']
-                    else:
-                        print(f"Skipping gig {gig_id}: Missing artist")
-                        continue
-
-                    # Get required Venue property
-                    venue_prop = page['properties']['Venue']
-                    if venue_prop.get('rich_text') and venue_prop['rich_text']:
-                        gig['venue'] = venue_prop['rich_text'][0]['text']['content']
-                    else:
-                        print(f"Skipping gig {gig_id}: Missing venue")
-                        continue
-
-                    # Get optional location property (defaults to venue)
-                    location_prop = page['properties'].get('location', {})
-                    if location_prop.get('rich_text') and location_prop['rich_text']:
-                        gig['location'] = location_prop['rich_text'][0]['text']['content']
-                    else:
-                        gig['location'] = gig['venue']  # Use venue as location if not specified
-
-                    # Get optional Notes property
-                    notes_prop = page['properties'].get('Notes', {})
-                    if notes_prop.get('rich_text') and notes_prop['rich_text']:
-                        gig['notes'] = notes_prop['rich_text'][0]['text']['content']
-
-                    # Get optional Setlist property
-                    setlist_prop = page['properties'].get('Setlist', {})
-                    if setlist_prop.get('url'):
-                        gig['setlist_url'] = setlist_prop['url']
-
-                    # Add gig to our collections
-                    gigs.append(gig)
-                    venues.add(gig['venue'])
-                    artists.add(gig['artist'])
-                    locations.add(gig['location'])
-
-                    # Create calendar event for this gig
-                    calendar_events.append({
-                        'id': gig['id'],
-                        'title': f"{gig['artist']} @ {gig['venue']}",
-                        'start': gig['date'],
-                        'url': gig.get('setlist_url', ''),
-                        'location': gig['location']
-                    })
+        pages_written = 0
+        for base_path, current, group_items in listings:
+            for url_path, page_items, pagination in paginate(group_items, MEDIA_PER_PAGE, base_path):
+                self._write_page(url_path, self.render_template('media.html', {
+                    **self._site_context(),
+                    'items': page_items,
+                    'total': len(group_items),
+                    'filter_kind': current[0] if current else None,
+                    'filter': current[1] if current else None,
+                    'types': types,
+                    'tags': tags,
+                    'pagination': pagination
+                }))
+                pages_written += 1
 
-                except Exception as e:
-                    print(f"Error processing gig {gig_counter}: {str(e)}")
-                    continue
+        self._write_file('media/index.json', json.dumps(media_index.to_json(), sort_keys=True))
+        print(f"Generated {pages_written} media pages with {len(media_index.items)} items")
 
-            print(f"\nSuccessfully processed {len(gigs)} gigs")
-            
-            # Sort gigs by date (newest first)
-            gigs.sort(key=lambda x: x['date'], reverse=True)
+    def _generate_listening_page(self):
+        """Generate listening statistics from the local listening log."""
+        if not self.site.listening_db.exists():
+            print("No listening log found, skipping listening page")
+            return
 
-            # Group gigs by year for the list view
-            gigs_by_year = {}
-            for gig in gigs:
-                year = gig['year']
-                if year not in gigs_by_year:
-                    gigs_by_year[year] = []
-                gigs_by_year[year].append(gig)
+        history = ListeningHistory(self.site.listening_db)
+        try:
+            groups = {group.name: group for group in self.gig_index.artists()} if self.gig_index else {}
+            stats = history.stats({name: len(group.gigs) for name, group in groups.items()})
+        finally:
+            history.close()
 
-            # Generate the page using our template
-            template = self.jinja_env.get_template('gigs.html')
-            output = self.render_template('gigs.html', {
-                'site_title': self.site_config['title'],
-                'site_description': self.site_config['description'],
-                'site_author': self.site_config['author'],
-                'site_base_url': self.site_config['base_url'],
-                'gigs': gigs,  # All gigs for processing in template
-                'gigs_by_year': gigs_by_year,  # Gigs grouped by year
-                'years': sorted(gigs_by_year.keys(), reverse=True),  # Years for iteration
-                'venues': sorted(list(venues)),  # Unique venues
-                'artists': sorted(list(artists)),  # Unique artists
-                'locations': sorted(list(locations)),  # Unique locations
-                'calendar_events': calendar_events,  # Events for calendar view
-                'total_gigs': len(gigs)  # Total number of gigs
-            })
-
-            # Write the generated HTML to file
-            gigs_dir = self.output_dir / 'gigs'
-            gigs_dir.mkdir(exist_ok=True)
-            with open(gigs_dir / 'index.html', 'w', encoding='utf-8') as f:
-                f.write(output)
-
-            print(f"Generated gigs page with {len(gigs)} gigs")
+        for row in stats['gig_overlap']:
+            row['slug'] = groups[row['artist']].slug
 
-        except Exception as e:
-            print(f"Error generating gigs page: {e}")
-            raise  # Re-raise to see full traceback
+        self._write_page('/listening/', self.render_template('listening.html', {
+            **self._site_context(),
+            'stats': stats
+        }))
+        print(f"Generated listening page from {stats['total_plays']} plays")
 
     def _generate_about_page(self):
         """Generate the about page."""
         try:
             # Generate the page using our template
-            template = self.jinja_env.get_template('about.html')
-            output = self.render_template('about.html', {
-                'site_title': self.site_config['title'],
-                'site_description': self.site_config['description'],
-                'site_author': self.site_config['author'],
-                'site_base_url': self.site_config['base_url']
-            })
-
-            # Write the file
-            about_dir = self.output_dir / 'about'
-            about_dir.mkdir(exist_ok=True)
-            with open(about_dir / 'index.html', 'w', encoding='utf-8') as f:
-                f.write(output)
+            output = self.render_template('about.html', self._site_context())
+
+            self._write_page('/about/', output)
 
             print("Generated about page")
 
@@ -517,50 +1235,136 @@ class SiteGenerator:
             print(f"Error generating about page: {e}")
             raise
 
-    def _generate_archive_page(self, articles: List[Dict] = None):
-        """Generate archive page with all articles."""
-        if articles is None:
-            articles = self._get_articles()
+    def _generate_archive_page(self, article_index: ArticleIndex):
+        """
+        Generate the paginated archive and per-tag listing pages.
         
-        # Sort articles by date (newest first)
-        articles.sort(key=lambda x: x['date'], reverse=True)
+        Args:
+            article_index: Sorted index of all processed articles
+        """
+        self._generate_listing_pages('archive.html', '/archive/', article_index.articles)
 
-        # Generate the page
-        template = self.jinja_env.get_template('archive.html')
-        output = self.render_template('archive.html', {
-            'site_title': self.site_config['title'],
-            'site_description': self.site_config['description'],
-            'site_author': self.site_config['author'],
-            'site_base_url': self.site_config['base_url'],
-            'articles': articles
-        })
+        tags = article_index.tags()
+        for tag in tags:
+            self._generate_listing_pages('archive.html', f'/tags/{tag.slug}/', tag.articles, {'tag': tag.name})
 
-        # Create archive directory and write the file
-        archive_dir = self.output_dir / 'archive'
-        archive_dir.mkdir(exist_ok=True)
-        with open(archive_dir / 'index.html', 'w', encoding='utf-8') as f:
-            f.write(output)
+        self._write_page('/tags/', self.render_template('tags.html', {
+            **self._site_context(),
+            'tags': tags
+        }))
 
-    def _copy_static_files(self):
-        """Copy static assets to output directory."""
-        static_src = Path('src/static')
-        static_dest = self.output_dir / 'static'
+    def outbound_links(self) -> Dict[str, List[str]]:
+        """
+        External links of the last build, for the link checker.
+
+        Returns:
+            URLs per site-relative page path: each post's links, and the
+            setlist URLs of each year's gigs under the year page
+        """
+        links = {}
+        for article_id in self.article_cache.fingerprints:
+            article = self._articles.get(article_id) or self.article_cache.get(article_id)
+            if article is not None:
+                links[f"/posts/{article.slug}/"] = extract_links(article.content_html)
+        if self.gig_index:
+            for group in self.gig_index.years():
+                links[f"/gigs/years/{group.slug}/"] = list(dict.fromkeys(
+                    gig['setlist_url'] for gig in group.gigs if gig.get('setlist_url')
+                ))
+        return {page: urls for page, urls in links.items() if urls}
 
-        # Create the static directory in output if it doesn't exist
-        static_dest.mkdir(exist_ok=True)
+    def _post_documents(self, articles: List[Article]) -> Iterator[Dict]:
+        """
+        Search and related-content documents for posts.
+        
+        Documents are generated one at a time, so the indexes never hold
+        all of them.
+        
+        Args:
+            articles: List of processed articles
+            
+        Yields:
+            One document per post, fingerprinted by the article cache
+        """
+        return ({
+            'key': f"post:{article.id}",
+            'fingerprint': self.article_cache.fingerprints[article.id],
+            'url': f"/posts/{article.slug}/",
+            'title': article.title,
+            'date': article.date,
+            'type': 'post',
+            'tags': article.tags,
+            'description': article.description,
+            # Spilled bodies are only read back for posts that changed
+            'body': article.content_html if article.content_html is not None
+                    else partial(self._article_body, article.id)
+        } for article in articles)
+
+    def _gig_documents(self) -> List[Dict]:
+        """Documents for gig artist and venue pages, described by their top venues/artists."""
+        documents = []
+        if self.gig_index:
+            for kind, section, groups in (('artist', 'artists', self.gig_index.artists()),
+                                          ('venue', 'venues', self.gig_index.venues())):
+                for group in groups:
+                    related = group.stats['top_venues'] if kind == 'artist' else group.stats['top_artists']
+                    related_names = [item['name'] for item in related]
+                    documents.append({
+                        'key': f"{kind}:{group.slug}",
+                        'fingerprint': f"{group.name}|{group.stats['count']}|{group.stats['last_seen']}|{related_names}",
+                        'url': f"/gigs/{section}/{group.slug}/",
+                        'title': group.name,
+                        'date': group.stats['last_seen'],
+                        'type': kind,
+                        'body': related_names
+                    })
+        return documents
+
+    def _media_documents(self) -> List[Dict]:
+        """Documents for media archive items, linking to the item itself."""
+        documents = []
+        if self.media_index:
+            for item in self.media_index.items:
+                text = [item['title'], item['type'], item.get('description') or '',
+                        item.get('why_important') or '', item.get('url') or '', item.get('date_added') or '']
+                documents.append({
+                    'key': f"media:{item['slug']}",
+                    'fingerprint': hashlib.sha1(json.dumps([text, item['tags']]).encode('utf-8')).hexdigest(),
+                    'url': item.get('url') or f"/media/type/{item['type_slug']}/",
+                    'title': item['title'],
+                    'date': item.get('date_added'),
+                    'type': item['type'].lower(),
+                    'tags': item['tags'],
+                    'description': item.get('description'),
+                    'body': item.get('why_important')
+                })
+        return documents
+
+    def _generate_search_index(self, documents: Iterable[Dict]):
+        """
+        Update the sharded search index and render the search page.
+        
+        Posts are re-tokenized only when their article cache fingerprint
+        changed; gig artists and venues are indexed as their listing pages.
+        
+        Args:
+            documents: Post and gig documents from _post_documents and
+                _gig_documents
+        """
+        self.search_index.build(documents, self.output)
+
+        self._write_page('/search/', self.render_template('search.html', self._site_context()))
+
+    def _copy_static_files(self):
+        """Copy static assets to output directory (only files that changed)."""
+        static_src = Path(__file__).resolve().parent.parent / 'static'
 
         # Copy all files from src/static to output/static
         if static_src.exists():
-            for item in static_src.glob('**/*'):
+            for item in sorted(static_src.glob('**/*')):
                 if item.is_file():
-                    # Get the relative path from src/static
-                    rel_path = item.relative_to(static_src)
-                    # Create the destination path
-                    dest_path = static_dest / rel_path
-                    # Create parent directories if they don't exist
-                    dest_path.parent.mkdir(parents=True, exist_ok=True)
-                    # Copy the file
-                    shutil.copy2(item, dest_path)
+                    rel_path = item.relative_to(static_src).as_posix()
+                    self.output.copy(item, f"static/{rel_path}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,251 @@
+"""
+Site configurations and multi-site builds.
+
+A ``SiteConfig`` holds everything that differs between sites: the Notion
+databases, the public URL, the templates and the output and cache
+directories. ``SiteConfig.from_env`` describes the default site from the
+environment and ``src/config.py``; a sites file describes several:
+
+    {
+      "sites": [
+        {
+          "name": "jimiland",
+          "site_url": "https://cajunjimi.github.io/JimiLand",
+          "base_url": "/JimiLand",
+          "databases": {"posts": "$NOTION_DATABASE_ID", "gigs": "$NOTION_GIGS_DATABASE_ID"}
+        },
+        {
+          "name": "tour-diary",
+          "title": "Tour Diary",
+          "site_url": "https://example.org",
+          "template_dir": "sites/tour-diary/templates",
+          "databases": {"posts": "$TOUR_DIARY_DATABASE_ID"}
+        }
+      ]
+    }
+
+Database IDs starting with ``$`` are read from that environment variable
+when the build needs them, so IDs can stay in secrets. Relative paths are
+resolved against the sites file's directory; outputs default to
+``output/<name>`` and caches to ``.build-cache/<name>``.
+
+``build_sites`` builds the sites one after another in one process, sharing
+the Notion client (and its HTTP connection pool and rate limit), the
+responses fetched during the run, the rendered-block cache and compiled
+templates.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from jinja2 import BytecodeCache
+
+from ..config import (CACHE_DIR, LISTENING_DB, OUTPUT_DIR, SITE_AUTHOR, SITE_DESCRIPTION,
+                      SITE_TITLE, SITE_URL, TEMPLATE_DIR, VIDEO_FACADES)
+from ..notion.planner import ResponseCache
+from ..notion.processor import NotionProcessor
+
+# Database keys of a sites file and the environment variables the default
+# site reads them from
+DATABASE_ENV = {
+    'posts': 'NOTION_DATABASE_ID',
+    'gigs': 'NOTION_GIGS_DATABASE_ID',
+    'media': 'NOTION_MEDIA_DATABASE_ID',
+}
+
+
+class SiteConfig:
+    """
+    Settings of one site.
+
+    Args:
+        name: Short identifier, used for default output and cache paths
+        title: Site title
+        description: Site description
+        author: Author shown in the footer and the feed
+        site_url: Absolute URL of the site root, without a trailing slash
+        base_url: Path prefix of internal links ('' when served at the root)
+        databases: Database ID per environment variable name in
+            DATABASE_ENV; values starting with ``$`` name an environment
+            variable to read the ID from
+        template_dir: Jinja2 templates
+        output_dir: Where the site is written
+        cache_dir: Build caches of this site
+        listening_db: Spotify listening history for the listening page
+        now_playing_api_url: Origin of the now-playing API server
+    """
+
+    def __init__(self, name: str, title: str = SITE_TITLE, description: str = SITE_DESCRIPTION,
+                 author: str = SITE_AUTHOR, site_url: str = SITE_URL, base_url: str = '',
+                 databases: Optional[Dict[str, str]] = None, template_dir: Path = TEMPLATE_DIR,
+                 output_dir: Optional[Path] = None, cache_dir: Optional[Path] = None,
+                 listening_db: Path = LISTENING_DB, now_playing_api_url: str = ''):
+        self.name = name
+        self.title = title
+        self.description = description
+        self.author = author
+        self.site_url = site_url.rstrip('/')
+        self.base_url = base_url
+        self.databases = databases or {}
+        self.template_dir = Path(template_dir)
+        self.output_dir = Path(output_dir) if output_dir else OUTPUT_DIR / name
+        self.cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR / name
+        self.listening_db = Path(listening_db)
+        self.now_playing_api_url = now_playing_api_url
+
+    @classmethod
+    def from_env(cls, output_dir: Path = OUTPUT_DIR, template_dir: Path = TEMPLATE_DIR,
+                 cache_dir: Path = CACHE_DIR) -> 'SiteConfig':
+        """The single site configured by environment variables."""
+        return cls(
+            'default',
+            base_url=os.getenv('SITE_BASE_URL', ''),
+            databases={env_var: f'${env_var}' for env_var in DATABASE_ENV.values()},
+            template_dir=template_dir,
+            output_dir=output_dir,
+            cache_dir=cache_dir,
+            now_playing_api_url=os.getenv('NOW_PLAYING_API_URL', ''),
+        )
+
+    def database_id(self, env_var: str) -> Optional[str]:
+        """
+        ID of one of the site's databases.
+
+        Args:
+            env_var: The database's environment variable name in DATABASE_ENV
+
+        Returns:
+            The ID, or None if the site has no such database
+        """
+        value = self.databases.get(env_var)
+        if value and value.startswith('$'):
+            value = os.getenv(value[1:])
+        return value or None
+
+    def require_database(self, env_var: str) -> str:
+        """
+        ID of a database the site cannot be built without.
+
+        Raises:
+            ValueError: If the ID is not configured
+        """
+        database_id = self.database_id(env_var)
+        if not database_id:
+            source = self.databases.get(env_var) or env_var
+            raise ValueError(f"Missing database ID {source} for site {self.name!r}. "
+                             f"Please ensure it is set in your .env file or sites file.")
+        return database_id
+
+    def template_context(self) -> Dict[str, str]:
+        """Site settings the generator builds its template context from."""
+        return {
+            'title': self.title,
+            'description': self.description,
+            'author': self.author,
+            'base_url': self.base_url,
+            'now_playing_api_url': self.now_playing_api_url,
+        }
+
+
+def load_sites(path: Path) -> List[SiteConfig]:
+    """
+    Read a sites file.
+
+    Args:
+        path: JSON file with a ``sites`` list (see the module docstring)
+
+    Returns:
+        One SiteConfig per site, in file order
+
+    Raises:
+        ValueError: If the file is malformed or names a site twice
+    """
+    path = Path(path)
+    root = path.resolve().parent
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    sites = []
+    for entry in data.get('sites', []):
+        entry = dict(entry)
+        name = entry.pop('name', None)
+        if not name:
+            raise ValueError(f"Every site in {path} needs a name")
+        databases = {}
+        for key, value in entry.pop('databases', {}).items():
+            if key not in DATABASE_ENV:
+                raise ValueError(f"Unknown database {key!r} for site {name!r}; "
+                                 f"expected one of {', '.join(DATABASE_ENV)}")
+            databases[DATABASE_ENV[key]] = value
+        for key in ('template_dir', 'output_dir', 'cache_dir', 'listening_db'):
+            if key in entry:
+                entry[key] = root / entry[key]
+        try:
+            sites.append(SiteConfig(name, databases=databases, **entry))
+        except TypeError as e:
+            raise ValueError(f"Invalid settings for site {name!r} in {path}: {e}") from e
+
+    names = [site.name for site in sites]
+    if not sites or len(set(names)) != len(names):
+        raise ValueError(f"{path} must list at least one site, each with a unique name")
+    return sites
+
+
+class _MemoryBytecodeCache(BytecodeCache):
+    """Compiled templates shared by the Jinja environments of several sites."""
+
+    def __init__(self):
+        self._bytecode: Dict[str, bytes] = {}
+
+    def load_bytecode(self, bucket):
+        data = self._bytecode.get(bucket.key)
+        if data is not None:
+            # The bucket discards bytecode compiled from a different source
+            bucket.bytecode_from_string(data)
+
+    def dump_bytecode(self, bucket):
+        self._bytecode[bucket.key] = bucket.bytecode_to_string()
+
+
+class SharedResources:
+    """
+    Process-wide state shared by the generators of a multi-site build.
+
+    Args:
+        notion: Notion client used by every site
+    """
+
+    def __init__(self, notion):
+        self.notion = notion
+        self.processor = NotionProcessor(video_facades=VIDEO_FACADES)
+        self.bytecode_cache = _MemoryBytecodeCache()
+        self.responses = ResponseCache()
+
+
+def build_sites(sites: List[SiteConfig], notion, out_of_core: bool = False) -> Dict[str, bool]:
+    """
+    Build several sites in one process.
+
+    Args:
+        sites: Sites to build, in order
+        notion: Notion client shared by all sites
+        out_of_core: Build every site in out-of-core mode
+
+    Returns:
+        Whether each site (by name) was regenerated
+    """
+    from .site_generator import SiteGenerator
+
+    resources = SharedResources(notion)
+    results = {}
+    for site in sites:
+        print(f"\n=== Building site {site.name} into {site.output_dir} ===")
+        generator = SiteGenerator(str(site.output_dir), str(site.template_dir),
+                                  cache_dir=str(site.cache_dir), out_of_core=out_of_core,
+                                  site=site, resources=resources)
+        results[site.name] = generator.generate_site()
+    print(f"\nBuilt {len(sites)} sites; {resources.processor.cache_hits} blocks rendered "
+          f"from the shared cache")
+    return results
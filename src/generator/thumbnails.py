@@ -0,0 +1,185 @@
+"""
+Locally mirrored video thumbnails.
+
+Video facades (see notion/youtube.py) show YouTube's thumbnail until they
+are clicked. This stage downloads each thumbnail once per video ID into
+the build cache, resizes it to the widths in THUMBNAIL_WIDTHS when Pillow
+is installed, publishes the files under ``thumbnails/youtube/`` and points
+the facades at them, so post pages make no third-party requests until a
+video is played.
+
+Downloads run concurrently with a timeout. A failed download is recorded
+and retried only after FAILURE_TTL, and facades whose thumbnail could not
+be mirrored keep YouTube's URL, so a build never fails or slows down
+because of a missing thumbnail.
+"""
+
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from ..notion.youtube import THUMBNAIL_URL
+
+# Published widths; without Pillow only the original 480px image is used
+THUMBNAIL_WIDTHS = (320, 480)
+ORIGINAL_WIDTH = 480
+
+# Seconds before a failed download is tried again
+FAILURE_TTL = 24 * 3600
+DOWNLOAD_WORKERS = 8
+DOWNLOAD_TIMEOUT = 10
+
+FACADE_THUMBNAIL_RE = re.compile(r'src="https://i\.ytimg\.com/vi/([A-Za-z0-9_-]{11})/hqdefault\.jpg"')
+
+
+def _download(url: str) -> bytes:
+    import httpx
+
+    response = httpx.get(url, timeout=DOWNLOAD_TIMEOUT, follow_redirects=True)
+    response.raise_for_status()
+    return response.content
+
+
+def _resize(data: bytes, width: int) -> Optional[bytes]:
+    """JPEG of the image scaled to a width, or None without Pillow."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    with Image.open(BytesIO(data)) as image:
+        height = round(image.height * width / image.width)
+        resized = image.convert('RGB').resize((width, height), Image.LANCZOS)
+        out = BytesIO()
+        resized.save(out, 'JPEG', quality=80, optimize=True, progressive=True)
+        return out.getvalue()
+
+
+class VideoThumbnails:
+    """
+    Thumbnail cache and publisher for the videos of a build.
+
+    Args:
+        cache_dir: Root cache directory; thumbnails live in ``thumbnails/``
+        fetch: Function downloading a URL's body (raises on failure);
+            defaults to an HTTP GET
+    """
+
+    def __init__(self, cache_dir: Path, fetch: Optional[Callable[[str], bytes]] = None):
+        self.dir = Path(cache_dir) / 'thumbnails'
+        self.state_path = self.dir / 'failures.json'
+        self.fetch = fetch or _download
+        self.videos: Dict[str, List[str]] = {}
+        self.failures: Dict[str, float] = {}
+
+        if self.state_path.exists():
+            try:
+                with open(self.state_path, encoding='utf-8') as f:
+                    self.failures = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable thumbnail cache: {e}")
+
+    def scan(self, article_id: str, content_html: Optional[str]):
+        """Record the video facades of an article's HTML."""
+        videos = sorted(set(FACADE_THUMBNAIL_RE.findall(content_html or '')))
+        # Most articles have none; only the ones that do are kept
+        if videos:
+            self.videos[article_id] = videos
+        else:
+            self.videos.pop(article_id, None)
+
+    def prepare(self, article_ids: Iterable[str]):
+        """
+        Download and resize the thumbnails of these articles' videos that
+        are not cached yet.
+
+        Args:
+            article_ids: Articles of the current build
+        """
+        wanted = {video_id for article_id in article_ids for video_id in self.videos.get(article_id, [])}
+        now = time.time()
+        missing = sorted(video_id for video_id in wanted
+                         if not self._path(video_id, ORIGINAL_WIDTH).exists()
+                         and now - self.failures.get(video_id, 0) > FAILURE_TTL)
+        if not missing:
+            return
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix='thumbnails') as pool:
+            results = list(pool.map(self._mirror, missing))
+        for video_id, ok in zip(missing, results):
+            if ok:
+                self.failures.pop(video_id, None)
+            else:
+                self.failures[video_id] = now
+        with open(self.state_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self.failures, sort_keys=True))
+        print(f"Thumbnails: {results.count(True)} of {len(missing)} downloaded")
+
+    def _mirror(self, video_id: str) -> bool:
+        try:
+            data = self.fetch(THUMBNAIL_URL.format(video_id))
+            variants = {width: _resize(data, width) for width in THUMBNAIL_WIDTHS
+                        if width != ORIGINAL_WIDTH}
+        except Exception as e:
+            print(f"Could not mirror thumbnail of video {video_id}: {e}")
+            return False
+        for width, resized in variants.items():
+            if resized is not None:
+                self._path(video_id, width).write_bytes(resized)
+        # Written last: its presence marks the video as mirrored
+        self._path(video_id, ORIGINAL_WIDTH).write_bytes(data)
+        return True
+
+    def widths(self, video_id: str) -> List[int]:
+        """Widths available for a video, empty if it is not mirrored."""
+        if not self._path(video_id, ORIGINAL_WIDTH).exists():
+            return []
+        return [width for width in THUMBNAIL_WIDTHS if self._path(video_id, width).exists()]
+
+    def signature(self, article_id: str) -> List:
+        """What an article's page depends on, for the page cache."""
+        return [(video_id, self.widths(video_id)) for video_id in self.videos.get(article_id, [])]
+
+    def publish(self, output, article_ids: Iterable[str]):
+        """
+        Put the mirrored thumbnails of these articles into the output.
+
+        Args:
+            output: OutputWriter of the build
+            article_ids: Articles of the current build
+        """
+        wanted = {video_id for article_id in article_ids for video_id in self.videos.get(article_id, [])}
+        for video_id in sorted(wanted):
+            for width in self.widths(video_id):
+                rel_path = self.rel_path(video_id, width)
+                # Thumbnails never change, so a published one is kept unread
+                if rel_path in output.previous and (output.output_dir / rel_path).exists():
+                    output.keep(rel_path)
+                else:
+                    output.copy(self._path(video_id, width), rel_path)
+
+    def localize(self, content_html: str, base_url: str) -> str:
+        """Point the facades of rendered HTML at the mirrored thumbnails."""
+        def replace(match):
+            video_id = match.group(1)
+            widths = self.widths(video_id)
+            if not widths:
+                return match.group(0)
+            urls = {width: f"{base_url}/{self.rel_path(video_id, width)}" for width in widths}
+            if len(urls) == 1:
+                return f'src="{urls[ORIGINAL_WIDTH]}"'
+            srcset = ', '.join(f"{url} {width}w" for width, url in urls.items())
+            return f'src="{urls[ORIGINAL_WIDTH]}" srcset="{srcset}" sizes="(max-width: 600px) 100vw, 560px"'
+
+        return FACADE_THUMBNAIL_RE.sub(replace, content_html or '')
+
+    @staticmethod
+    def rel_path(video_id: str, width: int) -> str:
+        return f"thumbnails/youtube/{video_id}-{width}.jpg"
+
+    def _path(self, video_id: str, width: int) -> Path:
+        return self.dir / f"{video_id}-{width}.jpg"
@@ -0,0 +1,188 @@
+"""
+Resilient HTTP transport for the Notion API.
+
+Wraps httpx's connection-pooling transport with:
+- Token-bucket rate limiting at Notion's documented ~3 requests/second
+- Retries for rate limits (429), transient server errors and network
+  failures, honoring ``Retry-After`` and otherwise backing off with jitter
+- Keep-alive connection pooling, and HTTP/2 when the ``h2`` package is
+  installed
+
+All Notion requests of a build share one pooled client created by
+``create_notion_client``.
+"""
+
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
+from notion_client import Client
+
+from .errors import NotionFetchError  # noqa: F401  (re-exported)
+
+# Notion's documented average rate limit
+DEFAULT_RATE = 3.0
+DEFAULT_BURST = 3
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket.
+
+    Args:
+        rate: Tokens added per second
+        burst: Bucket capacity (maximum requests sent back to back)
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Drain the bucket so the next token is only available after the given time."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.tokens + (now - self.updated) * self.rate, 1 - seconds * self.rate)
+            self.updated = now
+
+
+class RetryTransport(httpx.BaseTransport):
+    """
+    httpx transport adding rate limiting and retries to a pooled transport.
+
+    Args:
+        transport: Underlying transport that performs the requests
+        rate_limiter: Shared limiter consulted before every attempt
+        max_retries: Retries per request before giving up
+        backoff_base: Base delay in seconds for exponential backoff
+        backoff_max: Upper bound for a single backoff delay
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, rate_limiter: Optional[RateLimiter] = None,
+                 max_retries: int = 5, backoff_base: float = 0.5, backoff_max: float = 30.0):
+        self.transport = transport
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # Counters for build reports, updated from every fetch thread
+        self.requests = 0
+        self.retries = 0
+        self._counter_lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            with self._counter_lock:
+                self.requests += 1
+
+            try:
+                response = self.transport.handle_request(request)
+            except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"Notion request failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+
+                retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+                response.close()
+                delay = retry_after if retry_after is not None else self._backoff(attempt)
+                print(f"Notion returned {response.status_code}, retrying in {delay:.1f}s")
+                if response.status_code == 429:
+                    # Hold back every thread sharing the limiter, not just this
+                    # one; the next acquire() waits out the delay
+                    self.rate_limiter.pause(delay)
+                    delay = 0
+
+            attempt += 1
+            with self._counter_lock:
+                self.retries += 1
+            time.sleep(delay)
+
+    def close(self):
+        self.transport.close()
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_http_client(rate: float = DEFAULT_RATE, max_connections: int = 10,
+                       max_retries: int = 5) -> httpx.Client:
+    """
+    Create the pooled, rate-limited httpx client used for Notion requests.
+
+    Args:
+        rate: Requests per second allowed across all threads
+        max_connections: Size of the keep-alive connection pool
+        max_retries: Retries per request for transient failures
+
+    Returns:
+        httpx.Client whose transport retries and rate limits requests
+    """
+    pool = httpx.HTTPTransport(
+        http2=_http2_available(),
+        limits=httpx.Limits(max_connections=max_connections,
+                            max_keepalive_connections=max_connections,
+                            keepalive_expiry=30.0),
+        retries=0
+    )
+    transport = RetryTransport(pool, RateLimiter(rate), max_retries=max_retries)
+    return httpx.Client(transport=transport)
+
+
+def create_notion_client(auth: Optional[str], http_client: Optional[httpx.Client] = None) -> Client:
+    """
+    Create a Notion client on top of the shared resilient HTTP client.
+
+    Args:
+        auth: Notion integration token
+        http_client: Existing client to share; a new one is created if omitted
+
+    Returns:
+        notion_client.Client instance
+    """
+    return Client(auth=auth, client=http_client or create_http_client())
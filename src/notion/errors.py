@@ -0,0 +1,10 @@
+"""
+Exceptions shared by the Notion modules.
+
+Kept free of third-party imports so callers can catch them without
+loading the HTTP stack.
+"""
+
+
+class NotionFetchError(Exception):
+    """Raised when content could not be fetched completely from Notion."""
@@ -0,0 +1,168 @@
+"""
+Schema-driven ingestion of Notion database rows.
+
+A ``Schema`` declares which Notion properties become which record fields,
+their Notion property types and whether they are required. Each schema is
+compiled once into a list of extractors, so ingesting a database is a
+single pass over its rows with no per-database parsing code:
+
+    GIG_SCHEMA = Schema('gig', 'NOTION_GIGS_DATABASE_ID', [
+        Field('date', 'Date', 'date', required=True),
+        Field('artist', 'Artist', 'rich_text', required=True),
+        ...
+    ])
+    records = GIG_SCHEMA.ingest(pages)
+
+Adding a new database means declaring a schema, not writing extraction
+code.
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+
+def _rich_text(value: List[Dict]) -> Optional[str]:
+    """Join the plain text of a title or rich text property."""
+    text = ''.join(
+        part.get('plain_text') or part.get('text', {}).get('content', '')
+        for part in value or []
+    ).strip()
+    return text or None
+
+
+def _date(value: Optional[Dict]) -> Optional[str]:
+    return value.get('start') if value else None
+
+
+def _select(value: Optional[Dict]) -> Optional[str]:
+    return value.get('name') if value else None
+
+
+def _multi_select(value: Optional[List[Dict]]) -> List[str]:
+    return [option['name'] for option in value or []]
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+# Notion property type -> function turning the property's value into a
+# Python value (None when the property is empty)
+EXTRACTORS: Dict[str, Callable[[Any], Any]] = {
+    'title': _rich_text,
+    'rich_text': _rich_text,
+    'date': _date,
+    'select': _select,
+    'status': _select,
+    'multi_select': _multi_select,
+    'url': _identity,
+    'email': _identity,
+    'number': _identity,
+    'checkbox': bool,
+}
+
+
+class Field:
+    """
+    One record field read from a Notion property.
+
+    Args:
+        name: Key in the resulting record
+        property: Notion property name
+        type: Notion property type (a key of EXTRACTORS)
+        required: Skip rows where the property is empty
+        default: Value for empty properties; a callable receives the
+            record built so far and the row's position
+        transform: Applied to non-empty values (e.g. to derive a year
+            from a date)
+    """
+
+    __slots__ = ('name', 'property', 'type', 'required', 'default', 'transform')
+
+    def __init__(self, name: str, property: str, type: str, required: bool = False,
+                 default: Any = None, transform: Optional[Callable[[Any], Any]] = None):
+        if type not in EXTRACTORS:
+            raise ValueError(f"Unsupported Notion property type for {name}: {type}")
+        self.name = name
+        self.property = property
+        self.type = type
+        self.required = required
+        self.default = default
+        self.transform = transform
+
+
+class Schema:
+    """
+    Mapping from a Notion database's properties to record fields.
+
+    Args:
+        name: Record kind, used in log messages
+        env_var: Environment variable holding the database ID
+        fields: Fields in extraction order (defaults may use earlier fields)
+        sorts: Notion sort specification used when querying the database
+    """
+
+    def __init__(self, name: str, env_var: str, fields: List[Field],
+                 sorts: Optional[List[Dict]] = None):
+        self.name = name
+        self.env_var = env_var
+        self.fields = fields
+        self.sorts = sorts or []
+        self._compiled = [
+            (f.name, f.property, f.type, EXTRACTORS[f.type], f.required, f.default, f.transform)
+            for f in fields
+        ]
+
+    def ingest(self, pages: List[Dict]) -> List[Dict]:
+        """
+        Convert database rows into records.
+
+        Rows missing a required property are skipped with a message.
+
+        Args:
+            pages: Page objects returned by a database query
+
+        Returns:
+            List of record dictionaries in row order
+        """
+        records = []
+        for position, page in enumerate(pages, 1):
+            properties = page.get('properties', {})
+            record = {}
+            for name, prop, prop_type, extract, required, default, transform in self._compiled:
+                value = properties.get(prop)
+                value = extract(value.get(prop_type)) if value else None
+                if value is None or value == []:
+                    if required:
+                        print(f"Skipping {self.name} {position}: Missing {prop}")
+                        break
+                    value = default(record, position) if callable(default) else default
+                elif transform is not None:
+                    value = transform(value)
+                record[name] = value
+            else:
+                records.append(record)
+        return records
+
+
+GIG_SCHEMA = Schema('gig', 'NOTION_GIGS_DATABASE_ID', [
+    Field('id', 'Gig', 'title', default=lambda record, position: str(position)),
+    Field('date', 'Date', 'date', required=True),
+    Field('year', 'Date', 'date', required=True, transform=lambda date: date[:4]),
+    Field('artist', 'Artist', 'rich_text', required=True),
+    Field('venue', 'Venue', 'rich_text', required=True),
+    Field('location', 'location', 'rich_text', default=lambda record, position: record['venue']),
+    Field('notes', 'Notes', 'rich_text'),
+    Field('setlist_url', 'Setlist', 'url'),
+], sorts=[{'property': 'Date', 'direction': 'descending'}])
+
+MEDIA_SCHEMA = Schema('media item', 'NOTION_MEDIA_DATABASE_ID', [
+    Field('title', 'Title', 'title', required=True),
+    Field('type', 'Type', 'select', required=True),
+    Field('url', 'URL', 'url'),
+    Field('description', 'Description', 'rich_text'),
+    Field('why_important', "Why It's Important", 'rich_text'),
+    Field('date_added', 'Date Added', 'date'),
+    Field('tags', 'Tags', 'multi_select', default=lambda record, position: []),
+    Field('rating', 'Rating', 'number'),
+    Field('status', 'Status', 'select'),
+], sorts=[{'property': 'Date Added', 'direction': 'descending'}])
@@ -0,0 +1,165 @@
+"""
+Request planning for Notion builds.
+
+``RequestPlanner`` sits between the generator and the Notion client and
+exposes the same endpoints. Before fetching, the generator registers the
+requests a build will need with ``expect``; the planner then:
+- Executes identical requests once, even when several threads ask for the
+  same resource at the same time (e.g. one content page linked from
+  several database rows), and hands the response to every caller
+- Keeps a shared response only until each planned caller has had it, so
+  deduplication never turns into holding every page in memory
+- Counts planned, executed and reused requests per endpoint for the
+  build report
+
+Builds of several sites in one process can also share a ``ResponseCache``,
+so a database or page used by more than one site is fetched once per run.
+"""
+
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional
+
+from .snapshot import _Endpoint, request_key
+
+
+class _Pending:
+    """A request being executed or waiting for its remaining consumers."""
+
+    __slots__ = ('done', 'response', 'error', 'uses')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response: Optional[Dict] = None
+        self.error: Optional[Exception] = None
+        self.uses = 0
+
+
+class ResponseCache:
+    """
+    Responses shared by the builds of one multi-site run.
+
+    Unlike the planner's own deduplication, entries outlive a build, so
+    a cache must not be kept across runs (it would serve stale content).
+
+    Args:
+        capacity: Responses to keep; the least recently used are dropped
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._responses: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            response = self._responses.get(key)
+            if response is not None:
+                self._responses.move_to_end(key)
+            return response
+
+    def put(self, key: str, response: Dict):
+        with self._lock:
+            self._responses[key] = response
+            self._responses.move_to_end(key)
+            if len(self._responses) > self.capacity:
+                self._responses.popitem(last=False)
+
+
+class RequestPlanner:
+    """
+    Deduplicating, counting wrapper around a Notion client.
+
+    Args:
+        client: Notion client performing the requests (an API client,
+            RecordingClient or SnapshotClient)
+        responses: Cache shared with the builds of other sites in this run
+    """
+
+    def __init__(self, client, responses: Optional[ResponseCache] = None):
+        self.client = client
+        self.responses = responses
+        self.planned: Counter = Counter()
+        self.executed: Counter = Counter()
+        self.reused: Counter = Counter()
+        self._expected: Counter = Counter()
+        self._pending: Dict[str, _Pending] = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> _Endpoint:
+        return _Endpoint(self, name)
+
+    def expect(self, endpoint: str, **params):
+        """
+        Register a request the build will make.
+
+        Requests registered more than once are executed once and shared.
+        """
+        key = request_key(endpoint, params)
+        with self._lock:
+            if not self._expected[key]:
+                self.planned[endpoint] += 1
+            self._expected[key] += 1
+
+    def call(self, endpoint: str, params: Dict[str, Any]) -> Dict:
+        key = request_key(endpoint, params)
+        if self.responses is not None:
+            response = self.responses.get(key)
+            if response is not None:
+                with self._lock:
+                    self.reused[endpoint] += 1
+                return response
+
+        with self._lock:
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = _Pending()
+            else:
+                self.reused[endpoint] += 1
+
+        if owner:
+            try:
+                method = self.client
+                for part in endpoint.split('.'):
+                    method = getattr(method, part)
+                pending.response = method(**params)
+                if self.responses is not None:
+                    self.responses.put(key, pending.response)
+            except Exception as e:
+                pending.error = e
+            finally:
+                with self._lock:
+                    self.executed[endpoint] += 1
+                pending.done.set()
+        else:
+            pending.done.wait()
+
+        with self._lock:
+            pending.uses += 1
+            # Drop the response, and the request's count, once every
+            # planned consumer has it; a request planned again later is
+            # executed again
+            if pending.uses >= self._expected[key] and self._pending.get(key) is pending:
+                del self._pending[key]
+                self._expected.pop(key, None)
+
+        if pending.error is not None:
+            raise pending.error
+        return pending.response
+
+    def report(self) -> str:
+        """Planned, executed and reused request counts per endpoint."""
+        lines = []
+        for endpoint in sorted(set(self.planned) | set(self.executed)):
+            lines.append(f"  {endpoint}: {self.planned[endpoint]} planned, "
+                         f"{self.executed[endpoint]} executed, {self.reused[endpoint]} reused")
+
+        # HTTP attempts including retries, when the client counts them
+        transport = getattr(getattr(self.client, 'client', None), '_transport', None)
+        if hasattr(transport, 'requests'):
+            lines.append(f"  HTTP: {transport.requests} requests, {transport.retries} retries")
+
+        total = sum(self.executed.values())
+        return "\n".join([f"Notion requests: {sum(self.planned.values())} planned, {total} executed, "
+                          f"{sum(self.reused.values())} reused"] + lines)
@@ -11,18 +11,38 @@ This module processes various types of Notion blocks including:
 - Quotes and callouts
 """
 
-import re
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Any, Optional
 from urllib.parse import urlparse
 
+from .youtube import facade, iframe, parse_youtube_url
+
+# Rendered blocks kept by the block render cache
+BLOCK_CACHE_SIZE = 20000
+
 class NotionProcessor:
     """
     Processes Notion blocks and converts them to HTML.
     Handles rich text formatting, links, and various block types.
     """
 
-    def __init__(self):
-        """Initialize the processor with block type handlers."""
+    def __init__(self, cache_size: int = BLOCK_CACHE_SIZE, video_facades: bool = True):
+        """
+        Initialize the processor with block type handlers.
+        
+        Args:
+            cache_size: Rendered blocks to remember between calls (0 disables
+                the cache). Entries are keyed by block ID and edit time, so
+                a long-running process renders each block version once.
+            video_facades: Render YouTube videos as click-to-load thumbnails
+                instead of player iframes
+        """
+        self.cache_size = cache_size
+        self.video_facades = video_facades
+        self.block_cache: OrderedDict = OrderedDict()
+        self.cache_hits = 0
+        self._settled_before = ''
         # Map Notion block types to their handler methods
         self.block_handlers = {
             'paragraph': self._process_paragraph,
@@ -53,6 +73,11 @@ class NotionProcessor:
         """
         html_parts = []
         list_context = {'type': None, 'count': 0}
+        
+        # Edit times are rounded to the minute, so a block edited in the last
+        # minute or so may change again without its edit time changing
+        settled = datetime.now(timezone.utc) - timedelta(minutes=2)
+        self._settled_before = settled.strftime('%Y-%m-%dT%H:%M:%S.000Z')
 
         for block in blocks:
             block_type = block.get('type')
@@ -76,7 +101,7 @@ class NotionProcessor:
 
             # Process the block
             if handler := self.block_handlers.get(block_type):
-                html = handler(block)
+                html = self._render_block(block, handler)
                 if html:
                     html_parts.append(html)
 
@@ -86,6 +111,29 @@ class NotionProcessor:
 
         return '\n'.join(filter(None, html_parts))
 
+    def _render_block(self, block: Dict, handler) -> str:
+        """Render one block, reusing the HTML of an unchanged block."""
+        edited = block.get('last_edited_time')
+        payload = block.get(block.get('type'), {})
+        # Notion-hosted files have signed URLs that expire, so their HTML
+        # must come from the latest fetch
+        if (not self.cache_size or not edited or 'id' not in block or 'file' in payload
+                or edited >= self._settled_before):
+            return handler(block)
+
+        key = (block['id'], edited)
+        html = self.block_cache.get(key)
+        if html is not None:
+            self.block_cache.move_to_end(key)
+            self.cache_hits += 1
+            return html
+
+        html = handler(block)
+        self.block_cache[key] = html
+        if len(self.block_cache) > self.cache_size:
+            self.block_cache.popitem(last=False)
+        return html
+
     def _process_rich_text(self, rich_text: List[Dict]) -> str:
         """
         Process Notion's rich text array into HTML with proper formatting.
@@ -180,7 +228,7 @@ class NotionProcessor:
         return ''
 
     def _process_video(self, block: Dict) -> str:
-        """Convert Notion video block to HTML video or iframe."""
+        """Convert Notion video block to HTML video, iframe or video facade."""
         video = block['video']
         url = video.get('file', {}).get('url') or video.get('external', {}).get('url')
         
@@ -188,20 +236,25 @@ class NotionProcessor:
             return ''
 
         # Handle YouTube videos
-        if 'youtube.com' in url or 'youtu.be' in url:
-            video_id = self._extract_youtube_id(url)
-            if video_id:
-                return f'<div class="video-container"><iframe width="560" height="315" src="https://www.youtube.com/embed/{video_id}" frameborder="0" allowfullscreen></iframe></div>'
+        if youtube := parse_youtube_url(url):
+            caption = ''.join(part.get('plain_text', '') for part in video.get('caption', []))
+            return self._youtube(youtube, caption)
 
         # Default video player for other videos
         return f'<video controls><source src="{url}" type="video/mp4">Your browser does not support the video tag.</video>'
 
     def _process_embed(self, block: Dict) -> str:
-        """Convert Notion embed block to HTML iframe."""
+        """Convert Notion embed block to HTML iframe (or a facade for YouTube)."""
         url = block['embed'].get('url')
-        if url:
-            return f'<div class="embed-container"><iframe src="{url}" frameborder="0" allowfullscreen></iframe></div>'
-        return ''
+        if not url:
+            return ''
+        if youtube := parse_youtube_url(url):
+            return self._youtube(youtube)
+        return f'<div class="embed-container"><iframe src="{url}" frameborder="0" loading="lazy" allowfullscreen></iframe></div>'
+
+    def _youtube(self, video: Dict, title: str = '') -> str:
+        """Player or click-to-load facade for a parsed YouTube URL."""
+        return facade(video, title) if self.video_facades else iframe(video)
 
     def _process_bookmark(self, block: Dict) -> str:
         """Convert Notion bookmark block to styled link card."""
@@ -228,12 +281,5 @@ class NotionProcessor:
 
     def _extract_youtube_id(self, url: str) -> Optional[str]:
         """Extract YouTube video ID from URL."""
-        patterns = [
-            r'(?:youtube\.com\/watch\?v=|youtu\.be\/)([^&\n?#]+)',
-            r'youtube\.com\/embed\/([^&\n?#]+)',
-        ]
-        
-        for pattern in patterns:
-            if match := re.search(pattern, url):
-                return match.group(1)
-        return None
+        video = parse_youtube_url(url)
+        return video['id'] if video else None
@@ -0,0 +1,134 @@
+"""
+Record and replay Notion API responses.
+
+``RecordingClient`` wraps a real Notion client and keeps every response a
+build receives; ``save_snapshot`` writes them to a JSON file. A
+``SnapshotClient`` loaded from that file answers the same calls offline,
+so a site can be rebuilt without network access or an API key, and
+without importing the HTTP stack at all.
+
+Both clients expose the endpoints the generator uses through the same
+attribute paths as ``notion_client.Client`` (``databases.query``,
+``pages.retrieve``, ``blocks.children.list``).
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+from .errors import NotionFetchError
+
+SNAPSHOT_VERSION = 1
+
+# Database IDs stored with a snapshot so replaying needs no configuration
+SNAPSHOT_ENV = ('NOTION_DATABASE_ID', 'NOTION_GIGS_DATABASE_ID', 'NOTION_MEDIA_DATABASE_ID')
+
+
+def request_key(endpoint: str, params: Dict[str, Any]) -> str:
+    """Stable key identifying one API call."""
+    return f"{endpoint} {json.dumps(params, sort_keys=True, separators=(',', ':'))}"
+
+
+class _Endpoint:
+    """Attribute path on a client, e.g. ``blocks.children.list``."""
+
+    __slots__ = ('_client', '_path')
+
+    def __init__(self, client, path: str):
+        self._client = client
+        self._path = path
+
+    def __getattr__(self, name: str) -> '_Endpoint':
+        return _Endpoint(self._client, f'{self._path}.{name}')
+
+    def __call__(self, **params) -> Dict:
+        return self._client.call(self._path, params)
+
+
+class RecordingClient:
+    """
+    Notion client wrapper that records every response.
+
+    Args:
+        client: notion_client.Client performing the requests
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.responses: Dict[str, Dict] = {}
+
+    def __getattr__(self, name: str) -> _Endpoint:
+        return _Endpoint(self, name)
+
+    def call(self, endpoint: str, params: Dict[str, Any]) -> Dict:
+        method = self.client
+        for part in endpoint.split('.'):
+            method = getattr(method, part)
+        response = method(**params)
+        self.responses[request_key(endpoint, params)] = response
+        return response
+
+
+class SnapshotClient:
+    """
+    Offline Notion client answering calls from recorded responses.
+
+    Args:
+        responses: Request key -> response, as recorded by RecordingClient
+    """
+
+    def __init__(self, responses: Dict[str, Dict]):
+        self.responses = responses
+
+    def __getattr__(self, name: str) -> _Endpoint:
+        return _Endpoint(self, name)
+
+    def call(self, endpoint: str, params: Dict[str, Any]) -> Dict:
+        try:
+            return self.responses[request_key(endpoint, params)]
+        except KeyError:
+            raise NotionFetchError(f"{endpoint} {params} is not in the snapshot") from None
+
+
+def save_snapshot(path: Path, recorder: RecordingClient, env: Iterable[str] = SNAPSHOT_ENV):
+    """
+    Write recorded responses to a snapshot file.
+
+    Args:
+        path: Snapshot file to write
+        recorder: Client that recorded a build's requests
+        env: Environment variables to store alongside the responses
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    snapshot = {
+        'v': SNAPSHOT_VERSION,
+        'env': {name: os.environ[name] for name in env if os.getenv(name)},
+        'responses': recorder.responses,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, sort_keys=True, separators=(',', ':'))
+    print(f"Saved {len(recorder.responses)} Notion responses to {path}")
+
+
+def load_snapshot(path: Path) -> SnapshotClient:
+    """
+    Load a snapshot file.
+
+    The database IDs stored with the snapshot are exported to the
+    environment unless they are already set.
+
+    Args:
+        path: Snapshot file written by save_snapshot
+
+    Returns:
+        SnapshotClient replaying the recorded responses
+    """
+    with open(path, encoding='utf-8') as f:
+        snapshot = json.load(f)
+    if snapshot.get('v') != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported Notion snapshot version in {path}")
+    for name, value in snapshot['env'].items():
+        os.environ.setdefault(name, value)
+    return SnapshotClient(snapshot['responses'])
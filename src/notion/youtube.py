@@ -0,0 +1,124 @@
+"""
+YouTube URL parsing and lightweight embed facades.
+
+A facade is a link styled as a video player: a thumbnail with a play
+button that ``main.js`` swaps for the real ``<iframe>`` on click. Pages
+with many videos then load a dozen small images instead of a dozen
+players. Without JavaScript the facade is an ordinary link to YouTube.
+
+Facades point at YouTube's own thumbnail; the site generator mirrors
+thumbnails locally and rewrites those URLs (see generator/thumbnails.py).
+"""
+
+import html
+import re
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+YOUTUBE_HOST_RE = re.compile(r'^(?:www\.|m\.|music\.)?(?:youtube\.com|youtube-nocookie\.com|youtu\.be)$')
+VIDEO_ID_RE = re.compile(r'^[A-Za-z0-9_-]{11}$')
+PLAYLIST_ID_RE = re.compile(r'^[A-Za-z0-9_-]+$')
+# /embed/ID, /shorts/ID, /live/ID, /v/ID
+VIDEO_PATH_RE = re.compile(r'^/(?:embed|shorts|live|v)/([A-Za-z0-9_-]{11})(?:[/?#]|$)')
+# t=90, t=90s, t=1m30s, t=1h2m3s
+START_RE = re.compile(r'^(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s?)?$')
+
+THUMBNAIL_URL = 'https://i.ytimg.com/vi/{}/hqdefault.jpg'
+# Width and height of hqdefault thumbnails
+THUMBNAIL_SIZE = (480, 360)
+
+
+def parse_youtube_url(url: str) -> Optional[Dict]:
+    """
+    Parse a YouTube video, short or playlist URL.
+
+    Args:
+        url: Any URL
+
+    Returns:
+        Dict with ``id`` (video ID or None for a bare playlist), ``start``
+        (seconds) and ``playlist`` (ID or None), or None if the URL is not
+        a YouTube video or playlist
+    """
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower().split(':')[0]
+    if not YOUTUBE_HOST_RE.match(host):
+        return None
+    query = parse_qs(parsed.query)
+
+    if host.endswith('youtu.be'):
+        video_id = parsed.path.strip('/').split('/')[0]
+    elif parsed.path.rstrip('/') == '/watch':
+        video_id = query.get('v', [''])[0]
+    else:
+        match = VIDEO_PATH_RE.match(parsed.path)
+        video_id = match.group(1) if match else ''
+    if not VIDEO_ID_RE.match(video_id):
+        video_id = None
+
+    playlist = query.get('list', [''])[0]
+    if not PLAYLIST_ID_RE.match(playlist):
+        playlist = None
+    if video_id is None and playlist is None:
+        return None
+
+    fragment = parse_qs(parsed.fragment)
+    start = (query.get('t') or query.get('start') or fragment.get('t') or [''])[0]
+    return {'id': video_id, 'start': _seconds(start), 'playlist': playlist}
+
+
+def _seconds(value: str) -> int:
+    match = START_RE.match(value) if value else None
+    if not match:
+        return 0
+    hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def embed_url(video: Dict) -> str:
+    """Player URL of a parsed video or playlist."""
+    params = []
+    if video['playlist']:
+        params.append(f"list={video['playlist']}")
+    if video['start']:
+        params.append(f"start={video['start']}")
+    path = video['id'] or 'videoseries'
+    return f"https://www.youtube.com/embed/{path}" + (f"?{'&'.join(params)}" if params else '')
+
+
+def watch_url(video: Dict) -> str:
+    """Page URL of a parsed video or playlist on youtube.com."""
+    if not video['id']:
+        return f"https://www.youtube.com/playlist?list={video['playlist']}"
+    url = f"https://www.youtube.com/watch?v={video['id']}"
+    if video['playlist']:
+        url += f"&list={video['playlist']}"
+    if video['start']:
+        url += f"&t={video['start']}s"
+    return url
+
+
+def iframe(video: Dict) -> str:
+    """Full player markup, as rendered without facades."""
+    return (f'<div class="video-container"><iframe width="560" height="315" '
+            f'src="{html.escape(embed_url(video))}" frameborder="0" allowfullscreen></iframe></div>')
+
+
+def facade(video: Dict, title: str = '') -> str:
+    """
+    Click-to-load placeholder for a parsed video or playlist.
+
+    Args:
+        video: Result of parse_youtube_url
+        title: Accessible label, e.g. the block's caption as plain text
+    """
+    label = html.escape(f"Play video: {title}" if title else "Play video")
+    thumbnail = ''
+    if video['id']:
+        width, height = THUMBNAIL_SIZE
+        thumbnail = (f'<img class="video-facade-thumb" src="{THUMBNAIL_URL.format(video["id"])}" '
+                     f'alt="" width="{width}" height="{height}" loading="lazy">')
+    return (f'<div class="video-container video-facade">'
+            f'<a href="{html.escape(watch_url(video))}" data-embed="{html.escape(embed_url(video))}" '
+            f'aria-label="{label}" target="_blank" rel="noopener noreferrer">'
+            f'{thumbnail}<span class="video-facade-play" aria-hidden="true"></span></a></div>')
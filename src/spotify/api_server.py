@@ -0,0 +1,302 @@
+"""
+Now-playing API server.
+
+A small asyncio HTTP service backing the live widgets on the site:
+
+    GET /api/current-track     {"current_track": {...} | null}
+    GET /api/recently-played   {"recently_played": [...]}
+    GET /api/top-tracks        {"top_tracks": [...]}
+    GET /api/events            Server-Sent Events stream of current-track changes
+
+A single poller refreshes the shared SpotifyService on an interval, so
+any number of visitors share one upstream request per interval. When a
+listening log is configured, new plays are appended to it each time the
+recently played list is refreshed. JSON
+responses carry an ETag and answer conditional requests with 304, and
+the event stream only sends data when the track actually changes.
+
+The current track's ETag and change detection cover only the track and
+whether it is playing, so its ETag is weak (``W/"..."``). Its
+``progress_ms`` comes with ``progress_at``, the time it was read, and
+clients advance the progress bar themselves, so a playing track does not
+produce a new event or response every poll.
+Subscribers that fall SUBSCRIBER_QUEUE_SIZE events behind are
+disconnected; EventSource reconnects on its own.
+
+Run with:
+    python -m src.spotify.api_server --port 8001
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from ..config import LISTENING_DB
+from .history import ListeningHistory
+from .service import SpotifyService, get_spotify_service
+
+# Response payload key for each JSON endpoint
+ENDPOINTS = {
+    '/api/current-track': 'current_track',
+    '/api/recently-played': 'recently_played',
+    '/api/top-tracks': 'top_tracks',
+}
+
+HEARTBEAT_SECONDS = 15
+# Undelivered events a subscriber may have before it is disconnected
+SUBSCRIBER_QUEUE_SIZE = 8
+
+
+class Payload:
+    """
+    Serialized endpoint response with its ETag.
+
+    Args:
+        data: Response body
+        identity: What the ETag is computed from; defaults to the whole
+            body. An ETag computed from an identity is weak (``W/"..."``),
+            since bodies with the same identity may differ byte for byte.
+    """
+
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, data: Dict, identity=None):
+        self.body = json.dumps(data, sort_keys=True).encode('utf-8')
+        key = self.body if identity is None else json.dumps(identity, sort_keys=True).encode('utf-8')
+        self.etag = '"' + hashlib.sha1(key).hexdigest()[:16] + '"'
+        if identity is not None:
+            self.etag = 'W/' + self.etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or (candidate[2:] if candidate.startswith('W/') else candidate) == opaque:
+            return True
+    return False
+
+
+def track_identity(track: Optional[Dict]) -> Optional[list]:
+    """The parts of the current track that make it a change: the track and whether it plays."""
+    if not track:
+        return None
+    return [track.get('spotify_url'), track.get('name'), track.get('artist'), bool(track.get('is_playing'))]
+
+
+class NowPlayingServer:
+    """
+    HTTP server exposing cached Spotify data to the static site.
+
+    Args:
+        service: Shared Spotify data service
+        interval: Seconds between upstream polls for the current track
+        allowed_origin: Value of Access-Control-Allow-Origin
+        history: Listening log to append recently played tracks to
+    """
+
+    def __init__(self, service: SpotifyService, interval: float = 15,
+                 allowed_origin: str = '*', history: Optional[ListeningHistory] = None):
+        self.service = service
+        self.history = history
+        self.interval = interval
+        self.allowed_origin = allowed_origin
+        self.payloads: Dict[str, Payload] = {}
+        # Event queue of each SSE subscriber, with its connection
+        self.subscribers: Dict[asyncio.Queue, asyncio.StreamWriter] = {}
+        self.last_polled: Dict[str, float] = {}
+
+    async def poll_forever(self):
+        """Refresh upstream data and notify subscribers when it changes."""
+        loop = asyncio.get_running_loop()
+        while True:
+            now = time.time()
+            # The current track follows the poll interval; the slower-moving
+            # lists are refreshed when their cache TTL runs out
+            due = [key for key in ENDPOINTS.values()
+                   if now - self.last_polled.get(key, 0) >= (
+                       self.interval if key == 'current_track' else self.service.ttls[key])]
+            if due:
+                # spotipy is blocking, so run the refresh off the event loop
+                await loop.run_in_executor(None, self.service.refresh, due)
+                for key in due:
+                    self.last_polled[key] = now
+                if self.history is not None and 'recently_played' in due:
+                    await loop.run_in_executor(None, self._collect_history)
+            self._update_payloads()
+            await asyncio.sleep(self.interval)
+
+    def _collect_history(self):
+        try:
+            added = self.history.collect(self.service)
+            if added:
+                print(f"Stored {added} new plays in the listening log")
+        except Exception as e:
+            print(f"Error collecting listening history: {e}")
+
+    def _update_payloads(self):
+        """Rebuild payloads from the service cache and broadcast track changes."""
+        entries = self.service.cache['entries']
+        for path, key in ENDPOINTS.items():
+            data = entries.get(key, {}).get('data')
+            if data is None and key != 'current_track':
+                data = []
+            identity = track_identity(data) if key == 'current_track' else None
+            payload = Payload({key: data}, identity)
+            previous = self.payloads.get(path)
+            # Kept even when the ETag matches, so new requests get the latest progress
+            self.payloads[path] = payload
+            if key == 'current_track' and (previous is None or previous.etag != payload.etag):
+                self._broadcast(payload)
+
+    def _broadcast(self, payload: Payload):
+        """Queue an event for every subscriber, disconnecting those too far behind."""
+        for queue, writer in list(self.subscribers.items()):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                del self.subscribers[queue]
+                writer.transport.abort()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve one HTTP connection."""
+        try:
+            request = await self._read_request(reader)
+            if request is None:
+                return
+            method, path, headers = request
+
+            if method == 'OPTIONS':
+                await self._respond(writer, 204, b'')
+            elif method not in ('GET', 'HEAD'):
+                await self._respond(writer, 405, b'')
+            elif path == '/api/events':
+                await self._stream_events(writer)
+            elif path in ENDPOINTS and path in self.payloads:
+                payload = self.payloads[path]
+                if etag_matches(headers.get('if-none-match'), payload.etag):
+                    await self._respond(writer, 304, b'', {'ETag': payload.etag})
+                else:
+                    body = payload.body if method == 'GET' else b''
+                    await self._respond(writer, 200, body, {
+                        'ETag': payload.etag,
+                        'Content-Type': 'application/json',
+                        'Cache-Control': 'no-cache'
+                    }, content_length=len(payload.body))
+            elif path in ENDPOINTS:
+                await self._respond(writer, 503, b'', {'Retry-After': str(int(self.interval))})
+            else:
+                await self._respond(writer, 404, b'')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream_events(self, writer: asyncio.StreamWriter):
+        """Send the current track, then one event per change, with heartbeats."""
+        writer.write(self._status_line(200) + self._headers({
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+        }) + b'\r\n')
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        if '/api/current-track' in self.payloads:
+            queue.put_nowait(self.payloads['/api/current-track'])
+        self.subscribers[queue] = writer
+        try:
+            # Closed by _broadcast when the subscriber falls behind
+            while not writer.is_closing():
+                try:
+                    payload = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                    writer.write(b'event: current-track\ndata: ' + payload.body + b'\n\n')
+                except asyncio.TimeoutError:
+                    writer.write(b': keep-alive\n\n')
+                await writer.drain()
+        finally:
+            self.subscribers.pop(queue, None)
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str]]]:
+        """Parse the request line and headers."""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            return None
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        return method.upper(), target.split('?', 1)[0], headers
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, body: bytes,
+                       headers: Optional[Dict[str, str]] = None, content_length: Optional[int] = None):
+        headers = {**(headers or {}), 'Content-Length': str(content_length if content_length is not None else len(body)),
+                   'Connection': 'close'}
+        writer.write(self._status_line(status) + self._headers(headers) + b'\r\n' + body)
+        await writer.drain()
+
+    @staticmethod
+    def _status_line(status: int) -> bytes:
+        reasons = {200: 'OK', 204: 'No Content', 304: 'Not Modified', 404: 'Not Found',
+                   405: 'Method Not Allowed', 503: 'Service Unavailable'}
+        return f"HTTP/1.1 {status} {reasons.get(status, '')}\r\n".encode('latin-1')
+
+    def _headers(self, headers: Dict[str, str]) -> bytes:
+        headers = {
+            'Access-Control-Allow-Origin': self.allowed_origin,
+            'Access-Control-Allow-Headers': 'If-None-Match',
+            'Access-Control-Expose-Headers': 'ETag',
+            **headers
+        }
+        return ''.join(f"{name}: {value}\r\n" for name, value in headers.items()).encode('latin-1')
+
+    async def serve(self, host: str, port: int):
+        """Start the poller and serve until cancelled."""
+        self._update_payloads()
+        poller = asyncio.create_task(self.poll_forever())
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Now-playing API listening on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            poller.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve now-playing data from Spotify")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8001, help="Port to listen on")
+    parser.add_argument("--interval", type=float, default=15, help="Seconds between Spotify polls")
+    parser.add_argument("--no-history", action="store_true", help="Do not append plays to the listening log")
+    args = parser.parse_args()
+
+    server = NowPlayingServer(
+        get_spotify_service(),
+        interval=args.interval,
+        allowed_origin=os.getenv('NOW_PLAYING_ALLOWED_ORIGIN', '*'),
+        history=None if args.no_history else ListeningHistory(LISTENING_DB)
+    )
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nStopping now-playing API...")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Historical listening log.
+
+Spotify's API only exposes the last 50 plays, so a collector appends
+recently-played entries to a local SQLite database keyed by
+``played_at`` (duplicates are ignored). Listening statistics for the
+site are computed from that database at build time with SQL
+aggregation, without calling Spotify.
+
+Usage:
+    python -m src.spotify.history collect   # append new plays (run from cron)
+    python -m src.spotify.history stats     # print a summary
+"""
+
+import argparse
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plays (
+    played_at TEXT PRIMARY KEY,
+    track TEXT NOT NULL,
+    artist TEXT NOT NULL,
+    album TEXT,
+    spotify_url TEXT,
+    duration_ms INTEGER
+);
+CREATE INDEX IF NOT EXISTS plays_artist ON plays (artist);
+"""
+
+
+class ListeningHistory:
+    """
+    Deduplicated store of plays.
+
+    Args:
+        db_path: SQLite database file (created on first use)
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def append(self, plays: Iterable[Dict]) -> int:
+        """
+        Store plays, skipping any already recorded.
+
+        Args:
+            plays: Track dicts with played_at, name, artist, album,
+                spotify_url and duration_ms keys
+
+        Returns:
+            Number of new plays stored
+        """
+        rows = [(p['played_at'], p['name'], p['artist'], p.get('album'),
+                 p.get('spotify_url'), p.get('duration_ms')) for p in plays]
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO plays VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            return self.conn.total_changes - before
+
+    def latest_played_at(self) -> Optional[str]:
+        """Timestamp of the newest stored play."""
+        return self.conn.execute("SELECT MAX(played_at) FROM plays").fetchone()[0]
+
+    def collect(self, service) -> int:
+        """
+        Append plays newer than the latest stored one.
+
+        Args:
+            service: SpotifyService used to fetch recently played tracks
+
+        Returns:
+            Number of new plays stored
+        """
+        latest = self.latest_played_at()
+        after = None
+        if latest:
+            after = int(datetime.fromisoformat(latest.replace('Z', '+00:00')).timestamp() * 1000)
+        return self.append(service.fetch_recently_played(limit=50, after=after))
+
+    def stats(self, gig_artists: Optional[Dict[str, int]] = None, top_n: int = 20) -> Dict:
+        """
+        Compute listening statistics.
+
+        Args:
+            gig_artists: Artist name -> number of gigs, for the overlap table
+            top_n: Number of artists in the top artists list
+
+        Returns:
+            Dictionary of summary values and tables for the template
+        """
+        q = self.conn.execute
+        total, artists, tracks, first, last = q("""
+            SELECT COUNT(*), COUNT(DISTINCT artist), COUNT(DISTINCT track || '|' || artist),
+                   MIN(played_at), MAX(played_at)
+            FROM plays
+        """).fetchone()
+
+        top_artists = [
+            {'artist': artist, 'plays': plays, 'tracks': n_tracks}
+            for artist, plays, n_tracks in q("""
+                SELECT artist, COUNT(*) AS plays, COUNT(DISTINCT track)
+                FROM plays GROUP BY artist
+                ORDER BY plays DESC, artist LIMIT ?
+            """, (top_n,))
+        ]
+
+        # Plays per month with that month's most played artist
+        months = [
+            {'month': month, 'plays': plays, 'artists': n_artists, 'top_artist': top_artist,
+             'top_artist_plays': top_plays}
+            for month, plays, n_artists, top_artist, top_plays in q("""
+                WITH per_artist AS (
+                    SELECT substr(played_at, 1, 7) AS month, artist, COUNT(*) AS plays
+                    FROM plays GROUP BY month, artist
+                ), ranked AS (
+                    SELECT month, artist, plays,
+                           ROW_NUMBER() OVER (PARTITION BY month ORDER BY plays DESC, artist) AS rank,
+                           SUM(plays) OVER (PARTITION BY month) AS month_plays,
+                           COUNT(*) OVER (PARTITION BY month) AS month_artists
+                    FROM per_artist
+                )
+                SELECT month, month_plays, month_artists, artist, plays
+                FROM ranked WHERE rank = 1 ORDER BY month DESC
+            """)
+        ]
+
+        # Streaks of consecutive listening days (gaps-and-islands)
+        streaks = [
+            {'start': start, 'end': end, 'days': days}
+            for start, end, days in q("""
+                WITH days AS (
+                    SELECT DISTINCT date(played_at) AS day FROM plays
+                ), islands AS (
+                    SELECT day, julianday(day) - ROW_NUMBER() OVER (ORDER BY day) AS island
+                    FROM days
+                )
+                SELECT MIN(day), MAX(day), COUNT(*) AS length
+                FROM islands GROUP BY island
+                ORDER BY length DESC, MAX(day) DESC LIMIT 5
+            """)
+        ]
+
+        overlap = []
+        if gig_artists:
+            plays_by_artist = {
+                artist.lower(): (artist, plays)
+                for artist, plays in q("SELECT artist, COUNT(*) FROM plays GROUP BY artist")
+            }
+            for name, gigs in gig_artists.items():
+                if name.lower() in plays_by_artist:
+                    overlap.append({'artist': name, 'gigs': gigs,
+                                    'plays': plays_by_artist[name.lower()][1]})
+            overlap.sort(key=lambda row: (-row['plays'], row['artist'].lower()))
+
+        return {
+            'total_plays': total,
+            'unique_artists': artists,
+            'unique_tracks': tracks,
+            'first_play': first,
+            'last_play': last,
+            'top_artists': top_artists,
+            'months': months,
+            'streaks': streaks,
+            'gig_overlap': overlap,
+        }
+
+
+def main():
+    from ..config import LISTENING_DB
+    from .service import get_spotify_service
+
+    parser = argparse.ArgumentParser(description="Maintain the local Spotify listening log")
+    parser.add_argument("command", choices=["collect", "stats"])
+    args = parser.parse_args()
+
+    history = ListeningHistory(LISTENING_DB)
+    if args.command == "collect":
+        added = history.collect(get_spotify_service())
+        print(f"Stored {added} new plays in {LISTENING_DB}")
+    else:
+        stats = history.stats()
+        print(f"{stats['total_plays']} plays of {stats['unique_tracks']} tracks "
+              f"by {stats['unique_artists']} artists")
+        for row in stats['top_artists'][:10]:
+            print(f"  {row['plays']:5d}  {row['artist']}")
+    history.close()
+
+
+if __name__ == "__main__":
+    main()
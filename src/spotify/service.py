@@ -0,0 +1,298 @@
+"""
+Shared Spotify listening-data service.
+
+One authenticated Spotify session serves every caller in the process.
+Results for each endpoint are cached on disk with their own TTL:
+- Fresh cache entries are returned without touching the API
+- Stale entries are returned immediately while a background thread
+  refreshes them, so builds never wait on Spotify once a cache exists
+- On API errors or rate limiting the last good data keeps being served
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import spotipy
+from dotenv import load_dotenv
+from spotipy.oauth2 import SpotifyOAuth
+
+from ..config import CACHE_DIR
+
+SCOPE = 'user-read-currently-playing user-read-recently-played user-top-read'
+DEFAULT_REDIRECT_URI = 'http://localhost:8000/callback'
+
+# Seconds each endpoint's data stays fresh
+DEFAULT_TTLS = {
+    'current_track': 30,
+    'recently_played': 300,
+    'top_tracks': 6 * 60 * 60,
+}
+
+# Back-off used when a 429 response carries no Retry-After header
+DEFAULT_RATE_LIMIT_BACKOFF = 60
+
+
+def format_track(track: Dict) -> Dict:
+    """Reduce a Spotify track object to the fields our templates use."""
+    images = track['album'].get('images') or [{}]
+    url = track['external_urls'].get('spotify')
+    return {
+        'name': track['name'],
+        'artist': track['artists'][0]['name'],
+        'album': track['album']['name'],
+        'album_art': images[0].get('url'),
+        'duration_ms': track.get('duration_ms'),
+        'spotify_url': url,
+        'url': url
+    }
+
+
+def retry_after_seconds(value: Optional[str], now: float) -> int:
+    """
+    Seconds to back off for a Retry-After header value.
+
+    Args:
+        value: Header value, either delay seconds or an HTTP date
+        now: Current Unix time, for HTTP dates
+
+    Returns:
+        The delay, or DEFAULT_RATE_LIMIT_BACKOFF if the header is missing
+        or unparseable
+    """
+    if not value:
+        return DEFAULT_RATE_LIMIT_BACKOFF
+    try:
+        return max(0, int(value))
+    except ValueError:
+        pass
+    try:
+        return max(0, int(parsedate_to_datetime(value).timestamp() - now))
+    except (TypeError, ValueError, OverflowError):
+        return DEFAULT_RATE_LIMIT_BACKOFF
+
+
+class SpotifyService:
+    """
+    Cached access to current, recently played and top tracks.
+
+    Args:
+        cache_path: JSON file holding the cached endpoint data
+        ttls: Freshness per endpoint in seconds (defaults to DEFAULT_TTLS)
+    """
+
+    def __init__(self, cache_path: Path, ttls: Optional[Dict[str, int]] = None):
+        load_dotenv()
+        self.cache_path = Path(cache_path)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.lock = threading.Lock()
+        self.refreshing = False
+        self._sp = None
+
+        # Endpoint name -> function fetching and formatting its data
+        self.endpoints: Dict[str, Callable[[], object]] = {
+            'current_track': self._fetch_current_track,
+            'recently_played': self._fetch_recently_played,
+            'top_tracks': self._fetch_top_tracks,
+        }
+
+        self.cache = {'entries': {}, 'backoff_until': 0}
+        if self.cache_path.exists():
+            try:
+                with open(self.cache_path, encoding='utf-8') as f:
+                    self.cache = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable Spotify cache: {e}")
+
+    @property
+    def configured(self) -> bool:
+        """Whether Spotify credentials are available."""
+        return bool(os.getenv('SPOTIFY_CLIENT_ID') and os.getenv('SPOTIFY_CLIENT_SECRET'))
+
+    def _client(self) -> spotipy.Spotify:
+        """The shared Spotify session, created on first use."""
+        if self._sp is None:
+            self._sp = spotipy.Spotify(
+                auth_manager=SpotifyOAuth(
+                    client_id=os.getenv('SPOTIFY_CLIENT_ID'),
+                    client_secret=os.getenv('SPOTIFY_CLIENT_SECRET'),
+                    redirect_uri=os.getenv('SPOTIFY_REDIRECT_URI', DEFAULT_REDIRECT_URI),
+                    scope=SCOPE,
+                    open_browser=False  # Reuse the token saved by get_token.py
+                ),
+                requests_timeout=5,
+                # Fail fast and fall back to cached data instead of retrying
+                retries=0,
+                status_retries=0
+            )
+        return self._sp
+
+    def get(self, endpoint: str) -> Optional[object]:
+        """
+        Return data for one endpoint.
+
+        Fresh data comes from the cache. Stale data is returned as-is and
+        refreshed in the background. Only when nothing is cached yet does
+        the call wait for Spotify.
+        """
+        entry = self.cache['entries'].get(endpoint)
+        if entry is None:
+            self.refresh([endpoint])
+            entry = self.cache['entries'].get(endpoint)
+        elif self._is_stale(endpoint, entry):
+            self.refresh_in_background()
+
+        return entry['data'] if entry else None
+
+    def get_current_track(self) -> Optional[Dict]:
+        return self.get('current_track')
+
+    def get_recently_played(self):
+        return self.get('recently_played') or []
+
+    def get_top_tracks(self):
+        return self.get('top_tracks') or []
+
+    def get_listening_data(self) -> Dict:
+        """All listening data for templates, fetching missing endpoints concurrently."""
+        missing = [name for name in self.endpoints if name not in self.cache['entries']]
+        if missing:
+            self.refresh(missing)
+
+        data = {name: self.get(name) for name in self.endpoints}
+        data['recently_played'] = data['recently_played'] or []
+        data['top_tracks'] = data['top_tracks'] or []
+        fetched = [entry['fetched_at'] for entry in self.cache['entries'].values()]
+        data['last_updated'] = datetime.fromtimestamp(min(fetched)).isoformat() if fetched else None
+        return data
+
+    def refresh(self, endpoints=None):
+        """
+        Fetch endpoints from Spotify concurrently and update the cache.
+
+        Endpoints that fail keep their previous data. Nothing is fetched
+        while a rate-limit back-off is in effect.
+
+        Args:
+            endpoints: Endpoint names to fetch; None fetches all of them
+        """
+        endpoints = list(endpoints if endpoints is not None else self.endpoints)
+        if not endpoints or not self.configured or time.time() < self.cache.get('backoff_until', 0):
+            return
+
+        try:
+            # Refresh the access token once up front instead of in every
+            # thread; never fall into spotipy's interactive login prompt
+            auth_manager = self._client().auth_manager
+            token = auth_manager.validate_token(auth_manager.cache_handler.get_cached_token())
+            if not token:
+                raise RuntimeError("no saved token, run src/spotify/get_token.py")
+        except Exception as e:
+            print(f"Error authenticating with Spotify: {e}")
+            self.cache['backoff_until'] = time.time() + DEFAULT_RATE_LIMIT_BACKOFF
+            return
+
+        with ThreadPoolExecutor(max_workers=len(endpoints)) as pool:
+            futures = {name: pool.submit(self.endpoints[name]) for name in endpoints}
+
+        now = time.time()
+        entries = self.cache['entries']
+        with self.lock:
+            for name, future in futures.items():
+                try:
+                    entries[name] = {'fetched_at': now, 'data': future.result()}
+                    continue
+                except spotipy.SpotifyException as e:
+                    if e.http_status == 429:
+                        backoff = retry_after_seconds((e.headers or {}).get('Retry-After'), now)
+                        self.cache['backoff_until'] = now + backoff
+                        print(f"Spotify rate limit hit, serving cached data for {backoff}s")
+                    else:
+                        print(f"Error fetching Spotify {name}: {e}")
+                except Exception as e:
+                    print(f"Error fetching Spotify {name}: {e}")
+
+                # Cache the failure as "no data" so callers without a cached
+                # copy do not retry on every call until the TTL passes
+                if name not in entries:
+                    entries[name] = {'fetched_at': now, 'data': None}
+            self._save()
+
+    def refresh_in_background(self):
+        """Refresh stale endpoints on a daemon thread (at most one at a time)."""
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+
+        def run():
+            try:
+                stale = [name for name, entry in self.cache['entries'].items()
+                         if self._is_stale(name, entry)]
+                if stale:
+                    self.refresh(stale)
+            finally:
+                with self.lock:
+                    self.refreshing = False
+
+        threading.Thread(target=run, name='spotify-refresh', daemon=True).start()
+
+    def _is_stale(self, endpoint: str, entry: Dict) -> bool:
+        return time.time() - entry['fetched_at'] > self.ttls[endpoint]
+
+    def _save(self):
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.cache, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def _fetch_current_track(self) -> Optional[Dict]:
+        result = self._client().current_user_playing_track()
+        if not result or not result.get('item'):
+            return None
+        track = format_track(result['item'])
+        track['progress_ms'] = result['progress_ms']
+        # Unix time in ms that progress_ms was read at, so clients can
+        # advance the progress bar themselves between track changes
+        track['progress_at'] = int(time.time() * 1000)
+        track['is_playing'] = result['is_playing']
+        return track
+
+    def fetch_recently_played(self, limit: int = 50, after: Optional[int] = None):
+        """
+        Fetch recently played tracks directly from Spotify, bypassing the cache.
+
+        Args:
+            limit: Number of plays to return (Spotify allows at most 50)
+            after: Only return plays after this Unix timestamp in milliseconds
+        """
+        results = self._client().current_user_recently_played(limit=limit, after=after)
+        return [{**format_track(item['track']), 'played_at': item['played_at']}
+                for item in results['items']]
+
+    def _fetch_recently_played(self):
+        return self.fetch_recently_played(limit=5)
+
+    def _fetch_top_tracks(self, limit: int = 10, time_range: str = 'short_term'):
+        results = self._client().current_user_top_tracks(limit=limit, time_range=time_range)
+        return [format_track(track) for track in results['items']]
+
+
+_service: Optional[SpotifyService] = None
+_service_lock = threading.Lock()
+
+
+def get_spotify_service() -> SpotifyService:
+    """The process-wide SpotifyService, created on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = SpotifyService(CACHE_DIR / 'spotify.json')
+        return _service
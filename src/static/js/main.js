@@ -89,6 +89,22 @@ function initLazyLoading() {
     images.forEach(img => imageObserver.observe(img));
 }
 
+// Video Facades: swap the thumbnail for the player on click
+function initVideoFacades() {
+    document.querySelectorAll('.video-facade a[data-embed]').forEach(link => {
+        link.addEventListener('click', (e) => {
+            e.preventDefault();
+            const embed = link.dataset.embed;
+            const iframe = document.createElement('iframe');
+            iframe.src = embed + (embed.includes('?') ? '&' : '?') + 'autoplay=1';
+            iframe.title = link.getAttribute('aria-label') || 'Video';
+            iframe.allow = 'accelerometer; autoplay; encrypted-media; gyroscope; picture-in-picture';
+            iframe.allowFullscreen = true;
+            link.replaceWith(iframe);
+        });
+    });
+}
+
 // Smooth Scrolling
 function initSmoothScrolling() {
     document.querySelectorAll('a[href^="#"]').forEach(anchor => {
@@ -110,5 +126,6 @@ document.addEventListener('DOMContentLoaded', () => {
     initProgressBar();
     initBackToTop();
     initLazyLoading();
+    initVideoFacades();
     initSmoothScrolling();
 });
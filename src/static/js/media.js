@@ -0,0 +1,81 @@
+// Client-side filtering of the media archive by type and tag
+//
+// media/index.json lists every item once; its type and tag facets map
+// slugs to item positions, so combining filters is a set intersection
+// and needs no further requests.
+
+function initMediaFilters() {
+    const form = document.getElementById('media-filter-form');
+    const typeSelect = document.getElementById('media-type');
+    const tagSelect = document.getElementById('media-tag');
+    const output = document.getElementById('media-results');
+    const pagination = document.getElementById('media-pagination');
+    if (!form || !typeSelect || !tagSelect || !output) return;
+
+    const baseUrl = form.dataset.baseUrl || '';
+    let indexPromise = null;
+
+    function loadIndex() {
+        if (!indexPromise) {
+            indexPromise = fetch(`${baseUrl}/media/index.json`).then(r => r.json());
+        }
+        return indexPromise;
+    }
+
+    function render(index, positions) {
+        output.innerHTML = '';
+        if (!positions.length) {
+            output.innerHTML = '<p class="media-meta">No matching items</p>';
+            return;
+        }
+        for (const position of positions) {
+            const item = index.items[position];
+            const card = document.createElement('article');
+            card.className = 'media-card';
+
+            // Text is set with textContent to avoid injecting markup from the index
+            const meta = document.createElement('span');
+            meta.className = 'media-meta';
+            meta.textContent = item.type + (item.date_added ? ' · added ' + item.date_added.slice(0, 10) : '');
+            const heading = document.createElement('h2');
+            heading.className = 'text-lg font-semibold';
+            const title = document.createElement(item.url ? 'a' : 'span');
+            if (item.url) {
+                title.href = item.url;
+                title.rel = 'noopener';
+            }
+            title.textContent = item.title;
+            heading.appendChild(title);
+            card.append(meta, heading);
+
+            if (item.description) {
+                const description = document.createElement('p');
+                description.className = 'text-gray-300';
+                description.textContent = item.description;
+                card.appendChild(description);
+            }
+            output.appendChild(card);
+        }
+    }
+
+    async function apply() {
+        const type = typeSelect.value;
+        const tag = tagSelect.value;
+        const index = await loadIndex();
+
+        let positions = index.items.map((_, i) => i);
+        if (type) positions = (index.types[type] || {items: []}).items;
+        if (tag) {
+            const tagged = new Set((index.tags[tag] || {items: []}).items);
+            positions = positions.filter(i => tagged.has(i));
+        }
+
+        render(index, positions);
+        if (pagination) pagination.hidden = true;
+    }
+
+    typeSelect.addEventListener('change', apply);
+    tagSelect.addEventListener('change', apply);
+}
+
+document.addEventListener('DOMContentLoaded', initMediaFilters);
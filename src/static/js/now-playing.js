@@ -0,0 +1,56 @@
+// Now-playing widget
+//
+// Pages are built without live Spotify data so they stay byte-identical
+// between builds; the widget is filled in from the now-playing API
+// (src/spotify/api_server.py) instead. Server-Sent Events push track
+// changes; browsers without EventSource poll, and the API's ETags turn
+// unchanged responses into 304s.
+
+function initNowPlaying() {
+    // Every element marked data-now-playing shows the current track: the
+    // sidebar widget on each page, plus e.g. the About page's widget
+    const widgets = document.querySelectorAll('[data-now-playing]');
+    const source = document.querySelector('[data-now-playing][data-api-base]');
+    if (!source) return;
+
+    const apiBase = source.dataset.apiBase;
+
+    function show(widget, track) {
+        const art = widget.querySelector('.album-art');
+        const name = widget.querySelector('.track-name');
+        const artist = widget.querySelector('.artist-name');
+
+        widget.hidden = !track;
+        if (!track) return;
+
+        name.textContent = track.name;
+        name.href = track.url || track.spotify_url || '#';
+        artist.textContent = `by ${track.artist}`;
+        art.hidden = !track.album_art;
+        if (track.album_art) {
+            art.src = track.album_art;
+            art.alt = track.album;
+        }
+    }
+
+    function render(data) {
+        widgets.forEach(widget => show(widget, data.current_track));
+    }
+
+    function poll() {
+        fetch(`${apiBase}/api/current-track`)
+            .then(response => response.json())
+            .then(render)
+            .catch(() => render({}));
+    }
+
+    if (window.EventSource) {
+        const events = new EventSource(`${apiBase}/api/events`);
+        events.addEventListener('current-track', event => render(JSON.parse(event.data)));
+    } else {
+        poll();
+        setInterval(poll, 30000);
+    }
+}
+
+document.addEventListener('DOMContentLoaded', initNowPlaying);
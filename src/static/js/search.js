@@ -0,0 +1,150 @@
+// Client-side search over the prebuilt index in /search/
+//
+// docs.json lists the documents and available shards; each shard
+// (t-<first character>.json) maps terms to flattened postings of
+// [doc delta, score, ...]. Only the shards for the query's terms are
+// fetched, and each one at most once per page view.
+
+const STOP_WORDS = new Set((
+    'a an and are as at be but by for from has have i if in into is it its of on ' +
+    'or so that the their then there these they this to was we were will with you'
+).split(' '));
+
+// Mirrors tokenize() in src/generator/search_index.py
+function tokenize(text) {
+    return text
+        .normalize('NFKD')
+        .replace(/[\u0300-\u036f]/g, '')
+        .toLowerCase()
+        .match(/[a-z0-9]+/g)
+        ?.filter(term => term.length > 1 && !STOP_WORDS.has(term)) || [];
+}
+
+function createSearchIndex(baseUrl) {
+    const shardCache = new Map();
+    let meta = null;
+
+    async function loadMeta() {
+        if (!meta) {
+            const response = await fetch(`${baseUrl}/search/docs.json`);
+            meta = await response.json();
+        }
+        return meta;
+    }
+
+    function loadShard(key) {
+        if (!shardCache.has(key)) {
+            shardCache.set(key, fetch(`${baseUrl}/search/t-${key}.json`)
+                .then(response => response.ok ? response.json() : {})
+                .catch(() => ({})));
+        }
+        return shardCache.get(key);
+    }
+
+    function decodePostings(postings, scores) {
+        let doc = 0;
+        for (let i = 0; i < postings.length; i += 2) {
+            doc += postings[i];
+            scores.set(doc, (scores.get(doc) || 0) + postings[i + 1]);
+        }
+    }
+
+    // Every term must match; the last one also matches as a prefix so
+    // results update while typing
+    async function search(query, limit = 20) {
+        const terms = tokenize(query);
+        if (!terms.length) return [];
+
+        const { shards, docs } = await loadMeta();
+        let results = null;
+
+        for (const [i, term] of terms.entries()) {
+            const key = term[0];
+            const shard = shards.includes(key) ? await loadShard(key) : {};
+            const scores = new Map();
+
+            if (i === terms.length - 1) {
+                for (const candidate of Object.keys(shard)) {
+                    if (candidate.startsWith(term)) decodePostings(shard[candidate], scores);
+                }
+            } else if (shard[term]) {
+                decodePostings(shard[term], scores);
+            }
+
+            if (results === null) {
+                results = scores;
+            } else {
+                for (const doc of [...results.keys()]) {
+                    if (scores.has(doc)) results.set(doc, results.get(doc) + scores.get(doc));
+                    else results.delete(doc);
+                }
+            }
+            if (!results.size) return [];
+        }
+
+        return [...results.entries()]
+            .filter(([doc]) => docs[doc])
+            .sort((a, b) => b[1] - a[1])
+            .slice(0, limit)
+            .map(([doc, score]) => {
+                const [url, title, date, type] = docs[doc];
+                return { url, title, date, type, score };
+            });
+    }
+
+    return { search };
+}
+
+function initSearch() {
+    const form = document.getElementById('search-form');
+    const input = document.getElementById('search-input');
+    const output = document.getElementById('search-results');
+    if (!form || !input || !output) return;
+
+    const baseUrl = form.dataset.baseUrl || '';
+    const index = createSearchIndex(baseUrl);
+    let latestQuery = '';
+
+    function render(results) {
+        if (!results.length) {
+            output.innerHTML = latestQuery ? '<p class="search-empty">No results</p>' : '';
+            return;
+        }
+        output.innerHTML = results.map(result => `
+            <li class="search-result">
+                <a href="${baseUrl}${result.url}" class="search-result-title"></a>
+                <span class="search-result-meta">${result.type}${result.date ? ' · ' + result.date.slice(0, 10) : ''}</span>
+            </li>
+        `).join('');
+        // Titles are set as text to avoid injecting markup from the index
+        output.querySelectorAll('.search-result-title').forEach((link, i) => {
+            link.textContent = results[i].title;
+        });
+    }
+
+    async function run() {
+        const query = input.value.trim();
+        latestQuery = query;
+        const results = query ? await index.search(query) : [];
+        // Ignore responses for queries the user has already typed past
+        if (query === latestQuery) render(results);
+    }
+
+    let timer = null;
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        timer = setTimeout(run, 150);
+    });
+    form.addEventListener('submit', (e) => {
+        e.preventDefault();
+        run();
+    });
+
+    const initial = new URLSearchParams(window.location.search).get('q');
+    if (initial) {
+        input.value = initial;
+        run();
+    }
+}
+
+document.addEventListener('DOMContentLoaded', initSearch);
@@ -0,0 +1,165 @@
+"""
+Shared pytest setup.
+
+Makes the ``src`` package importable from tests/ and provides
+``FakeNotion``, an in-memory stand-in for the Notion client with a blog,
+gigs and media database, for building whole sites offline.
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+TEMPLATE_DIR = ROOT / 'src' / 'templates'
+
+
+def _rich_text(text):
+    return {'rich_text': [{'text': {'content': text}, 'plain_text': text}]}
+
+
+class _Endpoint:
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = 0
+
+    def __call__(self, **params):
+        self.calls += 1
+        return self.handler(**params)
+
+
+class _Namespace:
+    pass
+
+
+class FakeNotion:
+    """
+    Notion client answering from generated databases.
+
+    Args:
+        articles: Number of blog posts
+        gigs: Number of gigs
+        media: Number of media items
+        seed: Seed of the generated content
+    """
+
+    def __init__(self, articles=6, gigs=20, media=8, seed=1):
+        rng = random.Random(seed)
+        self.rows = {
+            'blogdb': [self.article(number, rng) for number in range(articles)],
+            'gigdb': [self.gig(number, rng) for number in range(gigs)],
+            'mediadb': [self.media_item(number, rng) for number in range(media)],
+        }
+        self.bodies = {f'content{number}': f'Body of post {number} about music' for number in range(articles)}
+        # Edit times of content pages, by content page ID, for search and blocks
+        self.content_edits = {}
+
+        self.databases = _Namespace()
+        self.databases.query = _Endpoint(self._query)
+        self.pages = _Namespace()
+        self.pages.retrieve = _Endpoint(self._retrieve)
+        self.blocks = _Namespace()
+        self.blocks.children = _Namespace()
+        self.blocks.children.list = _Endpoint(self._children)
+        self.search = _Endpoint(self._search)
+
+    @staticmethod
+    def article(number, rng):
+        year = rng.randint(2018, 2024)
+        return {
+            'id': f'a{number}', 'created_time': f'{year}-01-01T00:00:00.000Z',
+            'last_edited_time': f'{year}-02-01T00:00:00.000Z',
+            'properties': {
+                'Title': {'title': [{'plain_text': f'Post number {number}'}]},
+                'Date': {'date': {'start': f'{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'}},
+                'Description': {'rich_text': [{'plain_text': f'Description {number}'}]},
+                'Tags': {'multi_select': [{'name': tag} for tag in rng.sample(['music', 'life', 'travel'], 2)]},
+                'Content': _rich_text(f'https://notion.so/Post-{number}-content{number}'),
+            },
+        }
+
+    @staticmethod
+    def gig(number, rng):
+        year = rng.randint(2015, 2024)
+        return {'id': f'g{number}', 'properties': {
+            'Gig': {'title': [{'text': {'content': f'Gig {number}'}}]},
+            'Date': {'date': {'start': f'{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'}},
+            'Artist': _rich_text(rng.choice(['Radiohead', 'Björk', 'Wilco'])),
+            'Venue': _rich_text(rng.choice(['Roundhouse', 'Barrowland'])),
+            'location': _rich_text('London'),
+            'Notes': _rich_text('great'),
+            'Setlist': {'url': f'https://setlist.example/{number}'},
+        }}
+
+    @staticmethod
+    def media_item(number, rng):
+        return {'id': f'm{number}', 'properties': {
+            'Title': {'title': [{'plain_text': f'Media {number}'}]},
+            'Type': {'select': {'name': rng.choice(['Film', 'Book', 'Article'])}},
+            'URL': {'url': f'https://example.com/m{number}'},
+            'Description': _rich_text(f'Desc {number}'),
+            "Why It's Important": _rich_text('because'),
+            'Date Added': {'date': {'start': f'2023-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}'}},
+            'Tags': {'multi_select': [{'name': 'Jazz'}]},
+            'Rating': {'number': rng.randint(1, 5)},
+            'Status': {'select': None},
+        }}
+
+    def _query(self, database_id, start_cursor=None, page_size=100, **params):
+        rows = self.rows[database_id]
+        if 'filter' in params:
+            since = params['filter'].get('last_edited_time', {}).get('on_or_after')
+            edited = [row for row in rows if since and (row.get('last_edited_time') or '') >= since]
+            return {'results': edited, 'has_more': False, 'next_cursor': None}
+        start = int(start_cursor or 0)
+        more = start + page_size < len(rows)
+        return {'results': rows[start:start + page_size], 'has_more': more,
+                'next_cursor': str(start + page_size) if more else None}
+
+    def _retrieve(self, page_id):
+        return next(row for row in self.rows['blogdb'] if row['id'] == page_id)
+
+    def _search(self, start_cursor=None, **params):
+        pages = sorted(self.content_edits.items(), key=lambda item: item[1], reverse=True)
+        return {'results': [{'object': 'page', 'id': page_id, 'last_edited_time': edited}
+                            for page_id, edited in pages], 'has_more': False, 'next_cursor': None}
+
+    def edit(self, number, body, when):
+        """Edit the content page of a post, as a writer in Notion would."""
+        self.bodies[f'content{number}'] = body
+        self.content_edits[f'content{number}'] = when
+
+    def _children(self, block_id, start_cursor=None, **params):
+        edited = {'last_edited_time': self.content_edits.get(block_id, '2024-01-01T00:00:00.000Z')}
+        return {'results': [
+            {'id': f'{block_id}-b1', 'type': 'heading_2', 'heading_2': _rich_text(f'Heading {block_id}'), **edited},
+            {'id': f'{block_id}-b2', 'type': 'paragraph', 'paragraph': _rich_text(self.bodies.get(block_id, '')),
+             **edited},
+        ], 'has_more': False}
+
+
+@pytest.fixture
+def site_env(monkeypatch):
+    """Database IDs of FakeNotion in the environment."""
+    monkeypatch.setenv('NOTION_API_KEY', 'test')
+    monkeypatch.setenv('NOTION_DATABASE_ID', 'blogdb')
+    monkeypatch.setenv('NOTION_GIGS_DATABASE_ID', 'gigdb')
+    monkeypatch.setenv('NOTION_MEDIA_DATABASE_ID', 'mediadb')
+    monkeypatch.setenv('SOURCE_DATE_EPOCH', '1700000000')
+
+
+@pytest.fixture
+def make_generator(site_env, tmp_path):
+    """Factory of SiteGenerators building into tmp_path from a FakeNotion."""
+    from src.generator.site_generator import SiteGenerator
+
+    def make(notion=None, name='site', **kwargs):
+        return SiteGenerator(str(tmp_path / name / 'output'), str(TEMPLATE_DIR),
+                             cache_dir=str(tmp_path / name / 'cache'),
+                             notion=notion or FakeNotion(), **kwargs)
+
+    return make
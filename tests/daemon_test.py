@@ -0,0 +1,133 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+import build
+from src.generator.daemon import BuildDaemon, notion_timestamp
+
+
+class FakeGenerator:
+    """Records the ``since`` of each build; builds wait for ``release`` when given."""
+
+    def __init__(self, release=None, error=None):
+        self.calls = []
+        self.release = release
+        self.error = error
+        self.started = threading.Event()
+
+    def generate_site(self, since=None):
+        self.calls.append(since)
+        self.started.set()
+        if self.release is not None:
+            self.release.wait(5)
+        if self.error:
+            raise self.error
+        return True
+
+
+def test_notion_timestamp_truncates_to_the_minute():
+    moment = datetime(2024, 3, 1, 12, 34, 56, 789, tzinfo=timezone.utc)
+    assert notion_timestamp(moment) == '2024-03-01T12:34:00.000Z'
+
+
+def test_first_build_is_full_and_later_builds_are_incremental():
+    daemon = BuildDaemon(FakeGenerator())
+
+    async def run():
+        first = await daemon.request_build()
+        second = await daemon.request_build()
+        third = await daemon.request_build(full=True)
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert (first['incremental'], second['incremental'], third['incremental']) == (False, True, False)
+    assert daemon.generator.calls[0] is None and daemon.generator.calls[2] is None
+    assert daemon.generator.calls[1] == daemon.since
+    assert daemon.builds == 3
+
+
+def test_requests_during_a_build_share_the_next_build():
+    release = threading.Event()
+    daemon = BuildDaemon(FakeGenerator(release))
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        running = asyncio.create_task(daemon.request_build())
+        await loop.run_in_executor(None, daemon.generator.started.wait, 5)
+        waiting = [asyncio.create_task(daemon.request_build(full=number == 3)) for number in range(5)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await running, await asyncio.gather(*waiting)
+
+    first, rest = asyncio.run(run())
+    assert first['build'] == 1
+    assert {result['build'] for result in rest} == {2}
+    # One of the coalesced requests asked for a full build, so the shared one is full
+    assert rest[0]['incremental'] is False
+    assert (daemon.requests, daemon.builds) == (6, 2)
+
+
+def test_failed_build_is_reported_and_next_request_runs_again():
+    daemon = BuildDaemon(FakeGenerator(error=RuntimeError('Notion is down')))
+
+    async def run():
+        failed = await daemon.request_build()
+        daemon.generator.error = None
+        return failed, await daemon.request_build()
+
+    failed, succeeded = asyncio.run(run())
+    assert failed == {'ok': False, 'error': 'Notion is down'}
+    assert succeeded['ok'] and daemon.last_result == succeeded
+    # A failed build does not advance the sync point
+    assert daemon.generator.calls == [None, None]
+
+
+async def http(port, method, target, token=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    headers = f'Authorization: Bearer {token}\r\n' if token else ''
+    writer.write(f'{method} {target} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n'.encode('latin-1'))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+def test_http_api():
+    daemon = BuildDaemon(FakeGenerator(), token='secret')
+
+    async def run():
+        server = await asyncio.start_server(daemon.handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return [
+                await http(port, 'POST', '/build', token='wrong'),
+                await http(port, 'POST', '/build?full=1', token='secret'),
+                await http(port, 'GET', '/status'),
+                await http(port, 'GET', '/build'),
+                await http(port, 'GET', '/nope'),
+            ]
+        finally:
+            server.close()
+
+    unauthorized, built, status, wrong_method, missing = asyncio.run(run())
+    assert unauthorized == (401, {'ok': False, 'error': 'unauthorized'})
+    assert built[0] == 200 and built[1]['build'] == 1 and built[1]['incremental'] is False
+    assert status[0] == 200 and status[1]['builds'] == 1 and status[1]['last'] == built[1]
+    assert wrong_method[0] == 405
+    assert missing[0] == 404
+
+
+def test_serve_needs_somewhere_to_listen():
+    with pytest.raises(ValueError):
+        asyncio.run(BuildDaemon(FakeGenerator()).serve('127.0.0.1', None, None))
+
+
+def test_cli_rejects_no_tcp_without_a_socket(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        build.main(['daemon', '--no-tcp'])
+    assert exit_info.value.code == 2
+    assert '--no-tcp needs --socket' in capsys.readouterr().err
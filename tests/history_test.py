@@ -0,0 +1,81 @@
+import pytest
+
+from src.spotify.history import ListeningHistory
+
+
+def play(played_at, name, artist, album='Album'):
+    return {'played_at': played_at, 'name': name, 'artist': artist, 'album': album,
+            'spotify_url': f'https://open.spotify.com/track/{name}', 'duration_ms': 200000}
+
+
+PLAYS = [
+    play('2024-01-30T21:00:00.000Z', 'Reckoner', 'Radiohead'),
+    play('2024-01-31T08:00:00.000Z', 'Reckoner', 'Radiohead'),
+    play('2024-01-31T09:00:00.000Z', 'Nude', 'Radiohead'),
+    play('2024-02-01T10:00:00.000Z', 'Jesus, Etc.', 'Wilco'),
+    play('2024-02-01T11:00:00.000Z', 'Impossible Germany', 'Wilco'),
+    play('2024-02-05T12:00:00.000Z', 'Jóga', 'Björk'),
+]
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = ListeningHistory(tmp_path / 'data' / 'listening.db')
+    yield history
+    history.close()
+
+
+class FakeService:
+    def __init__(self, plays):
+        self.plays = plays
+        self.calls = []
+
+    def fetch_recently_played(self, limit=50, after=None):
+        self.calls.append(after)
+        return self.plays
+
+
+def test_append_skips_recorded_plays(history):
+    assert history.append(PLAYS[:4]) == 4
+    assert history.append(PLAYS) == 2
+    assert history.append(PLAYS) == 0
+    assert history.latest_played_at() == '2024-02-05T12:00:00.000Z'
+
+
+def test_collect_asks_only_for_newer_plays(history):
+    service = FakeService(PLAYS[:2])
+    assert history.collect(service) == 2
+    service.plays = PLAYS
+    assert history.collect(service) == 4
+    assert service.calls == [None, 1706688000000]
+
+
+def test_stats_aggregate_plays(history):
+    history.append(PLAYS)
+    stats = history.stats(top_n=2)
+
+    assert (stats['total_plays'], stats['unique_artists'], stats['unique_tracks']) == (6, 3, 5)
+    assert (stats['first_play'], stats['last_play']) == (PLAYS[0]['played_at'], PLAYS[-1]['played_at'])
+    assert stats['top_artists'] == [{'artist': 'Radiohead', 'plays': 3, 'tracks': 2},
+                                    {'artist': 'Wilco', 'plays': 2, 'tracks': 2}]
+    assert stats['months'] == [
+        {'month': '2024-02', 'plays': 3, 'artists': 2, 'top_artist': 'Wilco', 'top_artist_plays': 2},
+        {'month': '2024-01', 'plays': 3, 'artists': 1, 'top_artist': 'Radiohead', 'top_artist_plays': 3},
+    ]
+    assert stats['streaks'][0] == {'start': '2024-01-30', 'end': '2024-02-01', 'days': 3}
+    assert stats['streaks'][1] == {'start': '2024-02-05', 'end': '2024-02-05', 'days': 1}
+
+
+def test_gig_overlap_matches_artists_case_insensitively(history):
+    history.append(PLAYS)
+    stats = history.stats(gig_artists={'WILCO': 4, 'radiohead': 1, 'Sigur Rós': 2})
+    assert stats['gig_overlap'] == [{'artist': 'radiohead', 'gigs': 1, 'plays': 3},
+                                    {'artist': 'WILCO', 'gigs': 4, 'plays': 2}]
+    assert history.stats()['gig_overlap'] == []
+
+
+def test_empty_history(history):
+    stats = history.stats()
+    assert stats['total_plays'] == 0
+    assert stats['top_artists'] == stats['months'] == stats['streaks'] == []
+    assert history.latest_played_at() is None
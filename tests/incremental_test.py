@@ -0,0 +1,77 @@
+import pytest
+
+import build
+from conftest import FakeNotion
+
+SINCE = '2025-01-01T00:00:00.000Z'
+LATER = '2025-02-01T00:00:00.000Z'
+
+
+@pytest.fixture
+def built(make_generator):
+    """A generator that has completed a full build, and its FakeNotion."""
+    notion = FakeNotion(articles=6)
+    generator = make_generator(notion)
+    assert generator.generate_site()
+    return generator, notion
+
+
+def test_edited_rows_finds_row_and_content_page_edits(built):
+    generator, notion = built
+    notion.rows['blogdb'][2]['last_edited_time'] = LATER
+    notion.edit(4, 'Rewritten body', LATER)
+    notion.content_edits['content5'] = '2024-12-31T00:00:00.000Z'
+
+    generator.planner = generator._new_planner()
+    edited = generator._edited_rows('blogdb', SINCE)
+    assert sorted(row['id'] for row in edited) == ['a2', 'a4']
+
+
+def test_edited_rows_lists_a_row_once(built):
+    generator, notion = built
+    notion.rows['blogdb'][3]['last_edited_time'] = LATER
+    notion.edit(3, 'Rewritten body', LATER)
+
+    generator.planner = generator._new_planner()
+    assert [row['id'] for row in generator._edited_rows('blogdb', SINCE)] == ['a3']
+
+
+def test_incremental_build_without_edits_changes_nothing(built):
+    generator, notion = built
+    fetched = notion.blocks.children.list.calls
+    assert generator.generate_site(since=SINCE) is False
+    assert notion.blocks.children.list.calls == fetched
+
+
+def test_incremental_build_fetches_and_publishes_only_edits(built, make_generator, tmp_path):
+    generator, notion = built
+    output_dir = tmp_path / 'site' / 'output'
+    fetched = notion.blocks.children.list.calls
+
+    notion.edit(4, 'Rewritten body', LATER)
+    assert generator.generate_site(since=SINCE) is True
+    assert notion.blocks.children.list.calls == fetched + 1
+    assert 'Rewritten body' in (output_dir / 'posts' / 'post-number-4' / 'index.html').read_text()
+
+    # The result matches a full build of the edited content
+    assert make_generator(notion, name='full').generate_site()
+    for page in ['index.html', 'posts/post-number-1/index.html', 'posts/post-number-4/index.html']:
+        assert (output_dir / page).read_bytes() == (tmp_path / 'full' / 'output' / page).read_bytes(), page
+
+
+def test_watch_polls_from_before_the_first_build(monkeypatch):
+    calls = []
+
+    class Generator:
+        def generate_site(self, since=None):
+            calls.append(since)
+            return False
+
+    def sleep(seconds):
+        if calls:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(build.time, 'sleep', sleep)
+    with pytest.raises(KeyboardInterrupt):
+        build.poll_notion(Generator(), 30, SINCE)
+    assert calls == [SINCE]
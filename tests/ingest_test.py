@@ -0,0 +1,82 @@
+import pytest
+
+from conftest import FakeNotion
+from src.notion.ingest import GIG_SCHEMA, MEDIA_SCHEMA, Field, Schema
+
+
+def text(value):
+    return {'rich_text': [{'plain_text': value}]}
+
+
+def gig_row(**properties):
+    row = {
+        'Gig': {'title': [{'text': {'content': 'Roundhouse night'}}]},
+        'Date': {'date': {'start': '2019-05-04'}},
+        'Artist': text('Radiohead'),
+        'Venue': text('Roundhouse'),
+        'location': text('London'),
+        'Notes': text(''),
+        'Setlist': {'url': 'https://setlist.example/1'},
+    }
+    row.update(properties)
+    return {'properties': {name: value for name, value in row.items() if value is not None}}
+
+
+def test_gig_schema_extracts_transforms_and_defaults():
+    records = GIG_SCHEMA.ingest([
+        gig_row(),
+        gig_row(Gig={'title': []}, location=None, Setlist={'url': None}),
+    ])
+    assert records == [
+        {'id': 'Roundhouse night', 'date': '2019-05-04', 'year': '2019', 'artist': 'Radiohead',
+         'venue': 'Roundhouse', 'location': 'London', 'notes': None,
+         'setlist_url': 'https://setlist.example/1'},
+        {'id': '2', 'date': '2019-05-04', 'year': '2019', 'artist': 'Radiohead',
+         'venue': 'Roundhouse', 'location': 'Roundhouse', 'notes': None, 'setlist_url': None},
+    ]
+
+
+def test_rows_missing_required_properties_are_skipped(capsys):
+    records = GIG_SCHEMA.ingest([gig_row(Artist=text('  ')), gig_row(Date={'date': None}), gig_row()])
+    assert len(records) == 1
+    out = capsys.readouterr().out
+    assert 'Skipping gig 1: Missing Artist' in out
+    assert 'Skipping gig 2: Missing Date' in out
+
+
+def test_media_schema_reads_selects_numbers_and_tags():
+    row = {'properties': {
+        'Title': {'title': [{'plain_text': 'Kind of Blue'}]},
+        'Type': {'select': {'name': 'Album'}},
+        'Rating': {'number': 5},
+        'Status': {'select': None},
+        'Tags': {'multi_select': []},
+    }}
+    assert MEDIA_SCHEMA.ingest([row, {'properties': {'Title': row['properties']['Title']}}]) == [{
+        'title': 'Kind of Blue', 'type': 'Album', 'url': None, 'description': None,
+        'why_important': None, 'date_added': None, 'tags': [], 'rating': 5, 'status': None,
+    }]
+
+
+def test_schemas_declare_new_databases():
+    schema = Schema('book', 'NOTION_BOOKS_DATABASE_ID', [
+        Field('title', 'Name', 'title', required=True),
+        Field('read', 'Read', 'checkbox'),
+        Field('shelves', 'Shelves', 'multi_select', transform=sorted),
+    ])
+    row = {'properties': {'Name': {'title': [{'plain_text': 'Dune'}]}, 'Read': {'checkbox': True},
+                          'Shelves': {'multi_select': [{'name': 'sf'}, {'name': 'classic'}]}}}
+    assert schema.ingest([row]) == [{'title': 'Dune', 'read': True, 'shelves': ['classic', 'sf']}]
+
+    with pytest.raises(ValueError):
+        Field('cover', 'Cover', 'files')
+
+
+def test_build_follows_query_cursors(make_generator):
+    notion = FakeNotion(gigs=250)
+    generator = make_generator(notion)
+    generator.generate_site()
+
+    # 100 rows per response: three queries for the gigs, one each for posts and media
+    assert notion.databases.query.calls == 5
+    assert len(generator.gig_index.gigs) == 250
@@ -0,0 +1,128 @@
+import asyncio
+from collections import Counter
+
+import httpx
+
+from src.generator.link_checker import PER_HOST_LIMIT, LinkChecker, extract_links, is_broken, report
+
+
+class MockSite:
+    """MockTransport handler deciding each response from the URL path."""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.in_flight = Counter()
+        self.peak = Counter()
+
+    async def __call__(self, request):
+        host, path = request.url.host, request.url.path
+        self.requests[request.method, path] += 1
+        self.in_flight[host] += 1
+        self.peak[host] = max(self.peak[host], self.in_flight[host])
+        try:
+            await asyncio.sleep(0.005)
+            if path.startswith('/no-head') and request.method == 'HEAD':
+                return httpx.Response(405)
+            if path.startswith('/drops-head') and request.method == 'HEAD':
+                raise httpx.RemoteProtocolError('connection reset', request=request)
+            if path.startswith('/gone'):
+                return httpx.Response(404)
+            if path.startswith('/slow'):
+                raise httpx.ReadTimeout('timed out', request=request)
+            if path.startswith('/limited'):
+                return httpx.Response(429)
+            return httpx.Response(200)
+        finally:
+            self.in_flight[host] -= 1
+
+    def checker(self, cache_dir):
+        return LinkChecker(cache_dir, httpx.AsyncClient(transport=httpx.MockTransport(self)))
+
+
+def test_extract_links_keeps_external_links_once():
+    content_html = ('<a href="https://a.example/x?a=1&amp;b=2">x</a><a href="/posts/local/">local</a>'
+                    '<a href="http://b.example/">b</a><a href="https://a.example/x?a=1&amp;b=2">again</a>')
+    assert extract_links(content_html) == ['https://a.example/x?a=1&b=2', 'http://b.example/']
+    assert extract_links(None) == []
+
+
+def test_head_falls_back_to_get(tmp_path):
+    site = MockSite()
+    results = site.checker(tmp_path).check([
+        'https://a.example/ok', 'https://a.example/no-head', 'https://a.example/drops-head',
+        'https://a.example/gone', 'https://a.example/slow',
+    ])
+
+    assert {url.rsplit('/', 1)[1]: result['status'] for url, result in results.items()} == {
+        'ok': 200, 'no-head': 200, 'drops-head': 200, 'gone': 404, 'slow': None}
+    assert results['https://a.example/slow']['error'].startswith('timeout')
+    assert site.requests['GET', '/ok'] == 0
+    assert site.requests['GET', '/no-head'] == 1
+    assert site.requests['GET', '/drops-head'] == 1
+    assert site.requests['GET', '/gone'] == 1
+    assert site.requests['GET', '/slow'] == 0
+
+
+def test_rate_limited_links_are_neither_broken_nor_cached(tmp_path):
+    site = MockSite()
+    results = site.checker(tmp_path).check(['https://a.example/limited', 'https://a.example/ok'])
+    assert list(results) == ['https://a.example/ok']
+
+    checker = site.checker(tmp_path)
+    checker.check(['https://a.example/limited', 'https://a.example/ok'])
+    assert checker.checked == 1
+    assert site.requests['HEAD', '/limited'] == 2
+
+
+def test_cached_results_are_not_checked_again(tmp_path):
+    site = MockSite()
+    urls = ['https://a.example/ok', 'https://a.example/gone']
+    first = site.checker(tmp_path).check(urls)
+
+    checker = site.checker(tmp_path)
+    assert checker.check(urls) == first
+    assert checker.checked == 0
+    assert sum(site.requests.values()) == 3
+
+    checker.check(urls, recheck=True)
+    assert checker.checked == 2
+
+
+def test_expired_results_are_checked_again(tmp_path):
+    site = MockSite()
+    checker = site.checker(tmp_path)
+    checker.check(['https://a.example/ok', 'https://a.example/gone'])
+    # Broken links expire after a day, working ones after a week
+    for result in checker.results.values():
+        result['checked'] -= 2 * 24 * 3600
+    checker.check(['https://a.example/ok', 'https://a.example/gone'])
+    assert checker.checked == 1
+    assert site.requests['HEAD', '/gone'] == 2
+
+
+def test_requests_per_host_are_limited(tmp_path):
+    site = MockSite()
+    urls = [f'https://h{n % 3}.example/ok/{n}' for n in range(90)]
+    results = site.checker(tmp_path).check(urls)
+    assert len(results) == 90
+    assert max(site.peak.values()) == PER_HOST_LIMIT
+
+
+def test_report_lists_broken_links_per_page(tmp_path, capsys):
+    ok, gone, slow = 'https://a.example/ok', 'https://a.example/gone', 'https://a.example/slow'
+    results = MockSite().checker(tmp_path).check([ok, gone, slow])
+    assert is_broken(results[gone]) and is_broken(results[slow]) and not is_broken(results[ok])
+
+    broken = report({'/posts/a/': [ok, gone], '/posts/b/': [ok], '/posts/c/': [slow, gone]}, results)
+    assert broken == {'/posts/a/': [gone], '/posts/c/': [slow, gone]}
+    assert '/posts/b/' not in capsys.readouterr().out
+
+
+def test_outbound_links_of_a_build(make_generator):
+    generator = make_generator()
+    generator.generate_site()
+    links = generator.outbound_links()
+
+    year_pages = {page: urls for page, urls in links.items() if page.startswith('/gigs/years/')}
+    assert sorted(url for urls in year_pages.values() for url in urls) == sorted(
+        f'https://setlist.example/{number}' for number in range(20))
@@ -0,0 +1,121 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from src.generator import link_previews
+from src.generator.link_previews import LinkPreviews, parse_metadata
+from src.generator.output import OutputWriter
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\0' * 32
+
+PAGES = {
+    '/article': ('text/html; charset=utf-8', 200,
+                 b'<html><head><title>Fallback</title>'
+                 b'<meta property="og:title" content="An  article">'
+                 b'<meta name="description" content="What it is &amp; why">'
+                 b'<meta property="og:image" content="/cover.png"></head><body>ignored</body></html>'),
+    '/cover.png': ('image/png', 200, PNG),
+    '/plain': ('text/html', 200, b'<html><head><title>Only a title</title></head></html>'),
+    '/busy': ('text/html', 429, b''),
+    '/file.pdf': ('application/pdf', 200, b'%PDF'),
+}
+
+
+@pytest.fixture
+def server():
+    """Local server for PAGES, counting the requests per path."""
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            content_type, status, body = PAGES.get(self.path, ('text/html', 404, b''))
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_port}', requests
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def cards(base, *paths):
+    return ''.join(f'<a href="{base}{path}" class="bookmark" target="_blank">{path}</a>' for path in paths)
+
+
+def previews(tmp_path, content_html, article_id='a'):
+    stage = LinkPreviews(tmp_path / 'cache', httpx.Client())
+    stage.scan(article_id, content_html)
+    stage.prepare([article_id])
+    return stage
+
+
+def test_parse_metadata_prefers_opengraph():
+    metadata = parse_metadata(PAGES['/article'][2].decode(), 'https://example.com/a/article')
+    assert metadata == {'title': 'An article', 'description': 'What it is & why',
+                        'image': 'https://example.com/cover.png'}
+    assert parse_metadata('<title> Just  this </title>', 'https://example.com/')['title'] == 'Just this'
+
+
+def test_enriches_cards_and_mirrors_images(server, tmp_path):
+    base, requests = server
+    content_html = cards(base, '/article', '/plain')
+    stage = previews(tmp_path, content_html)
+
+    enriched = stage.enrich(content_html, '/site')
+    assert '<div class="bookmark-title">An article</div>' in enriched
+    assert '<div class="bookmark-description">What it is &amp; why</div>' in enriched
+    assert '<div class="bookmark-title">Only a title</div>' in enriched
+    image = stage.previews[f'{base}/article']['image']
+    assert f'src="/site/link-previews/{image}"' in enriched
+    assert sorted(requests) == ['/article', '/cover.png', '/plain']
+
+    output = OutputWriter(tmp_path / 'out', tmp_path / 'cache')
+    stage.publish(output, ['a'])
+    assert (tmp_path / 'out' / 'link-previews' / image).read_bytes() == PNG
+
+
+def test_failures_are_cached_and_leave_cards_alone(server, tmp_path):
+    base, requests = server
+    content_html = cards(base, '/busy', '/file.pdf', '/missing')
+    stage = previews(tmp_path, content_html)
+
+    assert stage.enrich(content_html, '') == content_html
+    assert all(not preview['ok'] for preview in stage.previews.values())
+    assert stage.signature('a') == [(url, None) for url in sorted(stage.previews)]
+    assert sorted(requests) == ['/busy', '/file.pdf', '/missing']
+
+
+def test_warm_build_makes_no_requests(server, tmp_path):
+    base, requests = server
+    content_html = cards(base, '/article', '/busy')
+    cold = previews(tmp_path, content_html)
+    requests.clear()
+
+    warm = previews(tmp_path, content_html)
+    assert requests == []
+    assert warm.enrich(content_html, '') == cold.enrich(content_html, '')
+
+
+def test_expired_entries_are_fetched_again(server, tmp_path):
+    base, requests = server
+    stage = previews(tmp_path, cards(base, '/article', '/busy'))
+    requests.clear()
+
+    # Past FAILURE_TTL only the failure is retried; the success is still fresh
+    for preview in stage.previews.values():
+        preview['fetched'] -= link_previews.FAILURE_TTL + 1
+    stage.cache_path.write_text(json.dumps(stage.previews))
+    previews(tmp_path, cards(base, '/article', '/busy'))
+    assert requests == ['/busy']
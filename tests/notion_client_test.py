@@ -0,0 +1,111 @@
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.notion.client import RateLimiter, RetryTransport, _parse_retry_after
+
+
+class ScriptedTransport(httpx.BaseTransport):
+    """Answers requests from a list of statuses or exceptions, recording attempt times."""
+
+    def __init__(self, *script, headers=None):
+        self.script = list(script)
+        self.headers = headers or {}
+        self.attempts = []
+        self.lock = threading.Lock()
+
+    def handle_request(self, request):
+        with self.lock:
+            self.attempts.append(time.monotonic())
+            step = self.script.pop(0) if len(self.script) > 1 else self.script[0]
+        if isinstance(step, Exception):
+            raise step
+        return httpx.Response(step, headers=self.headers, json={}, request=request)
+
+
+def client(transport, rate=1000.0, **kwargs):
+    retry = RetryTransport(transport, RateLimiter(rate, burst=1000), backoff_base=0.001, **kwargs)
+    return httpx.Client(transport=retry), retry
+
+
+def test_rate_limiter_paces_after_the_burst():
+    limiter = RateLimiter(rate=50, burst=2)
+    started = time.monotonic()
+    for _ in range(7):
+        limiter.acquire()
+    # Two tokens up front, then one every 20 ms
+    assert time.monotonic() - started >= 5 / 50 * 0.9
+
+
+def test_rate_limiter_pause_holds_back_the_next_request():
+    limiter = RateLimiter(rate=100, burst=5)
+    limiter.pause(0.1)
+    started = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - started >= 0.09
+
+
+@pytest.mark.parametrize('status', [500, 502, 503, 504])
+def test_server_errors_are_retried(status):
+    transport = ScriptedTransport(status, status, 200)
+    http, retry = client(transport)
+    assert http.get('https://api.notion.com/v1/x').status_code == 200
+    assert (retry.requests, retry.retries) == (3, 2)
+
+
+def test_client_errors_are_not_retried():
+    transport = ScriptedTransport(404)
+    http, retry = client(transport)
+    assert http.get('https://api.notion.com/v1/x').status_code == 404
+    assert retry.retries == 0
+
+
+def test_gives_up_after_max_retries():
+    transport = ScriptedTransport(503)
+    http, retry = client(transport, max_retries=2)
+    assert http.get('https://api.notion.com/v1/x').status_code == 503
+    assert len(transport.attempts) == 3
+
+
+def test_network_errors_are_retried_then_raised():
+    error = httpx.ConnectError('refused')
+    http, _ = client(ScriptedTransport(error, 200))
+    assert http.get('https://api.notion.com/v1/x').status_code == 200
+
+    http, _ = client(ScriptedTransport(error), max_retries=1)
+    with pytest.raises(httpx.ConnectError):
+        http.get('https://api.notion.com/v1/x')
+
+
+def test_rate_limit_waits_for_retry_after():
+    transport = ScriptedTransport(429, 200, headers={'Retry-After': '0.2'})
+    http, retry = client(transport)
+    assert http.get('https://api.notion.com/v1/x').status_code == 200
+    assert transport.attempts[1] - transport.attempts[0] >= 0.19
+    assert retry.retries == 1
+
+
+def test_counters_are_exact_across_threads():
+    transport = ScriptedTransport(*([503, 200] * 200 + [200]))
+    http, retry = client(transport, rate=1e6)
+
+    def fetch():
+        for _ in range(50):
+            http.get('https://api.notion.com/v1/x')
+
+    threads = [threading.Thread(target=fetch) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert retry.requests == len(transport.attempts)
+    assert retry.requests - retry.retries == 200
+
+
+def test_parse_retry_after():
+    assert _parse_retry_after('1.5') == 1.5
+    assert _parse_retry_after('-3') == 0.0
+    assert _parse_retry_after(None) is None
+    assert _parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') is None
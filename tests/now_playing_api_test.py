@@ -0,0 +1,89 @@
+import asyncio
+
+from src.spotify.api_server import SUBSCRIBER_QUEUE_SIZE, NowPlayingServer, Payload, etag_matches
+
+
+class FakeService:
+    def __init__(self):
+        self.ttls = {'current_track': 15, 'recently_played': 60, 'top_tracks': 3600}
+        self.cache = {'entries': {}}
+
+    def play(self, name, progress_ms, is_playing=True):
+        self.cache['entries']['current_track'] = {'fetched_at': 0, 'data': {
+            'name': name, 'artist': 'Artist', 'spotify_url': f'https://open.spotify.com/track/{name}',
+            'duration_ms': 200000, 'progress_ms': progress_ms, 'progress_at': progress_ms,
+            'is_playing': is_playing,
+        }}
+
+
+class FakeTransport:
+    def __init__(self):
+        self.aborted = False
+
+    def abort(self):
+        self.aborted = True
+
+
+class FakeWriter:
+    def __init__(self):
+        self.transport = FakeTransport()
+
+
+def test_progress_does_not_change_etag_or_notify():
+    async def run():
+        service = FakeService()
+        server = NowPlayingServer(service)
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        server.subscribers[queue] = FakeWriter()
+
+        service.play('one', 1000)
+        server._update_payloads()
+        etag = server.payloads['/api/current-track'].etag
+
+        service.play('one', 16000)
+        server._update_payloads()
+        payload = server.payloads['/api/current-track']
+        assert payload.etag == etag
+        assert b'16000' in payload.body
+        assert queue.qsize() == 1
+
+        service.play('one', 17000, is_playing=False)
+        server._update_payloads()
+        service.play('two', 0)
+        server._update_payloads()
+        assert server.payloads['/api/current-track'].etag != etag
+        assert queue.qsize() == 3
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_is_disconnected():
+    async def run():
+        service = FakeService()
+        server = NowPlayingServer(service)
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        writer = FakeWriter()
+        server.subscribers[queue] = writer
+
+        for track in range(SUBSCRIBER_QUEUE_SIZE + 1):
+            service.play(str(track), 0)
+            server._update_payloads()
+
+        assert queue.qsize() == SUBSCRIBER_QUEUE_SIZE
+        assert writer.transport.aborted
+        assert queue not in server.subscribers
+
+    asyncio.run(run())
+
+
+def test_current_track_etag_is_weak():
+    track = Payload({'current_track': {'progress_ms': 1}}, ['url', 'name', 'artist', True])
+    assert track.etag.startswith('W/"')
+    assert not Payload({'top_tracks': []}).etag.startswith('W/')
+
+    assert etag_matches(track.etag, track.etag)
+    assert etag_matches(track.etag[2:], track.etag)
+    assert etag_matches(f'"other", {track.etag}', track.etag)
+    assert etag_matches('*', track.etag)
+    assert not etag_matches('"other"', track.etag)
+    assert not etag_matches(None, track.etag)
@@ -0,0 +1,74 @@
+import hashlib
+import json
+
+from src.generator.deploy import MANIFEST_NAME, diff_manifests, load_manifest
+from src.generator.output import OutputWriter
+
+
+def sha1(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def test_write_skips_unchanged_files(tmp_path):
+    writer = OutputWriter(tmp_path / 'out', tmp_path / 'cache')
+    assert writer.write('index.html', 'hello')
+    assert not writer.write('index.html', 'hello')
+    assert writer.write('index.html', 'changed')
+    assert (tmp_path / 'out' / 'index.html').read_text() == 'changed'
+    assert not list((tmp_path / 'out').glob('.*.tmp'))
+
+
+def test_finish_prunes_files_not_produced_again(tmp_path):
+    out = tmp_path / 'out'
+    writer = OutputWriter(out, tmp_path / 'cache')
+    writer.write('posts/a/index.html', 'a')
+    writer.write('posts/b/index.html', 'b')
+    writer.finish()
+
+    writer = OutputWriter(out, tmp_path / 'cache')
+    writer.write('posts/a/index.html', 'a')
+    assert writer.finish() == ['posts/b/index.html']
+    assert not (out / 'posts' / 'b').exists()
+    assert json.loads((tmp_path / 'cache' / 'output.json').read_text()) == {'posts/a/index.html': sha1(b'a')}
+
+
+def test_keep_carries_previous_outputs(tmp_path):
+    out = tmp_path / 'out'
+    writer = OutputWriter(out, tmp_path / 'cache')
+    writer.write('feed.xml', 'feed')
+    writer.finish()
+
+    writer = OutputWriter(out, tmp_path / 'cache')
+    writer.keep('feed.xml')
+    assert writer.finish() == []
+    assert (out / 'feed.xml').exists()
+    assert load_manifest(out / MANIFEST_NAME)['feed.xml'] == {'sha1': sha1(b'feed'), 'size': 4}
+
+
+def test_keep_hashes_files_missing_from_previous_manifest(tmp_path):
+    out = tmp_path / 'out'
+    # Written by a build that failed before saving its manifest
+    OutputWriter(out, tmp_path / 'cache').write('posts/a/index.html', 'a')
+
+    writer = OutputWriter(out, tmp_path / 'cache')
+    writer.keep('posts/a/index.html')
+    writer.keep('posts/missing/index.html')
+    writer.finish()
+    assert set(load_manifest(out / MANIFEST_NAME)) == {'posts/a/index.html'}
+
+
+def test_deploy_manifest_diff(tmp_path):
+    out = tmp_path / 'out'
+    writer = OutputWriter(out, tmp_path / 'cache')
+    writer.write('a.html', 'a')
+    writer.write('b.html', 'b')
+    writer.finish()
+    old = load_manifest(out / MANIFEST_NAME)
+
+    writer = OutputWriter(out, tmp_path / 'cache')
+    writer.write('a.html', 'a2')
+    writer.write('c.html', 'c')
+    writer.finish()
+    changed, deleted = diff_manifests(old, load_manifest(out / MANIFEST_NAME))
+    assert changed == ['a.html', 'c.html']
+    assert deleted == ['b.html']
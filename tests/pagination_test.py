@@ -0,0 +1,94 @@
+import random
+
+from conftest import FakeNotion
+from src.generator.pagination import page_path, paginate, paginate_from_oldest
+
+
+def test_page_path():
+    assert page_path('/', 1) == '/'
+    assert page_path('', 2) == '/page/2/'
+    assert page_path('gigs/artists/bjork', 1) == '/gigs/artists/bjork/'
+    assert page_path('/gigs/artists/bjork/', 3) == '/gigs/artists/bjork/page/3/'
+
+
+def test_paginate_links_pages():
+    pages = list(paginate(list(range(23)), 10, '/archive/'))
+    assert [(path, len(items)) for path, items, _ in pages] == [
+        ('/archive/', 10), ('/archive/page/2/', 10), ('/archive/page/3/', 3)]
+    assert pages[1][2] == {'current_page': 2, 'total_pages': 3,
+                           'prev_page': '/archive/', 'next_page': '/archive/page/3/'}
+    assert pages[0][2]['prev_page'] is None and pages[2][2]['next_page'] is None
+
+
+def test_single_page_has_no_pagination():
+    assert list(paginate([1, 2], 10, '/tags/x/')) == [('/tags/x/', [1, 2], None)]
+    assert list(paginate([], 10, '/')) == [('/', [], None)]
+
+
+def test_paginate_from_oldest_numbers_pages_from_the_oldest_item():
+    newest_first = list(range(34, 0, -1))
+    pages = list(paginate_from_oldest(newest_first, 10, '/archive/'))
+    assert [(path, items[0], items[-1]) for path, items, _ in pages] == [
+        ('/archive/', 34, 21), ('/archive/page/2/', 20, 11), ('/archive/page/1/', 10, 1)]
+    assert pages[0][2] == {'current_page': None, 'total_pages': None,
+                           'prev_page': None, 'next_page': '/archive/page/2/'}
+    assert pages[1][2] == {'current_page': 2, 'total_pages': None,
+                           'prev_page': '/archive/', 'next_page': '/archive/page/1/'}
+    assert pages[2][2]['next_page'] is None
+
+
+def test_paginate_from_oldest_keeps_numbered_pages_as_items_are_added():
+    before = {path: (items, pagination) for path, items, pagination
+              in paginate_from_oldest(list(range(35, 0, -1)), 10, '/')}
+    after = {path: (items, pagination) for path, items, pagination
+             in paginate_from_oldest(list(range(36, 0, -1)), 10, '/')}
+    assert {path for path in after if before.get(path) != after[path]} == {'/'}
+
+    # Filling a page splits it off the first page and relinks its older neighbour
+    grown = {path: (items, pagination) for path, items, pagination
+             in paginate_from_oldest(list(range(40, 0, -1)), 10, '/')}
+    assert {path for path in grown if after.get(path) != grown[path]} == {'/', '/page/3/', '/page/2/'}
+    assert grown['/page/1/'] == after['/page/1/']
+
+
+def test_paginate_from_oldest_keeps_short_listings_on_one_page():
+    assert list(paginate_from_oldest(list(range(19)), 10, '/tags/x/')) == [('/tags/x/', list(range(19)), None)]
+    assert list(paginate_from_oldest([], 10, '/')) == [('/', [], None)]
+
+
+def test_build_writes_every_listing_page(make_generator, tmp_path):
+    generator = make_generator(FakeNotion(articles=33, gigs=60))
+    generator.generate_site()
+    output = tmp_path / 'site' / 'output'
+
+    assert (output / 'page' / '1' / 'index.html').exists()
+    assert (output / 'page' / '2' / 'index.html').exists()
+    assert not (output / 'page' / '3').exists()
+    assert (output / 'gigs' / 'page' / '3' / 'index.html').exists()
+    second = (output / 'page' / '2' / 'index.html').read_text()
+    assert 'href="/page/1/"' in second and 'href="/"' in second
+    assert 'Page 2' in second and 'Latest' in (output / 'index.html').read_text()
+
+
+def listing_pages(output):
+    return {path.relative_to(output).as_posix(): path.read_bytes()
+            for pattern in ['index.html', 'page/*/index.html', 'archive/**/index.html']
+            for path in output.glob(pattern)}
+
+
+def test_new_post_rewrites_only_the_first_listing_page(make_generator, tmp_path):
+    notion = FakeNotion(articles=34)
+    make_generator(notion).generate_site()
+    output = tmp_path / 'site' / 'output'
+    before = listing_pages(output)
+
+    new_post = FakeNotion.article(34, random.Random(1))
+    new_post['properties']['Date'] = {'date': {'start': '2025-01-01'}}
+    new_post['properties']['Tags'] = {'multi_select': []}
+    notion.rows['blogdb'].append(new_post)
+    notion.bodies['content34'] = 'Body of post 34'
+    make_generator(notion).generate_site()
+
+    after = listing_pages(output)
+    assert set(after) == set(before)
+    assert {page for page in after if after[page] != before[page]} == {'index.html', 'archive/index.html'}
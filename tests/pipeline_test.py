@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from src.generator.pipeline import run_pipeline
+
+
+def test_positions_match_the_source_with_many_workers():
+    def slow_square(value):
+        time.sleep(0.001 * (value % 3))
+        return value * value
+
+    results = list(run_pipeline(range(50), [(slow_square, 4), (str, 2)], queue_size=4))
+    assert sorted(position for position, _, _ in results) == list(range(50))
+    assert all(result == str(position * position) and error is None
+               for position, result, error in results)
+
+
+def test_single_workers_keep_the_source_order():
+    results = list(run_pipeline(iter('abcdefgh'), [(str.upper, 1), (lambda s: s * 2, 1)]))
+    assert [result for _, result, _ in results] == ['AA', 'BB', 'CC', 'DD', 'EE', 'FF', 'GG', 'HH']
+
+
+def test_failed_item_carries_its_input_and_skips_later_stages():
+    later = []
+
+    def check(value):
+        if value == 3:
+            raise ValueError('three')
+        return value
+
+    def record(value):
+        later.append(value)
+        return value * 10
+
+    results = {position: (result, error)
+               for position, result, error in run_pipeline(range(6), [(check, 2), (record, 1)])}
+    result, error = results.pop(3)
+    assert result == 3 and isinstance(error, ValueError)
+    assert results == {position: (position * 10, None) for position in (0, 1, 2, 4, 5)}
+    assert sorted(later) == [0, 1, 2, 4, 5]
+
+
+def test_source_error_is_raised_after_earlier_items():
+    def source():
+        yield 1
+        yield 2
+        raise OSError('query failed')
+
+    seen = []
+    with pytest.raises(OSError, match='query failed'):
+        for _, result, _ in run_pipeline(source(), [(lambda value: value, 1)]):
+            seen.append(result)
+    assert sorted(seen) == [1, 2]
+
+
+def test_slow_consumer_holds_back_the_source():
+    read = []
+
+    def source():
+        for number in range(1000):
+            read.append(number)
+            yield number
+
+    stages = [(lambda value: value, 2), (lambda value: value, 1)]
+    results = run_pipeline(source(), stages, queue_size=2)
+    next(results)
+    time.sleep(0.3)
+    # Queues between stages, items held by workers, and the one being fed
+    assert len(read) <= 2 * (len(stages) + 1) + 3 + 2
+    assert len(list(results)) == 999
+
+
+def test_stopping_early_releases_the_threads():
+    before = threading.active_count()
+    results = run_pipeline(range(1000), [(lambda value: value, 3)], queue_size=2)
+    next(results)
+    results.close()
+    assert threading.active_count() == before
@@ -0,0 +1,104 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.notion.planner import RequestPlanner, ResponseCache
+from conftest import FakeNotion
+
+
+class SlowPages:
+    """Client whose pages.retrieve blocks until released, counting calls."""
+
+    def __init__(self, error=None):
+        self.calls = 0
+        self.release = threading.Event()
+        self.error = error
+        self.pages = self
+
+    def retrieve(self, page_id):
+        self.calls += 1
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return {'id': page_id}
+
+
+def call_concurrently(planner, count, **params):
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        futures = [pool.submit(planner.pages.retrieve, **params) for _ in range(count)]
+        # Let every caller reach the planner before the first request returns
+        while sum(planner.reused.values()) < count - 1:
+            threading.Event().wait(0.001)
+        planner.client.release.set()
+        return [future.result() for future in futures]
+
+
+def test_concurrent_identical_requests_run_once():
+    client = SlowPages()
+    planner = RequestPlanner(client)
+    for _ in range(4):
+        planner.expect('pages.retrieve', page_id='p1')
+
+    responses = call_concurrently(planner, 4, page_id='p1')
+    assert client.calls == 1
+    assert all(response is responses[0] for response in responses)
+    assert (planner.planned['pages.retrieve'], planner.executed['pages.retrieve'],
+            planner.reused['pages.retrieve']) == (1, 1, 3)
+    # Released once all four planned consumers had it
+    assert planner._pending == {}
+
+
+def test_errors_reach_every_caller():
+    client = SlowPages(error=RuntimeError('upstream failed'))
+    planner = RequestPlanner(client)
+    for _ in range(3):
+        planner.expect('pages.retrieve', page_id='p1')
+
+    with pytest.raises(RuntimeError):
+        call_concurrently(planner, 3, page_id='p1')
+    assert client.calls == 1
+
+
+def test_unplanned_requests_are_not_held():
+    client = SlowPages()
+    client.release.set()
+    planner = RequestPlanner(client)
+    planner.pages.retrieve(page_id='p1')
+    planner.pages.retrieve(page_id='p1')
+    assert client.calls == 2
+    assert planner._pending == {}
+
+
+def test_response_cache_drops_least_recently_used():
+    cache = ResponseCache(capacity=2)
+    cache.put('a', {'n': 1})
+    cache.put('b', {'n': 2})
+    assert cache.get('a') == {'n': 1}
+    cache.put('c', {'n': 3})
+    assert cache.get('b') is None
+    assert cache.get('a') == {'n': 1} and cache.get('c') == {'n': 3}
+
+
+def test_shared_response_cache_spans_planners():
+    client = SlowPages()
+    client.release.set()
+    responses = ResponseCache()
+    RequestPlanner(client, responses).pages.retrieve(page_id='p1')
+
+    planner = RequestPlanner(client, responses)
+    assert planner.pages.retrieve(page_id='p1') == {'id': 'p1'}
+    assert client.calls == 1
+    assert planner.reused['pages.retrieve'] == 1
+
+
+def test_build_fetches_shared_content_pages_once(make_generator):
+    notion = FakeNotion(articles=4)
+    # Two rows pointing at the same content page
+    notion.rows['blogdb'][1]['properties']['Content'] = notion.rows['blogdb'][0]['properties']['Content']
+    generator = make_generator(notion)
+    generator.generate_site()
+
+    assert notion.pages.retrieve.calls == 0
+    assert notion.blocks.children.list.calls == 3
+    assert generator.planner.reused['blocks.children.list'] == 1
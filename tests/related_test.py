@@ -0,0 +1,106 @@
+import random
+
+from src.generator.related import RelatedIndex
+
+WORDS = ['guitar', 'stage', 'festival', 'vinyl', 'encore', 'support', 'venue', 'tour', 'drums',
+         'setlist', 'crowd', 'bass', 'album', 'single', 'radio', 'studio', 'ticket', 'queue',
+         'glasgow', 'london', 'berlin', 'acoustic', 'feedback', 'amp', 'chorus', 'bridge']
+TAGS = ['music', 'gigs', 'travel', 'life', 'records']
+
+
+def make_document(number, seed):
+    rng = random.Random(seed)
+    return {
+        'key': f'post:{number}',
+        'fingerprint': str(seed),
+        'url': f'/posts/{number}/',
+        'title': ' '.join(rng.sample(WORDS, 2)),
+        'date': f'2024-01-{number % 28 + 1:02d}',
+        'type': 'post',
+        'tags': rng.sample(TAGS, 2),
+        'description': ' '.join(rng.sample(WORDS, 4)),
+        'body': ' '.join(rng.choice(WORDS) for _ in range(60)),
+    }
+
+
+def neighbours(index, documents):
+    """Related documents of every document after a build."""
+    return {document['key']: index.related(document['key']) for document in documents}
+
+
+def build(tmp_path, documents):
+    index = RelatedIndex(tmp_path)
+    index.build(documents)
+    return neighbours(index, documents)
+
+
+def full_build(tmp_path, documents, idf=None):
+    """Build from an empty cache, optionally with a given frozen IDF."""
+    index = RelatedIndex(tmp_path / 'full')
+    index.idf = idf
+    index.build(documents)
+    return neighbours(index, documents)
+
+
+def frozen_idf(tmp_path):
+    return RelatedIndex(tmp_path).idf
+
+
+def test_incremental_builds_match_full_builds_with_the_same_idf(tmp_path):
+    documents = [make_document(number, number) for number in range(120)]
+    assert build(tmp_path / 'incremental', documents) == full_build(tmp_path / 'a', documents)
+
+    edits = [
+        # Edit one document
+        lambda docs: docs[:10] + [make_document(10, 1000)] + docs[11:],
+        # Add one
+        lambda docs: docs + [make_document(500, 500)],
+        # Remove one
+        lambda docs: docs[:40] + docs[41:],
+        # Edit, add and remove together
+        lambda docs: [make_document(5, 2000)] + docs[1:60] + docs[61:] + [make_document(501, 501)],
+    ]
+    for step, edit in enumerate(edits):
+        documents = edit(documents)
+        incremental = build(tmp_path / 'incremental', documents)
+        idf = frozen_idf(tmp_path / 'incremental')
+        assert idf['documents'] == 120
+        assert incremental == full_build(tmp_path / f'step{step}', documents, idf)
+
+
+def test_edit_rescores_only_documents_sharing_changed_postings(tmp_path, capsys):
+    documents = [make_document(number, number) for number in range(400)]
+    RelatedIndex(tmp_path).build(documents)
+    capsys.readouterr()
+
+    documents[10] = make_document(10, 1000)
+    related = build(tmp_path, documents)
+    output = capsys.readouterr().out
+    rescored = int(output.split(' documents, ')[1].split(' re-scored')[0])
+    # Every document shares most of the small test vocabulary, so this is
+    # an upper bound; real archives re-score far fewer
+    assert 1 <= rescored <= len(documents) // 8
+    assert 'IDF recomputed' not in output
+    assert related == full_build(tmp_path / 'full', documents, frozen_idf(tmp_path))
+
+
+def test_idf_is_recomputed_when_the_archive_drifts(tmp_path, capsys):
+    documents = [make_document(number, number) for number in range(100)]
+    RelatedIndex(tmp_path).build(documents)
+
+    documents += [make_document(number, number) for number in range(100, 110)]
+    RelatedIndex(tmp_path).build(documents)
+    assert frozen_idf(tmp_path)['documents'] == 100
+
+    documents.append(make_document(110, 110))
+    related = build(tmp_path, documents)
+    assert 'IDF recomputed' in capsys.readouterr().out.splitlines()[-1]
+    assert frozen_idf(tmp_path)['documents'] == 111
+    assert related == full_build(tmp_path / 'full', documents)
+
+
+def test_unchanged_build_rescores_nothing(tmp_path, capsys):
+    documents = [make_document(number, number) for number in range(50)]
+    RelatedIndex(tmp_path).build(documents)
+    RelatedIndex(tmp_path).build(documents)
+    assert '0 re-scored' in capsys.readouterr().out.splitlines()[-1]
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from src.generator.output import OutputWriter
+from src.generator.search_index import MAX_TERM_SCORE, SearchIndex, tokenize
+
+
+def document(key, title, body='', fingerprint=None, **fields):
+    return {'key': key, 'fingerprint': fingerprint or f'{key}-1', 'url': f'/posts/{key}/',
+            'title': title, 'date': '2024-01-01', 'type': 'post', 'body': body, **fields}
+
+
+def build(tmp_path, documents):
+    """Build the index into tmp_path/out like the generator does; returns the written paths."""
+    index = SearchIndex(tmp_path / 'cache', tmp_path / 'out')
+    try:
+        return index.build(documents, OutputWriter(tmp_path / 'out', tmp_path / 'cache'))
+    finally:
+        index.close()
+
+
+def lookup(tmp_path, term):
+    """Resolve a term to {url: score} the way search.js does."""
+    docs = json.loads((tmp_path / 'out' / 'search' / 'docs.json').read_text())
+    if term[0] not in docs['shards']:
+        return {}
+    shard = json.loads((tmp_path / 'out' / 'search' / f't-{term[0]}.json').read_text())
+    postings = shard.get(term, [])
+    hits, number = {}, 0
+    for delta, score in zip(postings[::2], postings[1::2]):
+        number += delta
+        hits[docs['docs'][number][0]] = score
+    return hits
+
+
+def test_tokenize_normalizes_terms():
+    assert tokenize('<p>The Björk &amp; Sigur Rós gig, 2024!</p>') == ['bjork', 'sigur', 'ros', 'gig', '2024']
+    assert tokenize(None) == []
+
+
+def test_postings_decode_to_weighted_documents(tmp_path):
+    build(tmp_path, [
+        document('a', 'Radiohead live', 'radiohead radiohead encore'),
+        document('b', 'Festival notes', 'radiohead played late', tags=['live']),
+        document('c', 'Quiet night', 'nothing here ' * 300),
+    ])
+
+    assert lookup(tmp_path, 'radiohead') == {'/posts/a/': 12, '/posts/b/': 1}
+    assert lookup(tmp_path, 'live') == {'/posts/a/': 10, '/posts/b/': 6}
+    assert lookup(tmp_path, 'nothing') == {'/posts/c/': MAX_TERM_SCORE}
+    assert lookup(tmp_path, 'zebra') == {}
+    shards = json.loads((tmp_path / 'out' / 'search' / 'docs.json').read_text())['shards']
+    assert shards == sorted({'r', 'e', 'l', 'f', 'n', 'p', 'q', 'h'})
+
+
+def test_unchanged_documents_are_not_retokenized(tmp_path, capsys):
+    build(tmp_path, [document('a', 'First'), document('b', 'Second')])
+
+    def body():
+        raise AssertionError('cached document was re-tokenized')
+
+    assert build(tmp_path, [document('a', 'First', body), document('b', 'Second', body)]) == []
+    assert '0 re-tokenized, 0 of 3 files changed' in capsys.readouterr().out
+
+
+def test_edits_only_rewrite_affected_shards(tmp_path):
+    build(tmp_path, [document('a', 'Alpha'), document('b', 'Bravo')])
+    changed = build(tmp_path, [document('a', 'Alpha'), document('b', 'Bravo', 'banjo', fingerprint='b-2')])
+    assert sorted(changed) == ['search/t-b.json']
+    assert lookup(tmp_path, 'banjo') == {'/posts/b/': 1}
+
+    # A term in a new shard also lists the shard in docs.json
+    changed = build(tmp_path, [document('a', 'Alpha'), document('b', 'Bravo', 'cello', fingerprint='b-3')])
+    assert sorted(changed) == ['search/docs.json', 'search/t-b.json', 'search/t-c.json']
+
+
+def test_document_numbers_stay_stable(tmp_path):
+    build(tmp_path, [document('a', 'Alpha'), document('b', 'Bravo'), document('c', 'Charlie')])
+    changed = build(tmp_path, [document('a', 'Alpha'), document('c', 'Charlie'), document('d', 'Delta')])
+
+    docs = json.loads((tmp_path / 'out' / 'search' / 'docs.json').read_text())['docs']
+    assert [doc and doc[0] for doc in docs] == ['/posts/a/', None, '/posts/c/', '/posts/d/']
+    # Charlie kept its number, so the shard of its terms is untouched
+    assert 'search/t-c.json' not in changed
+    assert lookup(tmp_path, 'bravo') == {}
+    assert lookup(tmp_path, 'delta') == {'/posts/d/': 10}
+    # Bravo was the only term in its shard
+    assert 'b' not in json.loads((tmp_path / 'out' / 'search' / 'docs.json').read_text())['shards']
+
+
+def test_missing_files_are_written_again(tmp_path):
+    build(tmp_path, [document('a', 'Alpha')])
+    (tmp_path / 'out' / 'search' / 't-a.json').unlink()
+    assert sorted(build(tmp_path, [document('a', 'Alpha')])) == ['search/t-a.json']
+
+
+def test_failed_build_keeps_the_previous_state(tmp_path):
+    build(tmp_path, [document('a', 'Alpha')])
+
+    def documents():
+        yield document('a', 'Alpha', 'banjo', fingerprint='a-2')
+        raise RuntimeError('fetch failed')
+
+    with pytest.raises(RuntimeError):
+        build(tmp_path, documents())
+    assert lookup(tmp_path, 'banjo') == {}
+
+    changed = build(tmp_path, [document('a', 'Alpha', 'banjo', fingerprint='a-2')])
+    assert sorted(changed) == ['search/docs.json', 'search/t-b.json']
+    assert lookup(tmp_path, 'banjo') == {'/posts/a/': 1}
@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+from conftest import FakeNotion
+from src.generator.shards import (SHARD_MANIFEST, load_shards, parse_shard, rows_digest, shard_dir,
+                                  shard_of, write_shard_manifest)
+
+
+@pytest.mark.parametrize('value, expected', [('1/1', (1, 1)), ('2/4', (2, 4)), ('4/4', (4, 4))])
+def test_parse_shard(value, expected):
+    assert parse_shard(value) == expected
+
+
+@pytest.mark.parametrize('value', ['0/4', '5/4', '2', 'a/b', '/4', '1/0'])
+def test_parse_shard_rejects_malformed_specifications(value):
+    with pytest.raises(ValueError):
+        parse_shard(value)
+
+
+def test_shard_of_is_stable_and_in_range():
+    ids = [f'1c2d3e4f-0000-4000-8000-{number:012d}' for number in range(200)]
+    shards = [shard_of(page_id, 4) for page_id in ids]
+    assert set(shards) == {1, 2, 3, 4}
+    # Dashes do not matter: Notion returns IDs with and without them
+    assert shards == [shard_of(page_id.replace('-', ''), 4) for page_id in ids]
+    assert all(shard_of(page_id, 1) == 1 for page_id in ids)
+
+
+def test_digest_changes_when_a_row_is_edited():
+    rows = [{'id': 'a', 'last_edited_time': '2024-01-01T00:00:00.000Z'},
+            {'id': 'b', 'last_edited_time': '2024-01-01T00:00:00.000Z'}]
+    edited = [rows[0], {'id': 'b', 'last_edited_time': '2024-03-01T00:00:00.000Z'}]
+    assert rows_digest(rows) == rows_digest([dict(row) for row in rows])
+    assert rows_digest(rows) != rows_digest(edited)
+    assert rows_digest(rows) != rows_digest(rows[::-1])
+
+
+def write_shards(tmp_path, count, rows, skip=()):
+    directories = []
+    for index in range(1, count + 1):
+        directory = shard_dir(tmp_path / 'shards', index, count)
+        directory.mkdir(parents=True)
+        if index not in skip:
+            write_shard_manifest(directory, index, count, rows, [])
+        directories.append(directory)
+    return directories
+
+
+ROWS = [{'id': 'a', 'last_edited_time': '2024-01-01T00:00:00.000Z'}]
+
+
+def test_load_shards_orders_a_complete_set(tmp_path):
+    directories = write_shards(tmp_path, 3, ROWS)
+    shards = load_shards(directories[::-1])
+    assert [manifest['shard'] for _, manifest in shards] == [1, 2, 3]
+
+
+def test_load_shards_refuses_missing_and_repeated_shards(tmp_path):
+    directories = write_shards(tmp_path, 3, ROWS)
+    with pytest.raises(ValueError, match='exactly once'):
+        load_shards(directories[:2])
+    with pytest.raises(ValueError, match='exactly once'):
+        load_shards(directories + directories[:1])
+    with pytest.raises(ValueError, match='No shards'):
+        load_shards([])
+
+
+def test_load_shards_refuses_unreadable_manifests(tmp_path):
+    directories = write_shards(tmp_path, 2, ROWS, skip={2})
+    with pytest.raises(ValueError, match='Cannot read'):
+        load_shards(directories)
+
+    manifest = json.loads((directories[0] / SHARD_MANIFEST).read_text())
+    (directories[1] / SHARD_MANIFEST).write_text(json.dumps({**manifest, 'shard': 2, 'v': 1}))
+    with pytest.raises(ValueError, match='version'):
+        load_shards(directories)
+
+
+def test_load_shards_refuses_shards_of_different_databases(tmp_path):
+    directories = write_shards(tmp_path, 2, ROWS)
+    edited = [{'id': 'a', 'last_edited_time': '2024-02-01T00:00:00.000Z'}]
+    write_shard_manifest(directories[1], 2, 2, edited, [])
+    with pytest.raises(ValueError, match='different versions'):
+        load_shards(directories)
+
+
+def test_merged_shards_build_the_same_site(make_generator, tmp_path):
+    notion = FakeNotion(articles=12)
+    directories = [shard_dir(tmp_path / 'shards', index, 3) for index in range(1, 4)]
+    written = sum(make_generator(notion, name=f'shard{index}').generate_shard(index, 3, directory)
+                  for index, directory in enumerate(directories, start=1))
+    assert written == 12
+    fetched = notion.blocks.children.list.calls
+
+    merged = make_generator(notion, name='merged')
+    assert merged.generate_site(shards=directories)
+    # The merge processes no posts itself
+    assert notion.blocks.children.list.calls == fetched
+
+    full = make_generator(notion, name='full')
+    assert full.generate_site()
+    merged_files = sorted(p.relative_to(tmp_path / 'merged' / 'output')
+                          for p in (tmp_path / 'merged' / 'output').rglob('*.html'))
+    full_files = sorted(p.relative_to(tmp_path / 'full' / 'output')
+                        for p in (tmp_path / 'full' / 'output').rglob('*.html'))
+    assert merged_files == full_files
+    for path in full_files:
+        assert (tmp_path / 'merged' / 'output' / path).read_bytes() == \
+            (tmp_path / 'full' / 'output' / path).read_bytes(), path
+
+
+def test_merge_refuses_shards_of_an_edited_database(make_generator, tmp_path):
+    notion = FakeNotion(articles=6)
+    directories = [shard_dir(tmp_path / 'shards', index, 2) for index in (1, 2)]
+    make_generator(notion, name='shard1').generate_shard(1, 2, directories[0])
+    notion.rows['blogdb'][0]['last_edited_time'] = '2025-01-01T00:00:00.000Z'
+    make_generator(notion, name='shard2').generate_shard(2, 2, directories[1])
+
+    with pytest.raises(ValueError, match='different versions'):
+        make_generator(notion, name='merged').generate_site(shards=directories)
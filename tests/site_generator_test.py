@@ -0,0 +1,88 @@
+import re
+from urllib.parse import quote
+
+import pytest
+
+from conftest import FakeNotion
+from src.generator.deploy import MANIFEST_NAME, load_manifest
+
+
+def published_files(output_dir):
+    return {path.relative_to(output_dir).as_posix() for path in output_dir.rglob('*')
+            if path.is_file() and path.name != MANIFEST_NAME}
+
+
+def test_build_after_failed_build_publishes_every_page(make_generator, tmp_path, monkeypatch):
+    generator = make_generator()
+
+    def fail():
+        raise RuntimeError('stage failed')
+
+    # Fail after the post pages and listings were written
+    monkeypatch.setattr(generator, '_generate_about_page', fail)
+    with pytest.raises(RuntimeError):
+        generator.generate_site()
+
+    make_generator().generate_site()
+
+    output_dir = tmp_path / 'site' / 'output'
+    manifest = load_manifest(output_dir / MANIFEST_NAME)
+    assert 'posts/post-number-0/index.html' in manifest
+    assert set(manifest) == published_files(output_dir)
+
+
+def test_rebuild_keeps_manifest_complete(make_generator, tmp_path):
+    make_generator().generate_site()
+    output_dir = tmp_path / 'site' / 'output'
+    first = load_manifest(output_dir / MANIFEST_NAME)
+
+    make_generator().generate_site()
+    assert load_manifest(output_dir / MANIFEST_NAME) == first
+    assert set(first) == published_files(output_dir)
+
+
+def test_sitemap_lists_every_published_page(make_generator, tmp_path):
+    generator = make_generator()
+    generator.generate_site()
+    output_dir = tmp_path / 'site' / 'output'
+    locations = set(re.findall(r'<loc>(.*?)</loc>', (output_dir / 'sitemap.xml').read_text()))
+
+    pages = {path for path in published_files(output_dir) if path.endswith('.html')}
+    expected = {f"{generator.site.site_url}/{quote(page[:-len('index.html')])}" for page in pages}
+    assert locations == expected
+    assert any('/gigs/years/' in url for url in locations)
+    assert f"{generator.site.site_url}/search/" in locations
+
+
+@pytest.mark.parametrize('date', [{'date': None}, {'date': {'start': None}}, {}])
+def test_posts_without_a_date_use_their_creation_date(make_generator, tmp_path, date):
+    notion = FakeNotion(articles=3)
+    notion.rows['blogdb'][1]['properties']['Date'] = date
+    notion.rows['blogdb'][1]['created_time'] = '2021-06-15T10:00:00.000Z'
+    assert make_generator(notion).generate_site()
+
+    page = (tmp_path / 'site' / 'output' / 'posts' / 'post-number-1' / 'index.html').read_text()
+    assert '<time datetime="2021-06-15">' in page
+    assert '2021-06-15T00:00:00Z' in (tmp_path / 'site' / 'output' / 'feed.xml').read_text()
+
+
+def test_about_page_has_the_now_playing_widget(make_generator, tmp_path, monkeypatch):
+    monkeypatch.setenv('NOW_PLAYING_API_URL', 'https://now.example')
+    make_generator().generate_site()
+
+    about = (tmp_path / 'site' / 'output' / 'about' / 'index.html').read_text()
+    assert 'Currently Playing' in about
+    # The sidebar widget and the About page's are both filled from the API
+    assert about.count('data-now-playing') == 2
+    assert 'data-api-base="https://now.example"' in about
+
+
+def test_post_pages_are_spilled_then_get_related_content(make_generator, tmp_path):
+    make_generator(FakeNotion(articles=6)).generate_site()
+    spills = sorted((tmp_path / 'site' / 'cache' / 'post-pages').glob('*.html'))
+    assert len(spills) == 6
+    assert all('<!-- related -->' in spill.read_text() for spill in spills)
+
+    page = (tmp_path / 'site' / 'output' / 'posts' / 'post-number-0' / 'index.html').read_text()
+    assert '<!-- related -->' not in page
+    assert '<aside class="related">' in page
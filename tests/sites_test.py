@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from conftest import TEMPLATE_DIR, FakeNotion
+from src.generator.sites import SiteConfig, build_sites, load_sites
+
+
+def test_load_sites_resolves_paths_and_database_variables(tmp_path, monkeypatch):
+    monkeypatch.setenv('DIARY_DB', 'diarydb')
+    path = tmp_path / 'sites.json'
+    path.write_text(json.dumps({'sites': [
+        {'name': 'main', 'databases': {'posts': 'blogdb', 'gigs': '$MISSING_DB'}},
+        {'name': 'diary', 'title': 'Tour Diary', 'output_dir': 'out/diary',
+         'databases': {'posts': '$DIARY_DB'}},
+    ]}))
+
+    main, diary = load_sites(path)
+    assert main.database_id('NOTION_DATABASE_ID') == 'blogdb'
+    assert main.database_id('NOTION_GIGS_DATABASE_ID') is None
+    assert main.database_id('NOTION_MEDIA_DATABASE_ID') is None
+    assert diary.require_database('NOTION_DATABASE_ID') == 'diarydb'
+    assert diary.output_dir == tmp_path / 'out' / 'diary'
+    assert diary.title == 'Tour Diary'
+    with pytest.raises(ValueError, match='MISSING_DB'):
+        main.require_database('NOTION_GIGS_DATABASE_ID')
+
+
+@pytest.mark.parametrize('sites', [
+    [{'name': 'a'}, {'name': 'a'}],
+    [{'name': 'a', 'databases': {'blog': 'x'}}],
+    [{'name': 'a', 'colour': 'red'}],
+    [],
+])
+def test_load_sites_rejects_malformed_files(tmp_path, sites):
+    path = tmp_path / 'sites.json'
+    path.write_text(json.dumps({'sites': sites}))
+    with pytest.raises(ValueError):
+        load_sites(path)
+
+
+def test_sites_share_responses_and_rendered_blocks(site_env, tmp_path, capsys):
+    notion = FakeNotion(articles=5)
+    sites = [
+        SiteConfig(name, title=name.title(), base_url=f'/{name}', template_dir=TEMPLATE_DIR,
+                   output_dir=tmp_path / name / 'output', cache_dir=tmp_path / name / 'cache',
+                   databases=databases)
+        for name, databases in [
+            ('main', {'NOTION_DATABASE_ID': 'blogdb', 'NOTION_GIGS_DATABASE_ID': 'gigdb'}),
+            ('mirror', {'NOTION_DATABASE_ID': 'blogdb'}),
+        ]
+    ]
+
+    assert build_sites(sites, notion) == {'main': True, 'mirror': True}
+    # The second site's posts come from the responses and blocks of the first
+    assert notion.blocks.children.list.calls == 5
+    assert notion.databases.query.calls == 2
+    assert 'Built 2 sites; 10 blocks rendered from the shared cache' in capsys.readouterr().out
+
+    main = (tmp_path / 'main' / 'output' / 'index.html').read_text()
+    mirror = (tmp_path / 'mirror' / 'output' / 'index.html').read_text()
+    assert 'href="/main/posts/' in main and 'href="/mirror/posts/' in mirror
+    assert (tmp_path / 'main' / 'output' / 'gigs' / 'index.html').exists()
+    assert not (tmp_path / 'mirror' / 'output' / 'gigs').exists()
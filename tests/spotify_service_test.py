@@ -0,0 +1,110 @@
+import threading
+import time
+from email.utils import formatdate
+
+import pytest
+import spotipy
+
+from src.spotify.service import DEFAULT_RATE_LIMIT_BACKOFF, SpotifyService, retry_after_seconds
+
+
+class FakeAuthManager:
+    class cache_handler:
+        @staticmethod
+        def get_cached_token():
+            return {'access_token': 'token'}
+
+    @staticmethod
+    def validate_token(token):
+        return token
+
+
+class FakeSpotify:
+    auth_manager = FakeAuthManager()
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """SpotifyService whose endpoints count their calls."""
+    monkeypatch.setenv('SPOTIFY_CLIENT_ID', 'id')
+    monkeypatch.setenv('SPOTIFY_CLIENT_SECRET', 'secret')
+    service = SpotifyService(tmp_path / 'spotify.json')
+    service._sp = FakeSpotify()
+    service.calls = []
+
+    def endpoint(name):
+        def fetch():
+            service.calls.append(name)
+            return f'{name} data'
+        return fetch
+
+    service.endpoints = {name: endpoint(name) for name in service.endpoints}
+    return service
+
+
+def rate_limited(retry_after):
+    def fetch():
+        raise spotipy.SpotifyException(429, -1, 'rate limited', headers={'Retry-After': retry_after})
+    return fetch
+
+
+def test_refresh_fetches_only_the_given_endpoints(service):
+    service.refresh([])
+    assert service.calls == []
+    service.refresh(['top_tracks'])
+    assert service.calls == ['top_tracks']
+    service.refresh()
+    assert sorted(service.calls) == ['current_track', 'recently_played', 'top_tracks', 'top_tracks']
+
+
+def test_background_refresh_skips_fresh_data(service):
+    service.refresh()
+    service.calls.clear()
+
+    service.refresh_in_background()
+    deadline = time.time() + 5
+    while service.refreshing and time.time() < deadline:
+        time.sleep(0.01)
+    assert not service.refreshing
+    assert service.calls == []
+
+
+def test_background_refresh_fetches_stale_endpoints(service):
+    service.refresh()
+    service.cache['entries']['recently_played']['fetched_at'] -= 3600
+    service.calls.clear()
+
+    assert service.get_recently_played() == 'recently_played data'
+    for thread in threading.enumerate():
+        if thread.name == 'spotify-refresh':
+            thread.join(5)
+    assert service.calls == ['recently_played']
+
+
+@pytest.mark.parametrize('retry_after, backoff', [
+    ('120', 120),
+    (None, DEFAULT_RATE_LIMIT_BACKOFF),
+    ('soon', DEFAULT_RATE_LIMIT_BACKOFF),
+])
+def test_rate_limit_backs_off_and_keeps_data(service, retry_after, backoff):
+    service.refresh()
+    service.endpoints['top_tracks'] = rate_limited(retry_after)
+    service.cache['entries']['top_tracks']['fetched_at'] = 0
+
+    started = time.time()
+    service.refresh(['top_tracks'])
+    assert service.cache['entries']['top_tracks']['data'] == 'top_tracks data'
+    assert started + backoff <= service.cache['backoff_until'] <= time.time() + backoff
+
+    # Nothing is fetched during the back-off
+    service.calls.clear()
+    service.refresh()
+    assert service.calls == []
+
+
+def test_retry_after_accepts_http_dates():
+    now = 1700000000
+    assert retry_after_seconds(formatdate(now + 90, usegmt=True), now) == 90
+    assert retry_after_seconds(formatdate(now - 90, usegmt=True), now) == 0
+    assert retry_after_seconds('-5', now) == 0
+    assert retry_after_seconds('Thu, 99 Foo', now) == DEFAULT_RATE_LIMIT_BACKOFF
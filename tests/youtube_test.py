@@ -0,0 +1,100 @@
+import pytest
+
+from src.generator.output import OutputWriter
+from src.generator.thumbnails import ORIGINAL_WIDTH, VideoThumbnails
+from src.notion.youtube import embed_url, facade, parse_youtube_url, watch_url
+
+VIDEO = 'dQw4w9WgXcQ'
+
+
+@pytest.mark.parametrize('url, expected', [
+    (f'https://www.youtube.com/watch?v={VIDEO}', (VIDEO, 0, None)),
+    (f'https://m.youtube.com/watch/?v={VIDEO}&feature=share', (VIDEO, 0, None)),
+    (f'https://music.youtube.com/watch?v={VIDEO}', (VIDEO, 0, None)),
+    (f'https://youtu.be/{VIDEO}', (VIDEO, 0, None)),
+    (f'https://youtu.be/{VIDEO}?si=abc&t=42', (VIDEO, 42, None)),
+    (f'https://www.youtube.com/shorts/{VIDEO}', (VIDEO, 0, None)),
+    (f'https://youtube.com/shorts/{VIDEO}?feature=share', (VIDEO, 0, None)),
+    (f'https://www.youtube.com/live/{VIDEO}', (VIDEO, 0, None)),
+    (f'https://www.youtube-nocookie.com/embed/{VIDEO}?start=75', (VIDEO, 75, None)),
+    (f'https://www.youtube.com/v/{VIDEO}', (VIDEO, 0, None)),
+    (f'https://www.youtube.com/watch?v={VIDEO}&t=90s', (VIDEO, 90, None)),
+    (f'https://www.youtube.com/watch?v={VIDEO}&t=1m30s', (VIDEO, 90, None)),
+    (f'https://www.youtube.com/watch?v={VIDEO}&t=1h2m3s', (VIDEO, 3723, None)),
+    (f'https://www.youtube.com/watch?v={VIDEO}#t=15', (VIDEO, 15, None)),
+    (f'https://www.youtube.com/watch?v={VIDEO}&t=soon', (VIDEO, 0, None)),
+    (f'https://www.youtube.com/watch?v={VIDEO}&list=PLabc_123-x', (VIDEO, 0, 'PLabc_123-x')),
+    ('https://www.youtube.com/playlist?list=PLabc_123-x', (None, 0, 'PLabc_123-x')),
+    (f'  https://WWW.YOUTUBE.COM:443/watch?v={VIDEO}  ', (VIDEO, 0, None)),
+])
+def test_parse_youtube_url(url, expected):
+    video = parse_youtube_url(url)
+    assert (video['id'], video['start'], video['playlist']) == expected
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.youtube.com/watch?v=tooshort',
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQQ',
+    'https://www.youtube.com/watch?v=dQw4w9WgX%3C',
+    'https://youtu.be/',
+    'https://www.youtube.com/shorts/',
+    'https://www.youtube.com/channel/UC1234567890',
+    'https://www.youtube.com/playlist?list=<script>',
+    f'https://notyoutube.com/watch?v={VIDEO}',
+    f'https://youtube.com.evil.example/watch?v={VIDEO}',
+    f'https://vimeo.com/{VIDEO}',
+    'not a url',
+])
+def test_invalid_urls_are_rejected(url):
+    assert parse_youtube_url(url) is None
+
+
+def test_player_and_page_urls():
+    video = parse_youtube_url(f'https://youtu.be/{VIDEO}?t=42&list=PLx')
+    assert embed_url(video) == f'https://www.youtube.com/embed/{VIDEO}?list=PLx&start=42'
+    assert watch_url(video) == f'https://www.youtube.com/watch?v={VIDEO}&list=PLx&t=42s'
+
+    playlist = parse_youtube_url('https://www.youtube.com/playlist?list=PLx')
+    assert embed_url(playlist) == 'https://www.youtube.com/embed/videoseries?list=PLx'
+    assert watch_url(playlist) == 'https://www.youtube.com/playlist?list=PLx'
+
+
+def test_facade_escapes_and_links_to_the_video():
+    markup = facade(parse_youtube_url(f'https://youtu.be/{VIDEO}?t=5'), title='"Live" & loud')
+    assert f'href="https://www.youtube.com/watch?v={VIDEO}&amp;t=5s"' in markup
+    assert f'data-embed="https://www.youtube.com/embed/{VIDEO}?start=5"' in markup
+    assert 'aria-label="Play video: &quot;Live&quot; &amp; loud"' in markup
+    assert f'src="https://i.ytimg.com/vi/{VIDEO}/hqdefault.jpg"' in markup
+
+    assert '<img' not in facade(parse_youtube_url('https://www.youtube.com/playlist?list=PLx'))
+
+
+def test_thumbnails_are_mirrored_once_and_localized(tmp_path):
+    fetched = []
+
+    def fetch(url):
+        fetched.append(url)
+        if 'broken' in url:
+            raise OSError('unreachable')
+        return b'jpeg'
+
+    content_html = facade(parse_youtube_url(f'https://youtu.be/{VIDEO}')) + facade(
+        {'id': 'broken_____', 'start': 0, 'playlist': None})
+    thumbnails = VideoThumbnails(tmp_path / 'cache', fetch)
+    thumbnails.scan('a', content_html)
+    thumbnails.prepare(['a'])
+
+    localized = thumbnails.localize(content_html, '/site')
+    assert f'src="/site/thumbnails/youtube/{VIDEO}-{ORIGINAL_WIDTH}.jpg"' in localized
+    assert 'src="https://i.ytimg.com/vi/broken_____/hqdefault.jpg"' in localized
+
+    output = OutputWriter(tmp_path / 'out', tmp_path / 'cache')
+    thumbnails.publish(output, ['a'])
+    assert (tmp_path / 'out' / 'thumbnails' / 'youtube' / f'{VIDEO}-{ORIGINAL_WIDTH}.jpg').exists()
+
+    # Mirrored thumbnails are never fetched again, failures only after FAILURE_TTL
+    fetched.clear()
+    thumbnails = VideoThumbnails(tmp_path / 'cache', fetch)
+    thumbnails.scan('a', content_html)
+    thumbnails.prepare(['a'])
+    assert fetched == []